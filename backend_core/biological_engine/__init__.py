@@ -1,5 +1,6 @@
-from .cell_cycle_simulator import CellCycleMonitor
+from .cell_cycle_simulator import CellCycleMonitor, CellPopulationEngine
 from .immune_system_optimizer import ImmuneDefenseSim
 from .rna_translation_sim import ProteinSynthesizer
-from .microbiome_analyzer import GutBiomeAnalyzer
+from .microbiome_analyzer import GutBiomeAnalyzer, CohortBiomeAnalyzer
 from .dna_transcription_sim import GeneticSequencer
+from .motif_scanner import MotifPanel, MotifScanner
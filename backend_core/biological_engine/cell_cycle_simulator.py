@@ -1,17 +1,37 @@
 import random
+from typing import Callable, Optional
+
+import numpy as np
+
+from .event_log import EVENT_ARREST, SimulationEventLog
 
 class CellCycleMonitor:
-    def __init__(self, p53_gene_status: str = "functional"):
+    # Recent events formatted into the "log" list of simulate_mitosis();
+    # the full ring is returned as "event_log"
+    LOG_TAIL = 100
+
+    def __init__(self, p53_gene_status: str = "functional", log_capacity: int = 1024,
+                 audit_log_path: Optional[str] = None):
         self.p53_status = p53_gene_status
         self.phases = ["G1", "S", "G2", "M"]
         self.current_phase_index = 0
         self.mutation_load = 0.0
+        # Only the last `log_capacity` events are kept in memory;
+        # set audit_log_path to stream every event to disk as well.
+        self.log_capacity = log_capacity
+        self.audit_log_path = audit_log_path
 
-    def simulate_mitosis(self, time_steps: int, cellular_stress: float):
-        history = []
+    def simulate_mitosis(self, time_steps: int, cellular_stress: float,
+                         progress_callback: Optional[Callable[[float], None]] = None):
+        history = SimulationEventLog(self.log_capacity, audit_path=self.audit_log_path)
         divisions = 0
+        # Report progress roughly every 1% of the run
+        progress_stride = max(1, time_steps // 100)
         
         for t in range(time_steps):
+            if progress_callback is not None and t % progress_stride == 0:
+                progress_callback(t / time_steps)
+
             # Stochastic check: Even with stress, sometimes cells get lucky (or unlucky)
             random_factor = random.uniform(0.0, 0.2)
             effective_stress = cellular_stress - random_factor
@@ -28,10 +48,12 @@ class CellCycleMonitor:
                 phase = self.phases[self.current_phase_index]
                 if phase == "M":
                     divisions += 1
-                history.append(f"T{t}: {phase} -> OK")
+                history.record(t, self.current_phase_index)
             else:
                 self.mutation_load += 0.05
-                history.append(f"T{t}: ARREST -> Repairing DNA")
+                history.record(t, EVENT_ARREST)
+
+        history.close()
 
         # Calculate a Risk Score (0 to 100)
         risk = (divisions / time_steps) * 100 + (self.mutation_load * 50)
@@ -39,5 +61,112 @@ class CellCycleMonitor:
         return {
             "divisions": divisions,
             "cancer_risk_score": min(100.0, round(risk, 2)),
-            "log": history
+            "log": history.tail(self.LOG_TAIL),
+            "event_log": history
+        }
+
+    def simulate_population(self, n_cells: int, time_steps: int, cellular_stress: float,
+                            seed: Optional[int] = None) -> dict:
+        """
+        Runs the same checkpoint model for a whole population of cells sharing
+        this monitor's p53 status. See CellPopulationEngine for the details.
+        """
+        mutated_fraction = 1.0 if self.p53_status == "mutated" else 0.0
+        engine = CellPopulationEngine(n_cells, p53_mutated_fraction=mutated_fraction, seed=seed)
+        return engine.simulate(time_steps, cellular_stress)
+
+
+class CellPopulationEngine:
+    """
+    Population-scale Monte Carlo version of CellCycleMonitor.
+    Every cell follows the same G1 -> S -> G2 -> M checkpoint model, but the
+    whole population is advanced at once as NumPy arrays instead of one cell
+    per Python loop iteration.
+
+    State per cell:
+    - phase_index:   int8, index into ["G1", "S", "G2", "M"]
+    - arrest_count:  int32, number of checkpoint arrests (mutation load = 0.05 per arrest)
+    - p53_mutated:   bool mask, mutated cells skip the stress checkpoint
+    """
+
+    MUTATION_LOAD_PER_ARREST = 0.05
+
+    def __init__(self, n_cells: int, p53_mutated_fraction: float = 0.0,
+                 seed: Optional[int] = None, chunk_size: int = 1 << 18):
+        if n_cells <= 0:
+            raise ValueError("n_cells must be positive")
+
+        self.phases = ["G1", "S", "G2", "M"]
+        self.n_cells = n_cells
+        # Cells are processed in cache-sized chunks so temporaries stay small
+        # even for 10^7 cells.
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+
+        self.phase_index = np.zeros(n_cells, dtype=np.int8)
+        self.arrest_count = np.zeros(n_cells, dtype=np.int32)
+        self.p53_mutated = self.rng.random(n_cells) < p53_mutated_fraction
+
+    @property
+    def mutation_load(self) -> np.ndarray:
+        return self.arrest_count * self.MUTATION_LOAD_PER_ARREST
+
+    def simulate(self, time_steps: int, cellular_stress: float) -> dict:
+        """
+        Advances every cell by `time_steps` checkpoints.
+
+        Returns the same summary as CellCycleMonitor.simulate_mitosis (averaged
+        over the population) plus per-step histograms:
+        - phase_histogram: (time_steps, 4) cell counts per phase after each step
+        - arrested:        (time_steps,) number of cells arrested at each step
+        """
+        if time_steps <= 0:
+            raise ValueError("time_steps must be positive")
+
+        phase_histogram = np.zeros((time_steps, 4), dtype=np.int64)
+        arrested = np.zeros(time_steps, dtype=np.int64)
+        divisions = np.zeros(self.n_cells, dtype=np.int32)
+        arrests_before = self.arrest_count.copy()
+
+        # effective_stress = stress - U(0, 0.2) < 0.6  <=>  U > stress - 0.6
+        pass_threshold = np.float32(cellular_stress - 0.6)
+
+        for start in range(0, self.n_cells, self.chunk_size):
+            stop = min(start + self.chunk_size, self.n_cells)
+            phase = self.phase_index[start:stop]
+            arrests = self.arrest_count[start:stop]
+            mutated = self.p53_mutated[start:stop]
+            chunk_divisions = divisions[start:stop]
+            n = stop - start
+
+            random_factor = np.empty(n, dtype=np.float32)
+            passed = np.empty(n, dtype=bool)
+            for t in range(time_steps):
+                self.rng.random(n, dtype=np.float32, out=random_factor)
+                random_factor *= 0.2
+                np.greater(random_factor, pass_threshold, out=passed)
+                passed |= mutated
+
+                phase += passed
+                phase &= 3  # wrap around after M
+                chunk_divisions += passed & (phase == 3)
+                arrests += ~passed
+
+                phase_histogram[t] += np.bincount(phase, minlength=4)
+                arrested[t] += n - np.count_nonzero(passed)
+
+        # Same risk formula as the single-cell monitor, evaluated per cell
+        mutation_load = self.mutation_load
+        risk = np.minimum(100.0, (divisions / time_steps) * 100 + mutation_load * 50)
+        new_arrests = self.arrest_count - arrests_before
+
+        return {
+            "divisions": int(divisions.sum()),
+            "mean_divisions_per_cell": round(float(divisions.mean()), 4),
+            "cancer_risk_score": min(100.0, round(float(risk.mean()), 2)),
+            "mean_mutation_load": round(float(mutation_load.mean()), 4),
+            "arrest_events": int(new_arrests.sum()),
+            "phase_labels": list(self.phases),
+            "phase_histogram": phase_histogram,
+            "arrested": arrested,
         }
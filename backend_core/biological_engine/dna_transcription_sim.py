@@ -1,8 +1,37 @@
+from typing import Optional
+
+from .motif_scanner import MotifPanel, MotifScanner
+
 class GeneticSequencer:
+    def __init__(self, motif_panel: Optional[MotifPanel] = None):
+        # Without a panel, analyze_risk falls back to the single BRCA1 marker check
+        self.scanner = MotifScanner(motif_panel) if motif_panel is not None else None
+
     def transcribe(self, dna: str) -> str:
         return dna.replace("T", "U")
 
     def analyze_risk(self, dna: str) -> list:
+        if self.scanner is not None:
+            return self.scanner.scan(dna).detected_risks()
+
         risks = []
         if "BRCA1" in dna: risks.append("Breast Cancer Risk")
         return risks
+
+    # --- Packed genome access (see data_ingestion.packed_genome) ---
+    # `genome` is a PackedGenome; only the requested region is decoded.
+
+    def transcribe_region(self, genome, record: str, start: int = 0, end: Optional[int] = None) -> str:
+        return self.transcribe(genome.fetch(record, start, end))
+
+    def analyze_risk_region(self, genome, record: str, start: int = 0, end: Optional[int] = None) -> list:
+        return self.analyze_risk(genome.fetch(record, start, end))
+
+    def scan_genome(self, path: str, processes: Optional[int] = None):
+        """
+        Runs the motif panel over every record of a FASTA or packed genome file,
+        one worker process per record. Returns a ScanResult.
+        """
+        if self.scanner is None:
+            raise ValueError("scan_genome needs a motif panel")
+        return self.scanner.scan_file(path, processes=processes)
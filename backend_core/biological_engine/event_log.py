@@ -0,0 +1,125 @@
+from array import array
+from typing import List, Optional
+
+import numpy as np
+
+# Integer event codes recorded by the simulation engines.
+# Codes 0-3 match the phase index of CellCycleMonitor.phases.
+EVENT_G1_OK = 0
+EVENT_S_OK = 1
+EVENT_G2_OK = 2
+EVENT_M_OK = 3
+EVENT_ARREST = 4
+
+EVENT_MESSAGES = {
+    EVENT_G1_OK: "G1 -> OK",
+    EVENT_S_OK: "S -> OK",
+    EVENT_G2_OK: "G2 -> OK",
+    EVENT_M_OK: "M -> OK",
+    EVENT_ARREST: "ARREST -> Repairing DNA",
+}
+
+# On-disk record layout of the audit stream (packed, 5 bytes per event)
+AUDIT_DTYPE = np.dtype([("t", "<u4"), ("code", "u1")])
+
+
+class SimulationEventLog:
+    """
+    Bounded ring buffer of simulation events.
+    Events are stored as (timestamp, event code) integer pairs; the human
+    readable "T{t}: ..." strings are only built for the entries that are read.
+
+    Optionally every event is also streamed to a binary audit file
+    (AUDIT_DTYPE records) before it is overwritten in the ring.
+    """
+
+    def __init__(self, capacity: int = 1024, audit_path: Optional[str] = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        # record() writes through the array.array objects (cheap scalar stores),
+        # everything else reads through zero-copy NumPy views of the same memory
+        self._t_buf = array("I", bytes(4 * capacity))
+        self._code_buf = array("B", bytes(capacity))
+        self._t = np.frombuffer(self._t_buf, dtype=np.uint32)
+        self._code = np.frombuffer(self._code_buf, dtype=np.uint8)
+        self._next = 0  # total events recorded so far
+        self._flushed = 0  # events already written to the audit file
+
+        self.audit_path = audit_path
+        self._audit_file = open(audit_path, "ab") if audit_path else None
+
+    def record(self, t: int, code: int):
+        i = self._next % self.capacity
+        if self._audit_file is not None and i == 0 and self._next > 0:
+            # Ring is about to wrap: persist the full buffer first
+            self._flush_audit()
+        self._t_buf[i] = t
+        self._code_buf[i] = code
+        self._next += 1
+
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+
+    @property
+    def total_events(self) -> int:
+        """Number of events recorded, including those dropped from the ring."""
+        return self._next
+
+    def _ordered_positions(self) -> np.ndarray:
+        # Ring slots from oldest to newest
+        n = len(self)
+        first = self._next - n
+        return (np.arange(first, self._next) % self.capacity)
+
+    def codes(self) -> np.ndarray:
+        """Event codes currently in the buffer, oldest first."""
+        return self._code[self._ordered_positions()]
+
+    def timestamps(self) -> np.ndarray:
+        """Timestamps currently in the buffer, oldest first."""
+        return self._t[self._ordered_positions()]
+
+    def format_entry(self, position: int) -> str:
+        return f"T{self._t[position]}: {EVENT_MESSAGES[int(self._code[position])]}"
+
+    def __getitem__(self, index):
+        positions = self._ordered_positions()
+        if isinstance(index, slice):
+            return [self.format_entry(p) for p in positions[index]]
+        return self.format_entry(positions[index])
+
+    def __iter__(self):
+        for p in self._ordered_positions():
+            yield self.format_entry(p)
+
+    def tail(self, n: int) -> List[str]:
+        """Formats only the last `n` events."""
+        if n <= 0:
+            return []
+        return self[-n:]
+
+    def _flush_audit(self):
+        if self._audit_file is None or self._flushed >= self._next:
+            return
+        # Only the part of the ring that has not been written yet
+        pending = self._next - self._flushed
+        positions = np.arange(self._flushed, self._next) % self.capacity
+        records = np.empty(pending, dtype=AUDIT_DTYPE)
+        records["t"] = self._t[positions]
+        records["code"] = self._code[positions]
+        records.tofile(self._audit_file)
+        self._flushed = self._next
+
+    def close(self):
+        """Flushes any pending events to the audit file and closes it."""
+        if self._audit_file is not None:
+            self._flush_audit()
+            self._audit_file.close()
+            self._audit_file = None
+
+
+def read_audit_log(path: str) -> np.ndarray:
+    """Loads an audit stream written by SimulationEventLog (memory-mapped)."""
+    return np.memmap(path, dtype=AUDIT_DTYPE, mode="r")
@@ -1,4 +1,10 @@
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
 
 class GutBiomeAnalyzer:
     def __init__(self, bacteria_sample: dict):
@@ -13,3 +19,184 @@ class GutBiomeAnalyzer:
             pi = count / total
             if pi > 0: entropy += pi * math.log(pi)
         return -round(entropy, 3)
+
+
+class CohortBiomeAnalyzer:
+    """
+    Diversity metrics for a whole cohort at once.
+    Works on a samples x taxa count matrix stored as CSR, so the long tail of
+    rare taxa (zero in most samples) costs nothing. Pairwise distances are
+    computed block by block: working memory depends on block_size, not on
+    the number of samples, and the result can be written to a memmap on disk.
+    """
+
+    METRICS = ("braycurtis", "jaccard")
+
+    def __init__(self, counts, taxa: Optional[Sequence[str]] = None,
+                 sample_ids: Optional[Sequence[str]] = None):
+        self.counts = sp.csr_matrix(counts, dtype=np.float64)
+        self.counts.eliminate_zeros()
+        if (self.counts.data < 0).any():
+            raise ValueError("Taxon counts cannot be negative")
+        n_samples, n_taxa = self.counts.shape
+        self.taxa = list(taxa) if taxa is not None else [f"taxon_{i}" for i in range(n_taxa)]
+        self.sample_ids = list(sample_ids) if sample_ids is not None else [str(i) for i in range(n_samples)]
+        if len(self.taxa) != n_taxa or len(self.sample_ids) != n_samples:
+            raise ValueError("taxa/sample_ids do not match the count matrix shape")
+
+    @classmethod
+    def from_samples(cls, samples: Union[Dict[str, dict], List[dict]]) -> "CohortBiomeAnalyzer":
+        """Builds the matrix from GutBiomeAnalyzer-style {taxon: count} dicts."""
+        if isinstance(samples, dict):
+            sample_ids, samples = list(samples), list(samples.values())
+        else:
+            sample_ids = None
+        taxon_index: Dict[str, int] = {}
+        rows, cols, values = [], [], []
+        for row, sample in enumerate(samples):
+            for taxon, count in sample.items():
+                rows.append(row)
+                cols.append(taxon_index.setdefault(taxon, len(taxon_index)))
+                values.append(count)
+        counts = sp.csr_matrix((values, (rows, cols)), shape=(len(samples), len(taxon_index)))
+        return cls(counts, taxa=list(taxon_index), sample_ids=sample_ids)
+
+    @property
+    def n_samples(self) -> int:
+        return self.counts.shape[0]
+
+    def alpha_diversity(self) -> Dict[str, np.ndarray]:
+        """
+        Per-sample Shannon entropy (natural log), Gini-Simpson index (1 - sum p^2),
+        bias-corrected Chao1 richness estimate and observed taxa count.
+        """
+        counts = self.counts
+        rows = np.repeat(np.arange(self.n_samples), np.diff(counts.indptr))
+        values = counts.data
+        totals = np.asarray(counts.sum(axis=1)).ravel()
+
+        safe_totals = np.where(totals > 0, totals, 1.0)
+        p = values / safe_totals[rows]
+        shannon = np.bincount(rows, weights=-p * np.log(p), minlength=self.n_samples)
+        simpson = 1.0 - np.bincount(rows, weights=p * p, minlength=self.n_samples)
+        simpson[totals == 0] = 0.0
+
+        observed = np.diff(counts.indptr).astype(np.float64)
+        singletons = np.bincount(rows, weights=(values == 1), minlength=self.n_samples)
+        doubletons = np.bincount(rows, weights=(values == 2), minlength=self.n_samples)
+        chao1 = observed + singletons * (singletons - 1) / (2 * (doubletons + 1))
+
+        return {"shannon": shannon, "simpson": simpson, "chao1": chao1, "observed": observed}
+
+    def beta_diversity(self, metric: str = "braycurtis", block_size: int = 1024,
+                       workers: Optional[int] = None, out_path: Optional[str] = None) -> np.ndarray:
+        """
+        Full n x n distance matrix (float32).
+        With out_path the matrix is a memmap on disk, so only one block per
+        worker is held in RAM (a 20k-sample cohort needs ~1.6 GB of disk).
+        workers > 1 computes row blocks on a thread pool. Only the NumPy
+        kernels that release the GIL (gathers, minimum, the Jaccard sparse
+        product) overlap, so the speed-up stays below the core count; the
+        per-block work itself is fully vectorized.
+        """
+        n = self.n_samples
+        if out_path:
+            result = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=(n, n))
+        else:
+            result = np.zeros((n, n), dtype=np.float32)
+
+        def fill(block_start: int):
+            for (r0, r1), (c0, c1), block in self._row_blocks(metric, block_size, block_start):
+                result[r0:r1, c0:c1] = block
+                result[c0:c1, r0:r1] = block.T
+
+        starts = range(0, n, block_size)
+        workers = workers or 1
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as pool:
+                list(pool.map(fill, starts))
+        else:
+            for start in starts:
+                fill(start)
+
+        if out_path:
+            result.flush()
+        return result
+
+    def iter_beta_blocks(self, metric: str = "braycurtis", block_size: int = 1024
+                         ) -> Iterator[Tuple[Tuple[int, int], Tuple[int, int], np.ndarray]]:
+        """
+        Streams the upper triangle as ((row_start, row_end), (col_start, col_end), block),
+        for consumers that never need the full matrix.
+        """
+        for start in range(0, self.n_samples, block_size):
+            yield from self._row_blocks(metric, block_size, start)
+
+    def _row_blocks(self, metric: str, block_size: int, row_start: int):
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {self.METRICS}")
+        n = self.n_samples
+        row_end = min(row_start + block_size, n)
+        rows = self.counts[row_start:row_end]
+        for col_start in range(row_start, n, block_size):
+            col_end = min(col_start + block_size, n)
+            cols = self.counts[col_start:col_end]
+            if metric == "jaccard":
+                block = self._jaccard(rows, cols)
+            else:
+                block = self._braycurtis(rows, cols)
+            yield (row_start, row_end), (col_start, col_end), block
+
+    @staticmethod
+    def _jaccard(a: sp.csr_matrix, b: sp.csr_matrix) -> np.ndarray:
+        # Presence/absence: shared taxa via a sparse product
+        pa = (a > 0).astype(np.float32)
+        pb = (b > 0).astype(np.float32)
+        shared = (pa @ pb.T).toarray()
+        union = np.diff(pa.indptr)[:, None] + np.diff(pb.indptr)[None, :] - shared
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distance = np.where(union > 0, 1.0 - shared / union, 0.0)
+        return distance.astype(np.float32)
+
+    @staticmethod
+    def _braycurtis(a: sp.csr_matrix, b: sp.csr_matrix, max_pairs: int = 1 << 22) -> np.ndarray:
+        """
+        BC = 1 - 2 * sum(min(x, y)) / (sum(x) + sum(y)).
+        min(x, y) is zero unless both samples carry the taxon, so the shared
+        sum only visits pairs of non-zeros in the same taxon column: with both
+        blocks in CSC, the pairs of each taxon are enumerated with index
+        arithmetic and reduced with one bincount per chunk of taxa (at most
+        max_pairs pairs, which bounds the scratch memory).
+        """
+        sums_a = np.asarray(a.sum(axis=1)).ravel()
+        sums_b = np.asarray(b.sum(axis=1)).ravel()
+        n_a, n_b = a.shape[0], b.shape[0]
+        shared = np.zeros(n_a * n_b)
+
+        a, b = a.tocsc(), b.tocsc()
+        a.sort_indices()
+        b.sort_indices()
+        per_a, per_b = np.diff(a.indptr), np.diff(b.indptr)
+        pairs = per_a * per_b
+        taxa = np.flatnonzero(pairs)
+        if len(taxa):
+            # Split the taxa into chunks of roughly max_pairs pairs
+            cumulative = np.cumsum(pairs[taxa])
+            bounds = np.searchsorted(cumulative, np.arange(max_pairs, cumulative[-1], max_pairs), side="right")
+            for chunk in np.split(taxa, np.unique(bounds)):
+                if not len(chunk):
+                    continue
+                counts = pairs[chunk]
+                taxon = np.repeat(chunk, counts)
+                local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                width = per_b[taxon]
+                ia = a.indptr[taxon] + local // width
+                ib = b.indptr[taxon] + local % width
+                shared += np.bincount(a.indices[ia] * n_b + b.indices[ib],
+                                      weights=np.minimum(a.data[ia], b.data[ib]), minlength=n_a * n_b)
+        shared = shared.reshape(n_a, n_b)
+
+        total = sums_a[:, None] + sums_b[None, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            distance = np.where(total > 0, 1.0 - 2.0 * shared / total, 0.0)
+        return distance.astype(np.float32)
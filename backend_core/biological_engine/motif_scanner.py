@@ -0,0 +1,334 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Base -> 2-bit code; anything that is not A/C/G/T (N, IUPAC codes) is 4 and never matches
+_CODES = np.full(256, 4, dtype=np.uint8)
+for _base, _code in zip(b"ACGT", range(4)):
+    _CODES[_base] = _code
+    _CODES[_base + 32] = _code
+_COMPLEMENT = bytes.maketrans(b"ACGTacgt", b"TGCAtgca")
+
+# Longest prefix that fits a 64-bit hash; longer motifs are verified byte by byte
+_MAX_HASH_BASES = 32
+# Windows are first screened with a direct-address table of their leading bases
+# (4**11 entries = 4 MB), so the binary search only runs on likely hits
+_PREFILTER_BASES = 11
+
+
+class MotifPanel:
+    """
+    A risk panel of DNA motifs / variant signatures.
+    Each entry is (name, sequence, risk label).
+    """
+
+    def __init__(self, motifs: Iterable[Tuple[str, str, str]]):
+        self.names: List[str] = []
+        self.sequences: List[bytes] = []
+        self.risks: List[str] = []
+        for name, sequence, risk in motifs:
+            sequence = sequence.strip().upper().encode("ascii")
+            if not sequence or sequence.translate(None, b"ACGT"):
+                raise ValueError(f"Motif {name!r} must be a non-empty A/C/G/T sequence")
+            self.names.append(name)
+            self.sequences.append(sequence)
+            self.risks.append(risk)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_file(cls, path: str) -> "MotifPanel":
+        """
+        Loads a panel from JSON ([{"name", "sequence", "risk"}, ...])
+        or CSV/TSV with name, sequence, risk columns.
+        """
+        if path.endswith(".json"):
+            with open(path, "r") as f:
+                entries = json.load(f)
+        else:
+            with open(path, "r", newline="") as f:
+                entries = list(csv.DictReader(f, delimiter="\t" if path.endswith(".tsv") else ","))
+        return cls((e["name"], e["sequence"], e.get("risk", "")) for e in entries)
+
+
+class ScanResult:
+    """
+    Hits of one scan. `positions`, `patterns` and `records` are parallel arrays;
+    positions are 0-based starts on the forward strand.
+    """
+
+    def __init__(self, scanner: "MotifScanner"):
+        self._scanner = scanner
+        self.counts = np.zeros(len(scanner.pattern_motif), dtype=np.int64)
+        self._positions: List[np.ndarray] = []
+        self._patterns: List[np.ndarray] = []
+        self._records: List[str] = []
+
+    def _add(self, record: str, positions: np.ndarray, patterns: np.ndarray, keep_positions: bool):
+        self.counts += np.bincount(patterns, minlength=len(self.counts))
+        if keep_positions and len(positions):
+            order = np.argsort(positions, kind="stable")
+            self._positions.append(positions[order])
+            self._patterns.append(patterns[order])
+            self._records.extend([record] * len(positions))
+
+    def merge(self, other: "ScanResult") -> "ScanResult":
+        self.counts += other.counts
+        self._positions.extend(other._positions)
+        self._patterns.extend(other._patterns)
+        self._records.extend(other._records)
+        return self
+
+    @property
+    def positions(self) -> np.ndarray:
+        return np.concatenate(self._positions) if self._positions else np.zeros(0, dtype=np.int64)
+
+    @property
+    def patterns(self) -> np.ndarray:
+        return np.concatenate(self._patterns) if self._patterns else np.zeros(0, dtype=np.int32)
+
+    def motif_counts(self) -> Dict[str, Dict[str, int]]:
+        """{motif name: {"+": hits, "-": hits}} for every motif with at least one hit."""
+        scanner = self._scanner
+        summary: Dict[str, Dict[str, int]] = {}
+        for pattern in np.flatnonzero(self.counts):
+            name = scanner.panel.names[scanner.pattern_motif[pattern]]
+            strands = summary.setdefault(name, {"+": 0, "-": 0})
+            strands[scanner.pattern_strand[pattern]] += int(self.counts[pattern])
+        return summary
+
+    def detected_risks(self) -> List[str]:
+        scanner = self._scanner
+        hit_motifs = {scanner.pattern_motif[p] for p in np.flatnonzero(self.counts)}
+        return sorted({scanner.panel.risks[m] for m in hit_motifs if scanner.panel.risks[m]})
+
+    def to_records(self) -> List[dict]:
+        scanner = self._scanner
+        hits = []
+        for record, position, pattern in zip(self._records, self.positions.tolist(), self.patterns.tolist()):
+            motif = scanner.pattern_motif[pattern]
+            hits.append({
+                "record": record,
+                "position": position,
+                "strand": scanner.pattern_strand[pattern],
+                "motif": scanner.panel.names[motif],
+                "risk": scanner.panel.risks[motif],
+            })
+        return hits
+
+
+class MotifScanner:
+    """
+    Multi-pattern scanner for a whole MotifPanel.
+
+    The panel is compiled once into sorted tables of 2-bit k-mer hashes,
+    one table per motif length (forward and reverse-complement patterns).
+    Scanning computes the rolling hash of every window with NumPy and
+    matches all motifs of a length with one binary search, so the genome is
+    read once per chunk no matter how many motifs the panel holds.
+    """
+
+    def __init__(self, panel: MotifPanel, both_strands: bool = True):
+        self.panel = panel
+        self.pattern_motif: List[int] = []
+        self.pattern_strand: List[str] = []
+        self.pattern_seq: List[bytes] = []
+
+        for motif, sequence in enumerate(panel.sequences):
+            self._add_pattern(motif, "+", sequence)
+            reverse = sequence.translate(_COMPLEMENT)[::-1]
+            # Palindromic sites would otherwise be reported twice
+            if both_strands and reverse != sequence:
+                self._add_pattern(motif, "-", reverse)
+
+        self.max_length = max((len(s) for s in self.pattern_seq), default=0)
+        self._tables = self._compile()
+
+    def _add_pattern(self, motif: int, strand: str, sequence: bytes):
+        self.pattern_motif.append(motif)
+        self.pattern_strand.append(strand)
+        self.pattern_seq.append(sequence)
+
+    def _compile(self) -> Dict[int, tuple]:
+        """length -> (sorted unique hashes, CSR offsets, pattern ids, prefix filter, prefix shift)."""
+        by_length: Dict[int, List[int]] = {}
+        for pattern, sequence in enumerate(self.pattern_seq):
+            by_length.setdefault(len(sequence), []).append(pattern)
+
+        tables = {}
+        for length, patterns in by_length.items():
+            k = min(length, _MAX_HASH_BASES)
+            hashes = np.array([self._hash(self.pattern_seq[p][:k]) for p in patterns], dtype=np.uint64)
+            order = np.argsort(hashes, kind="stable")
+            hashes = hashes[order]
+            pattern_ids = np.asarray(patterns, dtype=np.int32)[order]
+            unique, starts = np.unique(hashes, return_index=True)
+            offsets = np.append(starts, len(hashes)).astype(np.int64)
+
+            prefix_shift = np.uint64(2 * (k - min(k, _PREFILTER_BASES)))
+            prefilter = np.zeros(4 ** min(k, _PREFILTER_BASES), dtype=bool)
+            prefilter[(unique >> prefix_shift).astype(np.intp)] = True
+            tables[length] = (unique, offsets, pattern_ids, prefilter, prefix_shift)
+        return tables
+
+    @staticmethod
+    def _hash(sequence: bytes) -> int:
+        value = 0
+        for code in _CODES[np.frombuffer(sequence, dtype=np.uint8)]:
+            value = (value << 2) | int(code)
+        return value
+
+    @staticmethod
+    def _window_hashes(powers: Dict[int, np.ndarray], k: int) -> np.ndarray:
+        """
+        Hash of the k-base window starting at every position, built by doubling:
+        hash(a + b)[i] = hash(a)[i] << 2b | hash(b)[i + a], so a k-mer costs
+        O(log k) vector passes instead of k. `powers` caches the 2^j-mer hashes.
+        """
+        step = 1
+        while step * 2 <= k:
+            if step * 2 not in powers:
+                half = powers[step]
+                powers[step * 2] = (half[:len(half) - step] << np.uint64(2 * step)) | half[step:]
+            step *= 2
+
+        result, covered = None, 0
+        for bit in reversed(range(step.bit_length())):
+            part = 1 << bit
+            if not k & part:
+                continue
+            if result is None:
+                result = powers[part]
+            else:
+                tail = powers[part][covered:]
+                result = (result[:len(tail)] << np.uint64(2 * part)) | tail
+            covered += part
+        return result
+
+    def _scan_buffer(self, buffer: bytes, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """All hits starting before `limit` in `buffer` as (positions, pattern ids)."""
+        codes = _CODES[np.frombuffer(buffer, dtype=np.uint8)]
+        n = len(codes)
+        invalid = np.concatenate(([0], np.cumsum(codes > 3, dtype=np.int64)))
+        bits = (codes & 3).astype(np.uint64)
+
+        all_positions, all_patterns = [], []
+        powers = {1: bits}
+        for length in sorted(self._tables):
+            windows = min(n - length + 1, limit)
+            if windows <= 0:
+                continue
+            k = min(length, _MAX_HASH_BASES)
+            rolling = self._window_hashes(powers, k)
+
+            unique, offsets, pattern_ids, prefilter, prefix_shift = self._tables[length]
+            candidates = rolling[:windows]
+            window_valid = invalid[length:length + windows] == invalid[:windows]
+            positions = np.flatnonzero(prefilter[(candidates >> prefix_shift).astype(np.intp)] & window_valid)
+            candidates = candidates[positions]
+            slot = np.minimum(np.searchsorted(unique, candidates), len(unique) - 1)
+            exact = unique[slot] == candidates
+            positions, slot = positions[exact], slot[exact]
+            if not len(positions):
+                continue
+
+            counts = offsets[slot + 1] - offsets[slot]
+            if np.all(counts == 1):
+                patterns = pattern_ids[offsets[slot]]
+            else:
+                # Several motifs share this sequence prefix
+                positions = np.repeat(positions, counts)
+                first = np.repeat(offsets[slot], counts)
+                within = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts)
+                patterns = pattern_ids[first + within]
+
+            if length > _MAX_HASH_BASES:
+                # The hash only covered the first 32 bases: confirm the rest
+                keep = [buffer[p:p + length].upper() == self.pattern_seq[q]
+                        for p, q in zip(positions.tolist(), patterns.tolist())]
+                positions, patterns = positions[keep], patterns[keep]
+
+            all_positions.append(positions)
+            all_patterns.append(patterns)
+
+        if not all_positions:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        return np.concatenate(all_positions).astype(np.int64), np.concatenate(all_patterns).astype(np.int32)
+
+    def scan_chunks(self, chunks: Iterable[bytes], record: str = "sequence",
+                    keep_positions: bool = True, result: Optional[ScanResult] = None) -> ScanResult:
+        """
+        Streams a sequence through the scanner chunk by chunk.
+        The last max_length - 1 bases of each chunk are carried over so motifs
+        spanning a chunk boundary are found exactly once.
+        """
+        result = result or ScanResult(self)
+        if not self._tables:
+            return result
+        overlap = self.max_length - 1
+        carry = b""
+        offset = 0
+        for chunk in chunks:
+            buffer = carry + chunk
+            limit = len(buffer) - overlap
+            if limit <= 0:
+                carry = buffer
+                continue
+            positions, patterns = self._scan_buffer(buffer, limit)
+            result._add(record, positions + offset, patterns, keep_positions)
+            carry = buffer[limit:]
+            offset += limit
+
+        if carry:
+            positions, patterns = self._scan_buffer(carry, len(carry))
+            result._add(record, positions + offset, patterns, keep_positions)
+        return result
+
+    def scan(self, sequence: Union[str, bytes], record: str = "sequence", chunk_size: int = 1 << 20) -> ScanResult:
+        if isinstance(sequence, str):
+            sequence = sequence.encode("ascii", errors="replace")
+        chunks = (sequence[i:i + chunk_size] for i in range(0, len(sequence), chunk_size))
+        return self.scan_chunks(chunks, record)
+
+    def scan_file(self, path: str, processes: Optional[int] = None, keep_positions: bool = True,
+                  chunk_size: int = 1 << 20) -> ScanResult:
+        """
+        Scans every record of a FASTA or packed (.btg2) genome file,
+        one record per worker process.
+        """
+        with _open_genome(path) as genome:
+            records = genome.record_names
+
+        result = ScanResult(self)
+        if processes == 1 or len(records) <= 1:
+            for record in records:
+                result.merge(_scan_record(self, path, record, keep_positions, chunk_size))
+            return result
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_scan_record, self, path, record, keep_positions, chunk_size) for record in records]
+            for future in futures:
+                partial = future.result()
+                partial._scanner = self
+                result.merge(partial)
+        return result
+
+
+def _open_genome(path: str):
+    # Imported lazily: loading data_ingestion also loads pandas
+    from ..data_ingestion.packed_genome import MAGIC, PackedGenome
+    from ..data_ingestion.saliva_genomics_parser import MappedFastaReader
+
+    with open(path, "rb") as f:
+        is_packed = f.read(len(MAGIC)) == MAGIC
+    return PackedGenome(path) if is_packed else MappedFastaReader(path)
+
+
+def _scan_record(scanner: MotifScanner, path: str, record: str, keep_positions: bool, chunk_size: int) -> ScanResult:
+    """Process-pool task: scans one record (chromosome) of a genome file."""
+    with _open_genome(path) as genome:
+        return scanner.scan_chunks(genome.iter_chunks(record, chunk_size=chunk_size), record, keep_positions)
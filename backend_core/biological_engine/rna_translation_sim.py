@@ -1,15 +1,145 @@
+from typing import Dict, List
+
+import numpy as np
+
+# Standard genetic code, codons ordered U, C, A, G (index = 16*first + 4*second + third)
+_BASES = "UCAG"
+_AMINO_ACIDS = "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG"
+_THREE_LETTER = {
+    "F": "Phe", "L": "Leu", "S": "Ser", "Y": "Tyr", "*": "STOP", "C": "Cys", "W": "Trp",
+    "P": "Pro", "H": "His", "Q": "Gln", "R": "Arg", "I": "Ile", "M": "Met", "T": "Thr",
+    "N": "Asn", "K": "Lys", "V": "Val", "A": "Ala", "D": "Asp", "E": "Glu", "G": "Gly",
+}
+
+# Base byte -> 0..3 (DNA T is read as U); anything else -> 4
+_BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _code, _base in enumerate(_BASES):
+    _BASE_CODES[ord(_base)] = _code
+    _BASE_CODES[ord(_base.lower())] = _code
+_BASE_CODES[ord("T")] = _BASE_CODES[ord("t")] = 0
+
+_INVALID_CODON = 64  # codon containing a non-ACGU base (or batch padding)
+_START_CODON = 16 * 2 + 4 * 0 + 3  # AUG
+_IS_STOP = np.zeros(65, dtype=bool)
+_IS_STOP[[i for i, aa in enumerate(_AMINO_ACIDS) if aa == "*"]] = True
+_ONE_LETTER = np.frombuffer((_AMINO_ACIDS + "X").encode("ascii"), dtype=np.uint8)
+_THREE_LETTER_NAMES = np.array([_THREE_LETTER[aa] for aa in _AMINO_ACIDS] + ["Xaa"])
+
+
+def _codon_indices(codes: np.ndarray, frame: int) -> np.ndarray:
+    """Codon table index of every whole codon in `frame`; 64 marks an invalid codon."""
+    n_codons = (len(codes) - frame) // 3
+    triplets = codes[frame:frame + 3 * n_codons].reshape(-1, 3).astype(np.int16)
+    index = triplets[:, 0] * 16 + triplets[:, 1] * 4 + triplets[:, 2]
+    index[(triplets > 3).any(axis=1)] = _INVALID_CODON
+    return index
+
+
 class ProteinSynthesizer:
     def __init__(self):
         self.codon_table = {
-            'AUG': 'Met', 'UUU': 'Phe', 'UUC': 'Phe', 'UUA': 'Leu', 
-            'UUG': 'Leu', 'UAA': 'STOP', 'UAG': 'STOP', 'UGA': 'STOP'
+            a + b + c: _THREE_LETTER[_AMINO_ACIDS[16 * i + 4 * j + k]]
+            for i, a in enumerate(_BASES) for j, b in enumerate(_BASES) for k, c in enumerate(_BASES)
         }
 
     def translate_rna(self, mrna_seq: str) -> list:
-        protein = []
-        for i in range(0, len(mrna_seq), 3):
-            codon = mrna_seq[i:i+3]
-            if codon in self.codon_table:
-                if self.codon_table[codon] == 'STOP': break
-                protein.append(self.codon_table[codon])
-        return protein
+        codes = _BASE_CODES[np.frombuffer(mrna_seq.encode("ascii", errors="replace"), dtype=np.uint8)]
+        codons = _codon_indices(codes, 0)
+        # Translation ends at the first STOP codon
+        stops = np.flatnonzero(_IS_STOP[codons])
+        if len(stops):
+            codons = codons[:stops[0]]
+        # Codons with unknown bases are skipped, as before
+        codons = codons[codons != _INVALID_CODON]
+        return _THREE_LETTER_NAMES[codons].tolist()
+
+    def translate_batch(self, transcripts: List[str], min_orf_aa: int = 30, find_orfs: bool = True) -> List[Dict]:
+        """
+        Translates many transcripts at once.
+
+        Returns one dict per transcript with:
+        - protein: one-letter translation of frame 0 up to the first STOP
+        - orfs:    open reading frames (AUG ... STOP) of at least `min_orf_aa`
+                   amino acids in all six frames, with forward-strand coordinates
+                   [start, end) including the stop codon
+        """
+        forward, offsets = self._encode_batch(transcripts, reverse=False)
+        lengths = [len(t) for t in transcripts]
+        results = [{"protein": "", "orfs": []} for _ in transcripts]
+
+        frame0 = _codon_indices(forward, 0)
+        stops0 = np.flatnonzero(_IS_STOP[frame0])
+        for t, length in enumerate(lengths):
+            first = offsets[t] // 3
+            last = first + length // 3
+            i = np.searchsorted(stops0, first)
+            stop = min(stops0[i], last) if i < len(stops0) else last
+            codons = frame0[first:stop]
+            codons = codons[codons != _INVALID_CODON]
+            results[t]["protein"] = _ONE_LETTER[codons].tobytes().decode("ascii")
+
+        if find_orfs:
+            reverse, reverse_offsets = self._encode_batch(transcripts, reverse=True)
+            for strand, codes, strand_offsets in (("+", forward, offsets), ("-", reverse, reverse_offsets)):
+                for frame in range(3):
+                    self._collect_orfs(codes, strand_offsets, lengths, strand, frame, min_orf_aa, results)
+            for result in results:
+                result["orfs"].sort(key=lambda orf: (orf["start"], orf["strand"]))
+        return results
+
+    @staticmethod
+    def _encode_batch(transcripts: List[str], reverse: bool):
+        """
+        Concatenates all transcripts into one code array. Each one is padded to
+        a multiple of 3 plus one invalid codon, so every transcript starts in
+        frame 0 and ORFs cannot run from one transcript into the next.
+        """
+        parts, offsets, position = [], [], 0
+        for transcript in transcripts:
+            codes = _BASE_CODES[np.frombuffer(transcript.encode("ascii", errors="replace"), dtype=np.uint8)]
+            if reverse:
+                # Reverse complement: U<->A (0<->2), C<->G (1<->3)
+                codes = np.where(codes < 4, codes ^ 2, codes)[::-1]
+            padding = (-len(codes)) % 3 + 3
+            parts.append(codes)
+            parts.append(np.full(padding, 4, dtype=np.uint8))
+            offsets.append(position)
+            position += len(codes) + padding
+        codes = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+        return codes, np.asarray(offsets, dtype=np.int64)
+
+    @staticmethod
+    def _collect_orfs(codes: np.ndarray, offsets: np.ndarray, lengths: List[int], strand: str,
+                      frame: int, min_orf_aa: int, results: List[Dict]):
+        codons = _codon_indices(codes, frame)
+        # Every STOP or invalid codon closes the open frame; only STOPs yield an ORF
+        terminators = np.flatnonzero(_IS_STOP[codons] | (codons == _INVALID_CODON))
+        starts = np.flatnonzero(codons == _START_CODON)
+        if not len(terminators) or not len(starts):
+            return
+
+        previous = np.concatenate(([-1], terminators[:-1]))
+        first_start = np.searchsorted(starts, previous + 1)
+        has_start = first_start < len(starts)
+        orf_start = starts[np.minimum(first_start, len(starts) - 1)]
+        keep = (has_start & (orf_start < terminators) & _IS_STOP[codons[terminators]]
+                & (terminators - orf_start >= min_orf_aa))
+
+        orf_start, orf_stop = orf_start[keep], terminators[keep]
+        nt_start = frame + 3 * orf_start
+        transcript_ids = np.searchsorted(offsets, nt_start, side="right") - 1
+
+        for t, s, e, first, stop in zip(transcript_ids.tolist(), nt_start.tolist(), (nt_start + 3 * (orf_stop - orf_start) + 3).tolist(),
+                                        orf_start.tolist(), orf_stop.tolist()):
+            local_start, local_end = s - offsets[t], e - offsets[t]
+            if strand == "-":
+                # Map reverse-complement coordinates back onto the forward strand
+                local_start, local_end = lengths[t] - local_end, lengths[t] - local_start
+            results[t]["orfs"].append({
+                "strand": strand,
+                "frame": frame,
+                "start": int(local_start),
+                "end": int(local_end),
+                "length_aa": stop - first,
+                "protein": _ONE_LETTER[codons[first:stop]].tobytes().decode("ascii"),
+            })
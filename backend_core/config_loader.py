@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -17,6 +18,47 @@ class Settings(BaseSettings):
     # --- Simulation Constants ---
     MAX_SIMULATION_TIME_YEARS: int = 10
     DEFAULT_RADIATION_DOSE_GY: float = 10.0
+
+    # --- Simulation Event Log ---
+    # Events kept in memory per run; set the audit path to stream all events to disk
+    SIMULATION_LOG_CAPACITY: int = 1024
+    SIMULATION_AUDIT_LOG: Optional[str] = None
+
+    # --- Batch Simulation ---
+    # None = one worker per CPU core / automatic chunk size
+    BATCH_MAX_WORKERS: Optional[int] = None
+    BATCH_CHUNK_SIZE: Optional[int] = None
+
+    # --- Background Simulation Jobs ---
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_SIZE: int = 100
+    JOB_STORE_PATH: str = os.path.join(DATA_LAKE_DIR, "simulation_jobs.sqlite3")
+
+    # --- Per-Patient Twin State Cache ---
+    TWIN_STATE_DIR: str = os.path.join(DATA_LAKE_DIR, "twin_states")
+    TWIN_CACHE_MAX_ENTRIES: int = 1024
+    TWIN_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # --- Blood Panel Store ---
+    # Default location and parser processes of BloodPanelStore (None = one per CPU core)
+    BLOOD_PANEL_STORE_DIR: str = os.path.join(DATA_LAKE_DIR, "blood_panels")
+    BLOOD_PANEL_WORKERS: Optional[int] = None
+
+    # --- Wearable Vitals Store ---
+    # Raw samples kept in RAM per series; older data spills to the data lake
+    VITALS_RAW_CAPACITY: int = 1 << 16
+    VITALS_SPILL_DIR: str = os.path.join(DATA_LAKE_DIR, "vitals")
+    # Per-device packet queue in the ingestion hub and what to drop when it is full
+    WEARABLE_QUEUE_SIZE: int = 64
+    WEARABLE_OVERFLOW_POLICY: str = "drop_oldest"
+
+    # --- Scan Point-Cloud Tiles ---
+    SCAN_TILES_DIR: str = os.path.join(DATA_LAKE_DIR, "scan_tiles")
+
+    # --- Model Registry ---
+    # Workers re-check the active model version this often (hot swap)
+    MODEL_REGISTRY_DIR: str = os.path.join(MODELS_DIR, "registry")
+    MODEL_REGISTRY_POLL_SECONDS: float = 2.0
     
     class Config:
         env_file = ".env"
@@ -1,6 +1,12 @@
 # backend_core/data_ingestion/__init__.py
 
 from .blood_panel_parser import BloodPanelReader
-from .saliva_genomics_parser import FastA_Parser
+from .blood_panel_store import BloodPanelStore
+from .saliva_genomics_parser import FastA_Parser, MappedFastaReader
+from .packed_genome import PackedGenome, pack_fasta, open_packed_genome
 from .mri_dicom_loader import MriScanner
-from .wearable_stream_listener import WearableDeviceConnector
\ No newline at end of file
+from .wearable_stream_listener import WearableDeviceConnector
+from .wearable_hub import WearableHub, SyntheticDeviceFleet, run_load_test
+from .vitals_store import VitalsStore
+from .octree_tiles import build_octree, build_octree_from_point_cloud
+from .mesh_loader import MeshData, parse_obj, load_obj, decimate
\ No newline at end of file
@@ -23,14 +23,8 @@ class BloodPanelReader:
         try:
             df = pd.read_csv(file_path)
             
-            # Simple normalization logic
-            results = {}
-            for index, row in df.iterrows():
-                marker = row['Marker'].strip()
-                value = float(row['Value'])
-                results[marker] = value
-                
-            return results
+            # Simple normalization logic (column-wise, no per-row Python loop)
+            return dict(zip(df['Marker'].str.strip(), df['Value'].astype(float)))
         except Exception as e:
             print(f"Error reading blood panel CSV: {e}")
             return {}
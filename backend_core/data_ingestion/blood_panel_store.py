@@ -0,0 +1,248 @@
+"""
+Columnar blood panel store
+
+    store_dir/
+        manifest.json        patient and marker dictionaries, ingested files
+                             (size + mtime) and the list of segments
+        segment_000001.npz   one segment per ingest run, long format:
+                             patient int32, marker int16, value float32,
+                             flag int8 (-1 low, 0 normal, 1 high, 2 no range),
+                             file_id int32
+
+Patients and markers are dictionary-encoded, so a row costs 15 bytes.
+table() pivots the segments into a patient x marker DataFrame.
+"""
+
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..config_loader import settings
+from .blood_panel_parser import BloodPanelReader
+
+FLAG_LOW = -1
+FLAG_NORMAL = 0
+FLAG_HIGH = 1
+FLAG_NO_RANGE = 2
+
+# Lab spellings -> canonical marker names used in reference_ranges
+MARKER_ALIASES = {
+    "hemoglobin": "Hemoglobin", "haemoglobin": "Hemoglobin", "hgb": "Hemoglobin", "hb": "Hemoglobin",
+    "wbc": "WBC", "white blood cells": "WBC", "leukocytes": "WBC", "wbc count": "WBC",
+    "platelets": "Platelets", "plt": "Platelets", "platelet count": "Platelets", "thrombocytes": "Platelets",
+}
+
+# (marker, normalized unit) -> factor to the canonical unit (g/dL, cells/mcL)
+UNIT_FACTORS = {
+    ("Hemoglobin", "g/l"): 0.1,
+    ("Hemoglobin", "mmol/l"): 1.611,
+    ("WBC", "10^9/l"): 1000.0,
+    ("WBC", "10^3/ul"): 1000.0,
+    ("WBC", "k/ul"): 1000.0,
+    ("Platelets", "10^9/l"): 1000.0,
+    ("Platelets", "10^3/ul"): 1000.0,
+    ("Platelets", "k/ul"): 1000.0,
+}
+
+
+def _read_panel(path: str) -> Tuple[str, Optional[pd.DataFrame], Optional[str]]:
+    """Worker task: one CSV -> (path, rows, error). Expected columns: Marker,Value[,Unit][,PatientID]."""
+    try:
+        df = pd.read_csv(path, dtype=str, skipinitialspace=True)
+        df.columns = [c.strip() for c in df.columns]
+        patient = df["PatientID"] if "PatientID" in df.columns else os.path.splitext(os.path.basename(path))[0]
+        rows = pd.DataFrame({
+            "patient": patient,
+            "marker": df["Marker"],
+            "value": pd.to_numeric(df["Value"], errors="coerce"),
+            "unit": df["Unit"] if "Unit" in df.columns else "",
+        })
+        return path, rows, None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def _normalize_units(units: pd.Series) -> pd.Series:
+    return (units.fillna("").str.lower()
+            .str.replace(r"\s+", "", regex=True)
+            .str.replace("µ", "u").str.replace("μ", "u").str.replace("mc", "u")
+            .str.replace("×", "x").str.replace("e9", "^9").str.replace("e3", "^3")
+            .str.lstrip("x"))
+
+
+class BloodPanelStore:
+    """
+    Bulk ingestion of lab panel CSVs into one columnar table.
+    Files are parsed on a process pool and appended as a new segment;
+    files already ingested (same size and mtime) are skipped, and a changed
+    file replaces its earlier rows.
+    store_dir and workers default to BLOOD_PANEL_STORE_DIR / BLOOD_PANEL_WORKERS.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None, reader: Optional[BloodPanelReader] = None,
+                 workers: Optional[int] = None):
+        store_dir = store_dir or settings.BLOOD_PANEL_STORE_DIR
+        self.store_dir = store_dir
+        self.reader = reader or BloodPanelReader()
+        self.workers = workers if workers is not None else settings.BLOOD_PANEL_WORKERS
+        os.makedirs(store_dir, exist_ok=True)
+        self._manifest_path = os.path.join(store_dir, "manifest.json")
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"patients": [], "markers": [], "files": {}, "segments": [], "next_file_id": 0}
+
+    @staticmethod
+    def _expand(source: Union[str, Iterable[str]]) -> List[str]:
+        if isinstance(source, str):
+            if os.path.isdir(source):
+                source = os.path.join(source, "*.csv")
+            source = glob.glob(source)
+        return sorted(os.path.abspath(path) for path in source)
+
+    def ingest(self, source: Union[str, Iterable[str]], workers: Optional[int] = None) -> Dict:
+        """
+        Ingests a directory, glob pattern or list of CSV paths.
+        Returns a summary with counts of ingested/skipped files, rows and errors.
+        """
+        files = self.manifest["files"]
+        pending, skipped = [], 0
+        for path in self._expand(source):
+            stat = os.stat(path)
+            known = files.get(path)
+            if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                skipped += 1
+                continue
+            pending.append((path, stat))
+
+        frames, errors = [], {}
+        if pending:
+            paths = [path for path, _ in pending]
+            workers = workers or self.workers or os.cpu_count() or 1
+            if workers > 1 and len(paths) > 1:
+                chunksize = max(1, len(paths) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    parsed = list(pool.map(_read_panel, paths, chunksize=chunksize))
+            else:
+                parsed = [_read_panel(path) for path in paths]
+
+            for (path, stat), (_, rows, error) in zip(pending, parsed):
+                if error is not None:
+                    errors[path] = error
+                    continue
+                file_id = self.manifest["next_file_id"]
+                self.manifest["next_file_id"] += 1
+                files[path] = {"id": file_id, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                frames.append(rows.assign(file_id=file_id))
+
+        n_rows = 0
+        if frames:
+            n_rows = self._write_segment(pd.concat(frames, ignore_index=True))
+        self._save_manifest()
+        return {"ingested": len(pending) - len(errors), "skipped": skipped, "rows": n_rows, "errors": errors}
+
+    def _codes(self, values: pd.Series, key: str) -> np.ndarray:
+        """Dictionary-encodes values, extending the manifest dictionary with new entries."""
+        dictionary = self.manifest[key]
+        index = {name: code for code, name in enumerate(dictionary)}
+        for name in pd.unique(values):
+            if name not in index:
+                index[name] = len(dictionary)
+                dictionary.append(name)
+        return values.map(index).to_numpy()
+
+    def _write_segment(self, rows: pd.DataFrame) -> int:
+        rows = rows.dropna(subset=["marker", "value"])
+        raw_markers = rows["marker"].astype(str).str.strip()
+        markers = raw_markers.str.lower().map(MARKER_ALIASES).fillna(raw_markers)
+
+        # Vectorized unit conversion: look up (marker, unit) factors
+        units = _normalize_units(rows["unit"].astype(str))
+        factors = pd.Series(list(zip(markers, units)), index=rows.index).map(UNIT_FACTORS).fillna(1.0)
+        values = rows["value"].to_numpy(dtype=np.float64) * factors.to_numpy()
+
+        patient_codes = self._codes(rows["patient"].astype(str).str.strip(), "patients").astype(np.int32)
+        marker_codes = self._codes(markers, "markers").astype(np.int16)
+
+        segment = {
+            "patient": patient_codes,
+            "marker": marker_codes,
+            "value": values.astype(np.float32),
+            "flag": self._flags(marker_codes, values),
+            "file_id": rows["file_id"].to_numpy(dtype=np.int32),
+        }
+        name = f"segment_{len(self.manifest['segments']) + 1:06d}.npz"
+        tmp_path = os.path.join(self.store_dir, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **segment)
+        os.replace(tmp_path, os.path.join(self.store_dir, name))
+        self.manifest["segments"].append(name)
+        return len(values)
+
+    def _range_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Low/high bounds per marker code (NaN where no reference range exists)."""
+        markers = self.manifest["markers"]
+        low = np.full(len(markers), np.nan)
+        high = np.full(len(markers), np.nan)
+        for code, marker in enumerate(markers):
+            if marker in self.reader.reference_ranges:
+                low[code], high[code] = self.reader.reference_ranges[marker]
+        return low, high
+
+    def _flags(self, marker_codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+        low, high = self._range_arrays()
+        low, high = low[marker_codes], high[marker_codes]
+        flags = np.full(len(values), FLAG_NORMAL, dtype=np.int8)
+        flags[values < low] = FLAG_LOW
+        flags[values > high] = FLAG_HIGH
+        flags[np.isnan(low)] = FLAG_NO_RANGE
+        return flags
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """All current rows as raw columns (rows of re-ingested files are superseded)."""
+        parts = []
+        for name in self.manifest["segments"]:
+            with np.load(os.path.join(self.store_dir, name)) as segment:
+                parts.append({key: segment[key] for key in segment.files})
+        if not parts:
+            return {key: np.zeros(0, dtype=dtype) for key, dtype in
+                    (("patient", np.int32), ("marker", np.int16), ("value", np.float32),
+                     ("flag", np.int8), ("file_id", np.int32))}
+        columns = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        current = np.fromiter((meta["id"] for meta in self.manifest["files"].values()), dtype=np.int32)
+        keep = np.isin(columns["file_id"], current)
+        return {key: column[keep] for key, column in columns.items()}
+
+    def long_table(self) -> pd.DataFrame:
+        columns = self.columns()
+        return pd.DataFrame({
+            "patient": pd.Categorical.from_codes(columns["patient"], self.manifest["patients"]),
+            "marker": pd.Categorical.from_codes(columns["marker"], self.manifest["markers"]),
+            "value": columns["value"],
+            "flag": columns["flag"],
+        })
+
+    def table(self) -> pd.DataFrame:
+        """Patient x marker table of values (latest ingested value wins)."""
+        long = self.long_table()
+        return long.pivot_table(index="patient", columns="marker", values="value",
+                                aggfunc="last", observed=True)
+
+    def abnormal(self) -> pd.DataFrame:
+        """Rows outside their reference range, as (patient, marker, value, LOW/HIGH)."""
+        long = self.long_table()
+        flagged = long[long["flag"].isin((FLAG_LOW, FLAG_HIGH))].copy()
+        flagged["status"] = np.where(flagged["flag"] == FLAG_LOW, "LOW", "HIGH")
+        return flagged.drop(columns="flag").reset_index(drop=True)
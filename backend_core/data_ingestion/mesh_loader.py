@@ -0,0 +1,381 @@
+"""
+Wavefront OBJ scan meshes.
+
+Parsing is vectorized over the raw bytes: every line is classified by its
+prefix with NumPy, all "v" / "vn" / "f" lines are gathered into one buffer
+per kind and converted by a single np.fromstring call, and polygons are
+fan-triangulated with index arithmetic.
+
+The parsed arrays are cached next to the source (<file>.meshcache):
+
+    header   8 bytes magic "BTMESH1\\0", then a 4088-byte JSON header
+             (source size, mtime and BLAKE2 hash, array offsets/dtypes/shapes)
+    arrays   64-byte aligned raw arrays, memory-mapped on load
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+CACHE_SUFFIX = ".meshcache"
+_CACHE_MAGIC = b"BTMESH1\0"
+_CACHE_HEADER_SIZE = 4096
+_ALIGN = 64
+
+_SPACE, _TAB, _CR, _LF = 32, 9, 13, 10
+_OTHER, _VERTEX, _NORMAL, _FACE = 0, 1, 2, 3
+
+
+class MeshData:
+    """
+    Triangle mesh. faces index vertices; normal_indices (same shape as faces)
+    index normals when the OBJ file referenced per-corner normals.
+    """
+
+    def __init__(self, vertices: np.ndarray, faces: np.ndarray, normals: Optional[np.ndarray] = None,
+                 normal_indices: Optional[np.ndarray] = None):
+        self.vertices = vertices
+        self.faces = faces
+        self.normals = normals
+        self.normal_indices = normal_indices
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.faces)
+
+    def bounds(self) -> np.ndarray:
+        if not len(self.vertices):
+            return np.zeros((2, 3), dtype=np.float32)
+        return np.stack([self.vertices.min(axis=0), self.vertices.max(axis=0)])
+
+    def face_normals(self) -> np.ndarray:
+        """Unnormalized (area-weighted) face normals."""
+        v = self.vertices.astype(np.float64)
+        f = self.faces
+        return np.cross(v[f[:, 1]] - v[f[:, 0]], v[f[:, 2]] - v[f[:, 0]])
+
+    def vertex_normals(self) -> np.ndarray:
+        """Area-weighted vertex normals, unit length."""
+        normals = np.zeros((len(self.vertices), 3))
+        face_normals = self.face_normals()
+        for corner in range(3):
+            for axis in range(3):
+                normals[:, axis] += np.bincount(self.faces[:, corner], weights=face_normals[:, axis],
+                                                minlength=len(self.vertices))
+        length = np.linalg.norm(normals, axis=1, keepdims=True)
+        return (normals / np.where(length > 0, length, 1.0)).astype(np.float32)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {"vertices": self.vertices, "faces": self.faces}
+        if self.normals is not None:
+            arrays["normals"] = self.normals
+        if self.normal_indices is not None:
+            arrays["normal_indices"] = self.normal_indices
+        return arrays
+
+    def __repr__(self) -> str:
+        return f"MeshData(vertices={self.vertex_count}, faces={self.face_count})"
+
+
+def _xyz(values: np.ndarray, counts: np.ndarray, kind: str) -> np.ndarray:
+    """First 3 numbers of each line, given the flat numbers and the count per line."""
+    if (counts < 3).any() or len(values) != counts.sum():
+        raise ValueError(f"OBJ {kind} line with fewer than 3 coordinates")
+    first = np.cumsum(counts) - counts
+    return values[first[:, None] + np.arange(3)].astype(np.float32)
+
+
+def parse_obj(data: Union[bytes, memoryview]) -> MeshData:
+    """Parses OBJ text (v / vn / f lines; other statements are ignored)."""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if not len(buf):
+        return MeshData(np.zeros((0, 3), np.float32), np.zeros((0, 3), np.int32))
+    # Working copy: prefixes and '/' are blanked out so only numbers remain
+    work = np.concatenate((buf, np.array([_LF], dtype=np.uint8))) if buf[-1] != _LF else buf.copy()
+
+    line_ends = np.flatnonzero(work == _LF)
+    starts = np.concatenate(([0], line_ends[:-1] + 1))
+    c0 = work[starts]
+    c1 = work[np.minimum(starts + 1, len(work) - 1)]
+    c2 = work[np.minimum(starts + 2, len(work) - 1)]
+    blank1 = (c1 == _SPACE) | (c1 == _TAB)
+    blank2 = (c2 == _SPACE) | (c2 == _TAB)
+
+    line_class = np.zeros(len(starts), dtype=np.uint8)
+    line_class[(c0 == ord("v")) & blank1] = _VERTEX
+    line_class[(c0 == ord("v")) & (c1 == ord("n")) & blank2] = _NORMAL
+    line_class[(c0 == ord("f")) & blank1] = _FACE
+    byte_class = np.repeat(line_class, line_ends - starts + 1)
+
+    vertex_lines = np.flatnonzero(line_class == _VERTEX)
+    normal_lines = np.flatnonzero(line_class == _NORMAL)
+    face_lines = np.flatnonzero(line_class == _FACE)
+    work[starts[vertex_lines]] = _SPACE
+    work[starts[normal_lines]] = _SPACE
+    work[starts[normal_lines] + 1] = _SPACE
+    work[starts[face_lines]] = _SPACE
+
+    # Whitespace-separated groups per line (numbers once the prefixes are blanked)
+    is_token = (work != _SPACE) & (work != _TAB) & (work != _CR) & (work != _LF)
+    token_start = is_token & ~np.concatenate(([False], is_token[:-1]))
+    tokens = np.add.reduceat(token_start.astype(np.int64), starts)
+
+    # Extra columns (w, vertex colours) are parsed and dropped
+    vertices = _xyz(np.fromstring(work[byte_class == _VERTEX].tobytes(), dtype=np.float64, sep=" "),
+                    tokens[vertex_lines], "vertex")
+    normals = _xyz(np.fromstring(work[byte_class == _NORMAL].tobytes(), dtype=np.float64, sep=" "),
+                   tokens[normal_lines], "normal")
+
+    faces = np.zeros((0, 3), dtype=np.int32)
+    normal_indices = None
+    if len(face_lines):
+        face_bytes = byte_class == _FACE
+        corners = tokens[face_lines]
+        if (corners < 3).any():
+            raise ValueError("OBJ face with fewer than 3 vertices")
+
+        # Corner format from the first group: v, v/vt, v/vt/vn or v//vn
+        first = starts[face_lines[0]] + 1
+        first_token = bytes(work[first:line_ends[face_lines[0]]]).split()[0]
+        fields = first_token.count(b"/") + 1 - first_token.count(b"//")
+        normal_field = {3: 2, 2: 1 if b"//" in first_token else None}.get(fields)
+
+        work[face_bytes & (work == ord("/"))] = _SPACE
+        values = np.fromstring(work[face_bytes].tobytes(), dtype=np.int64, sep=" ")
+        if len(values) != corners.sum() * fields:
+            raise ValueError("OBJ faces mix different corner formats")
+        values = values.reshape(-1, fields)
+
+        # 1-based indices; negative ones count back from the last vertex defined so far
+        def resolve(column: np.ndarray, lines: np.ndarray) -> np.ndarray:
+            defined = np.repeat(np.searchsorted(lines, face_lines), corners)
+            return np.where(column < 0, defined + column, column - 1)
+
+        vertex_ids = resolve(values[:, 0], vertex_lines)
+        normal_ids = resolve(values[:, normal_field], normal_lines) if normal_field is not None else None
+
+        # Fan triangulation: corner 0 with each consecutive pair
+        first_corner = np.concatenate(([0], np.cumsum(corners)[:-1]))
+        n_triangles = corners - 2
+        base = np.repeat(first_corner, n_triangles)
+        step = np.arange(n_triangles.sum()) - np.repeat(np.cumsum(n_triangles) - n_triangles, n_triangles)
+        corner_ids = np.stack([base, base + step + 1, base + step + 2], axis=1)
+
+        faces = vertex_ids[corner_ids].astype(np.int32)
+        if normal_ids is not None:
+            normal_indices = normal_ids[corner_ids].astype(np.int32)
+        if len(faces) and (faces.min() < 0 or faces.max() >= len(vertices)):
+            raise ValueError("OBJ face references a vertex that does not exist")
+
+    return MeshData(vertices, faces, normals if len(normal_lines) else None, normal_indices)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 23), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_cache(cache_path: str, mesh: MeshData, source: dict):
+    arrays = {}
+    offset = _CACHE_HEADER_SIZE
+    for name, array in mesh.arrays().items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({"source": source, "arrays": arrays}).encode("utf-8")
+    if len(header) > _CACHE_HEADER_SIZE - len(_CACHE_MAGIC):
+        raise ValueError("Mesh cache header too large")
+
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_CACHE_MAGIC + header.ljust(_CACHE_HEADER_SIZE - len(_CACHE_MAGIC), b" "))
+        for name, array in mesh.arrays().items():
+            f.seek(arrays[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(max(offset, _CACHE_HEADER_SIZE))
+    os.replace(tmp_path, cache_path)
+
+
+def _read_cache_header(cache_path: str) -> Optional[dict]:
+    try:
+        with open(cache_path, "rb") as f:
+            blob = f.read(_CACHE_HEADER_SIZE)
+    except OSError:
+        return None
+    if not blob.startswith(_CACHE_MAGIC):
+        return None
+    return json.loads(blob[len(_CACHE_MAGIC):])
+
+
+def _rewrite_cache_header(cache_path: str, header: dict):
+    blob = json.dumps(header).encode("utf-8")
+    if len(blob) > _CACHE_HEADER_SIZE - len(_CACHE_MAGIC):
+        return
+    try:
+        with open(cache_path, "r+b") as f:
+            f.write(_CACHE_MAGIC + blob.ljust(_CACHE_HEADER_SIZE - len(_CACHE_MAGIC), b" "))
+    except OSError:
+        pass
+
+
+def _open_cache(cache_path: str, header: dict) -> MeshData:
+    arrays = {}
+    size = os.path.getsize(cache_path)
+    for name, meta in header["arrays"].items():
+        dtype, shape = np.dtype(meta["dtype"]), tuple(meta["shape"])
+        if int(np.prod(shape)) == 0 or meta["offset"] >= size:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            # Zero-copy: pages are read lazily from the OS page cache
+            arrays[name] = np.memmap(cache_path, dtype=dtype, mode="r", offset=meta["offset"], shape=shape)
+    return MeshData(arrays["vertices"], arrays["faces"], arrays.get("normals"), arrays.get("normal_indices"))
+
+
+def load_obj(path: str, use_cache: bool = True) -> MeshData:
+    """
+    Loads an OBJ mesh, from <path>.meshcache when it is still valid: same size
+    and mtime, or (if only the mtime changed) the same content hash.
+    """
+    cache_path = path + CACHE_SUFFIX
+    stat = os.stat(path)
+    if use_cache:
+        header = _read_cache_header(cache_path)
+        if header is not None:
+            source = header["source"]
+            if source["size"] == stat.st_size and source["mtime_ns"] == stat.st_mtime_ns:
+                return _open_cache(cache_path, header)
+            if source["size"] == stat.st_size and source["hash"] == _file_hash(path):
+                # Touched but unchanged (copied, checked out again): refresh the mtime
+                source["mtime_ns"] = stat.st_mtime_ns
+                _rewrite_cache_header(cache_path, header)
+                return _open_cache(cache_path, header)
+
+    with open(path, "rb") as f:
+        if stat.st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                mesh = parse_obj(mm)
+        else:
+            mesh = parse_obj(b"")
+
+    if use_cache:
+        source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": _file_hash(path)}
+        try:
+            _write_cache(cache_path, mesh, source)
+        except OSError:
+            pass  # read-only input directory: still return the parsed mesh
+    return mesh
+
+
+def _cluster(vertices: np.ndarray, faces: np.ndarray, resolution: int):
+    """Vertex clustering on a grid with `resolution` cells along the longest axis."""
+    low = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - low).max()) or 1.0
+    cell = extent / resolution
+    grid = np.minimum(((vertices - low) / cell).astype(np.int64), resolution)
+    keys = (grid[:, 0] * (resolution + 1) + grid[:, 1]) * (resolution + 1) + grid[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.ravel()
+
+    clustered = cluster[faces]
+    keep = ((clustered[:, 0] != clustered[:, 1]) & (clustered[:, 1] != clustered[:, 2])
+            & (clustered[:, 0] != clustered[:, 2]))
+    clustered = clustered[keep]
+    # Several original faces can collapse onto the same triangle
+    ordered = np.sort(clustered, axis=1)
+    n = int(cluster.max()) + 1
+    if n < 1 << 21:
+        _, first = np.unique((ordered[:, 0] * n + ordered[:, 1]) * n + ordered[:, 2], return_index=True)
+    else:
+        _, first = np.unique(ordered, axis=0, return_index=True)
+    return cluster, clustered[np.sort(first)]
+
+
+def _quadric_positions(vertices: np.ndarray, faces: np.ndarray, cluster: np.ndarray, n_clusters: int) -> np.ndarray:
+    """
+    Per-cluster position minimizing the summed squared distance to the planes
+    of the cluster's original faces (Lindstrom-style clustering with quadrics).
+    Clusters whose quadric is singular (flat or too few faces) use the mean.
+    """
+    counts = np.bincount(cluster, minlength=n_clusters).astype(np.float64)
+    mean = np.stack([np.bincount(cluster, weights=vertices[:, a], minlength=n_clusters) for a in range(3)], axis=1)
+    mean /= np.maximum(counts, 1)[:, None]
+
+    normals = np.cross(vertices[faces[:, 1]] - vertices[faces[:, 0]], vertices[faces[:, 2]] - vertices[faces[:, 0]])
+    area = np.linalg.norm(normals, axis=1)
+    valid = area > 0
+    unit = normals[valid] / area[valid, None]
+    d = -np.einsum("ij,ij->i", unit, vertices[faces[valid, 0]])
+    planes = np.column_stack([unit, d])
+    weights = area[valid] / 2
+
+    # Accumulate A = sum(w n n^T), b = sum(w d n) for every corner's cluster
+    quadric = np.zeros((n_clusters, 3, 4))
+    for corner in range(3):
+        owners = cluster[faces[valid, corner]]
+        for i in range(3):
+            for j in range(4):
+                quadric[:, i, j] += np.bincount(owners, weights=weights * planes[:, i] * planes[:, j],
+                                                minlength=n_clusters)
+
+    a, b = quadric[:, :, :3], -quadric[:, :, 3]
+    scale = np.abs(a).max(axis=(1, 2))
+    solvable = np.abs(np.linalg.det(a)) > 1e-9 * np.maximum(scale, 1e-30) ** 3
+    positions = mean.copy()
+    if solvable.any():
+        positions[solvable] = np.linalg.solve(a[solvable], b[solvable][:, :, None])[:, :, 0]
+    return positions
+
+
+def decimate(mesh: MeshData, target_faces: int, method: str = "quadric") -> MeshData:
+    """
+    Simplifies the mesh to at most target_faces triangles by vertex clustering.
+    The grid resolution is found by bisection; cluster representatives are
+    quadric-optimal (method="quadric") or the cluster mean (method="mean").
+    Raises ValueError if even the coarsest grid keeps more than target_faces.
+    """
+    if method not in ("quadric", "mean"):
+        raise ValueError(f"Unknown decimation method {method!r}")
+    if mesh.face_count <= target_faces or not mesh.vertex_count:
+        return mesh
+
+    vertices = mesh.vertices.astype(np.float64)
+    faces = np.asarray(mesh.faces, dtype=np.int64)
+    low, high = 1, 4096
+    best = _cluster(vertices, faces, low)
+    while low < high:
+        middle = (low + high + 1) // 2
+        candidate = _cluster(vertices, faces, middle)
+        if len(candidate[1]) <= target_faces:
+            low, best = middle, candidate
+        else:
+            high = middle - 1
+
+    cluster, new_faces = best
+    if len(new_faces) > target_faces:
+        raise ValueError(f"Cannot decimate to {target_faces} faces: the coarsest clustering "
+                         f"keeps {len(new_faces)}")
+    n_clusters = int(cluster.max()) + 1
+    if method == "quadric":
+        positions = _quadric_positions(vertices, faces, cluster, n_clusters)
+    else:
+        counts = np.maximum(np.bincount(cluster, minlength=n_clusters), 1)
+        positions = np.stack([np.bincount(cluster, weights=vertices[:, a], minlength=n_clusters)
+                              for a in range(3)], axis=1) / counts[:, None]
+
+    # Keep only clusters that still belong to a face
+    used, compact = np.unique(new_faces, return_inverse=True)
+    result = MeshData(positions[used].astype(np.float32), compact.reshape(-1, 3).astype(np.int32))
+    result.normals = result.vertex_normals()
+    result.normal_indices = result.faces.copy()
+    return result
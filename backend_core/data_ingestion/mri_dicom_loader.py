@@ -1,4 +1,7 @@
 import json
+from typing import Optional, Sequence
+
+from .volume_pipeline import open_volume, volume_to_point_cloud
 
 class MriScanner:
     """
@@ -33,4 +36,17 @@ class MriScanner:
         with open(output_path, 'w') as f:
             json.dump({"points": points}, f)
         
-        return f"Point cloud saved to {output_path}"
\ No newline at end of file
+        return f"Point cloud saved to {output_path}"
+
+    def export_point_cloud(self, volume_path: str, output_path: str, threshold: float,
+                           shape: Optional[Sequence[int]] = None, dtype: str = "<i2",
+                           spacing: Sequence[float] = (2.0, 1.0, 1.0), downsample: int = 2,
+                           slab: int = 32) -> dict:
+        """
+        Real-resolution path: memory-maps the voxel volume (.npy or raw dump with
+        `shape`) and writes a binary glTF POINTS cloud slab by slab.
+        Returns the JSON header (point count, bounding box, file names).
+        """
+        volume = open_volume(volume_path, shape=shape, dtype=dtype)
+        return volume_to_point_cloud(volume, output_path, threshold, spacing=spacing,
+                                     downsample=downsample, slab=slab)
@@ -0,0 +1,150 @@
+"""
+Octree level-of-detail tiles for scan point clouds.
+
+    output_dir/
+        tileset.json                 build id, root id, bounding cube, point budget
+                                     and one entry per tile: depth, point count,
+                                     bounding cube, child ids
+        tiles/<build_id>/<id>.bin    POINT_DTYPE records (same layout as volume_pipeline)
+
+Every build writes its tiles to a new directory, so a tile URL that carries
+the build id never changes content and can be cached indefinitely; older
+builds are removed once the new tileset.json is in place.
+
+Tile ids spell the path from the root: "r", then one octant digit (0-7)
+per level, e.g. "r05". Refinement is additive: every tile holds a random
+sample of at most point_budget of the points in its cube that no ancestor
+took, so drawing the root gives a coarse preview of the whole scan and each
+loaded child adds detail to its octant.
+"""
+
+import json
+import os
+import re
+import shutil
+import uuid
+from typing import Dict, Optional
+
+import numpy as np
+
+from .volume_pipeline import POINT_DTYPE
+
+TILE_ID = re.compile(r"^r[0-7]{0,21}$")
+BUILD_ID = re.compile(r"^[0-9a-f]{32}$")
+_MAX_DEPTH_BITS = 21  # 3 x 21 bits fit in a uint64 Morton code
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Inserts two zero bits between each of the low 21 bits (Morton encoding)."""
+    x = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    x = (x | (x << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return x
+
+
+def _child_cube(cube_min: np.ndarray, size: float, octant: int):
+    half = size / 2.0
+    offset = np.array([(octant >> 2) & 1, (octant >> 1) & 1, octant & 1], dtype=np.float64) * half
+    return cube_min + offset, half
+
+
+def build_octree(points: np.ndarray, output_dir: str, point_budget: int = 65536,
+                 max_depth: int = 10, seed: Optional[int] = 0) -> dict:
+    """
+    Splits POINT_DTYPE records into octree tiles under output_dir and
+    returns the tileset index (also written to tileset.json).
+    """
+    if not 1 <= max_depth <= _MAX_DEPTH_BITS:
+        raise ValueError(f"max_depth must be between 1 and {_MAX_DEPTH_BITS}")
+    build_id = uuid.uuid4().hex
+    tiles_root = os.path.join(output_dir, "tiles")
+    tiles_dir = os.path.join(tiles_root, build_id)
+    os.makedirs(tiles_dir)
+
+    positions = points["position"].astype(np.float64)
+    if len(points):
+        bbox_min, bbox_max = positions.min(axis=0), positions.max(axis=0)
+    else:
+        bbox_min = bbox_max = np.zeros(3)
+    size = float(max((bbox_max - bbox_min).max(), 1e-6))
+
+    # Morton-sort the points: every octree node is then one contiguous run
+    cells = 1 << max_depth
+    grid = np.clip(((positions - bbox_min) / size * cells).astype(np.int64), 0, cells - 1)
+    codes = (_spread_bits(grid[:, 0]) << np.uint64(2)) | (_spread_bits(grid[:, 1]) << np.uint64(1)) | _spread_bits(grid[:, 2])
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    # Random priority decides which points a tile keeps for its preview
+    priority = np.random.default_rng(seed).permutation(len(points))[order]
+
+    tiles: Dict[str, dict] = {}
+    stack = [("r", 0, np.arange(len(points)), bbox_min, size)]
+    while stack:
+        tile_id, depth, remaining, cube_min, cube_size = stack.pop()
+        if len(remaining) <= point_budget or depth == max_depth:
+            taken, rest = remaining, remaining[:0]
+        else:
+            pick = np.zeros(len(remaining), dtype=bool)
+            pick[np.argpartition(priority[remaining], point_budget)[:point_budget]] = True
+            taken, rest = remaining[pick], remaining[~pick]
+
+        children = []
+        if len(rest):
+            shift = np.uint64(3 * (max_depth - depth - 1))
+            octants = ((codes[rest] >> shift) & np.uint64(7)).astype(np.int64)
+            bounds = np.searchsorted(octants, np.arange(9))
+            for octant in range(8):
+                members = rest[bounds[octant]:bounds[octant + 1]]
+                if len(members):
+                    child_id = f"{tile_id}{octant}"
+                    child_min, child_size = _child_cube(cube_min, cube_size, octant)
+                    children.append(child_id)
+                    stack.append((child_id, depth + 1, members, child_min, child_size))
+
+        with open(os.path.join(tiles_dir, tile_id + ".bin"), "wb") as f:
+            f.write(points[order[taken]].tobytes())
+        tiles[tile_id] = {
+            "depth": depth,
+            "count": int(len(taken)),
+            "bbox": [cube_min.tolist(), (cube_min + cube_size).tolist()],
+            "children": sorted(children),
+        }
+
+    tileset = {
+        "format": "biotwin-octree-v1",
+        "build_id": build_id,
+        "root": "r",
+        "point_budget": point_budget,
+        "stride": POINT_DTYPE.itemsize,
+        "units": "mm",
+        "total_points": int(len(points)),
+        "bbox": [bbox_min.tolist(), bbox_max.tolist()],
+        "tiles": tiles,
+    }
+    tmp_path = os.path.join(output_dir, "tileset.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(tileset, f)
+    os.replace(tmp_path, os.path.join(output_dir, "tileset.json"))
+
+    # Tiles of earlier builds are no longer referenced by the tileset
+    for name in os.listdir(tiles_root):
+        if name != build_id:
+            path = os.path.join(tiles_root, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+    return tileset
+
+
+def build_octree_from_point_cloud(header_path: str, output_dir: str, point_budget: int = 65536,
+                                  max_depth: int = 10) -> dict:
+    """Tiles a point cloud written by volume_pipeline.volume_to_point_cloud (its .json header)."""
+    with open(header_path, "r") as f:
+        header = json.load(f)
+    bin_path = os.path.join(os.path.dirname(header_path), header["buffer"])
+    points = np.fromfile(bin_path, dtype=POINT_DTYPE, count=header["count"])
+    return build_octree(points, output_dir, point_budget=point_budget, max_depth=max_depth)
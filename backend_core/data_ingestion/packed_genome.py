@@ -0,0 +1,255 @@
+"""
+2-bit packed genome format (.btg2)
+
+    header   32 bytes: magic "BTG2", uint32 version, uint64 index offset,
+             uint64 index length, 8 reserved bytes
+    per record:
+        packed bases   ceil(length / 4) bytes, A=0 C=1 G=2 T=3, first base in the high bits
+        N runs         int64 (start, end) pairs, half-open, record coordinates
+        soft-mask runs int64 (start, end) pairs for lowercase bases
+    index    UTF-8 JSON with the name, header, length and byte offsets of every record
+
+Any base other than A/C/G/T (N and IUPAC ambiguity codes) is stored as an N run.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .saliva_genomics_parser import MappedFastaReader
+
+MAGIC = b"BTG2"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQQ8x")
+
+# byte value -> 2-bit code / "is N" / "is soft-masked" lookup tables
+_CODES = np.zeros(256, dtype=np.uint8)
+for _base, _code in zip(b"ACGT", range(4)):
+    _CODES[_base] = _code
+    _CODES[_base + 32] = _code
+_IS_N = np.ones(256, dtype=bool)
+_IS_N[list(b"ACGTacgt")] = False
+_IS_LOWER = np.zeros(256, dtype=bool)
+_IS_LOWER[ord("a"):ord("z") + 1] = True
+_LETTERS = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def _find_runs(mask: np.ndarray, offset: int) -> np.ndarray:
+    """(start, end) pairs of the True runs in `mask`, shifted by `offset`."""
+    padded = np.concatenate(([False], mask, [False])).view(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return (edges.reshape(-1, 2) + offset).astype(np.int64)
+
+
+def _merge_runs(runs: List[np.ndarray]) -> np.ndarray:
+    # Runs split by chunk boundaries are joined back together
+    if not runs:
+        return np.zeros((0, 2), dtype=np.int64)
+    runs = np.concatenate(runs)
+    if len(runs) < 2:
+        return runs
+    keep_start = np.concatenate(([True], runs[1:, 0] != runs[:-1, 1]))
+    keep_end = np.concatenate((runs[1:, 0] != runs[:-1, 1], [True]))
+    return np.stack([runs[keep_start, 0], runs[keep_end, 1]], axis=1)
+
+
+def _pack(codes: np.ndarray) -> bytes:
+    remainder = len(codes) % 4
+    if remainder:
+        codes = np.concatenate((codes, np.zeros(4 - remainder, dtype=np.uint8)))
+    quads = codes.reshape(-1, 4)
+    packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+    return packed.astype(np.uint8).tobytes()
+
+
+def pack_fasta(fasta_path: str, output_path: str, chunk_size: int = 1 << 22) -> str:
+    """
+    Converts a FASTA file into the 2-bit packed format, streaming one chunk at a time.
+    """
+    if chunk_size < 4:
+        raise ValueError("chunk_size must be at least 4 bases")
+    chunk_size -= chunk_size % 4  # keep chunks aligned to whole packed bytes
+    index = []
+    tmp_path = output_path + ".tmp"
+
+    with MappedFastaReader(fasta_path) as reader, open(tmp_path, "wb") as out:
+        out.write(b"\0" * _HEADER.size)
+
+        for record in reader.records:
+            seq_offset = out.tell()
+            length = 0
+            n_runs, mask_runs = [], []
+            for chunk in reader.iter_chunks(record.name, chunk_size=chunk_size, uppercase=False):
+                raw = np.frombuffer(chunk, dtype=np.uint8)
+                out.write(_pack(_CODES[raw]))
+                n_runs.append(_find_runs(_IS_N[raw], length))
+                mask_runs.append(_find_runs(_IS_LOWER[raw], length))
+                length += len(raw)
+
+            n_runs = _merge_runs(n_runs)
+            mask_runs = _merge_runs(mask_runs)
+            n_offset = out.tell()
+            out.write(n_runs.tobytes())
+            mask_offset = out.tell()
+            out.write(mask_runs.tobytes())
+
+            index.append({
+                "name": record.name,
+                "header": record.header,
+                "length": length,
+                "seq_offset": seq_offset,
+                "n_offset": n_offset,
+                "n_count": len(n_runs),
+                "mask_offset": mask_offset,
+                "mask_count": len(mask_runs),
+            })
+
+        index_blob = json.dumps({"records": index}).encode("utf-8")
+        index_offset = out.tell()
+        out.write(index_blob)
+        out.seek(0)
+        out.write(_HEADER.pack(MAGIC, VERSION, index_offset, len(index_blob)))
+
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class PackedGenome:
+    """
+    Read-only, memory-mapped access to a 2-bit packed genome.
+    Region queries decode only the bytes they touch, so fetch() costs
+    O(region length) regardless of genome size, and every process that opens
+    the same file shares one copy of it in the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_offset, index_length = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a packed genome file: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported packed genome version {version}")
+
+        index = json.loads(self._mm[index_offset:index_offset + index_length])
+        self.records: Dict[str, dict] = {record["name"]: record for record in index["records"]}
+
+    @property
+    def record_names(self) -> List[str]:
+        return list(self.records)
+
+    def length(self, record: str) -> int:
+        return self._record(record)["length"]
+
+    def _record(self, record: str) -> dict:
+        if record not in self.records:
+            raise KeyError(f"Unknown genome record: {record}")
+        return self.records[record]
+
+    def _runs(self, offset: int, count: int) -> np.ndarray:
+        return np.frombuffer(self._mm, dtype=np.int64, count=count * 2, offset=offset).reshape(-1, 2)
+
+    @staticmethod
+    def _overlay(runs: np.ndarray, start: int, end: int) -> Optional[np.ndarray]:
+        """Boolean mask over [start, end) of the positions covered by `runs`."""
+        first = np.searchsorted(runs[:, 1], start, side="right")
+        last = np.searchsorted(runs[:, 0], end, side="left")
+        if first >= last:
+            return None
+        hits = runs[first:last]
+        delta = np.zeros(end - start + 1, dtype=np.int32)
+        np.add.at(delta, np.clip(hits[:, 0], start, end) - start, 1)
+        np.add.at(delta, np.clip(hits[:, 1], start, end) - start, -1)
+        return np.cumsum(delta[:-1]) > 0
+
+    def fetch_bytes(self, record: str, start: int = 0, end: Optional[int] = None,
+                    soft_mask: bool = False) -> bytes:
+        meta = self._record(record)
+        end = meta["length"] if end is None else min(end, meta["length"])
+        start = max(0, start)
+        if start >= end:
+            return b""
+
+        first_byte = start // 4
+        n_bytes = (end + 3) // 4 - first_byte
+        packed = np.frombuffer(self._mm, dtype=np.uint8, count=n_bytes, offset=meta["seq_offset"] + first_byte)
+        codes = np.stack(((packed >> 6) & 3, (packed >> 4) & 3, (packed >> 2) & 3, packed & 3), axis=1).ravel()
+        skip = start - first_byte * 4
+        letters = _LETTERS[codes[skip:skip + end - start]]
+
+        is_n = self._overlay(self._runs(meta["n_offset"], meta["n_count"]), start, end)
+        if is_n is not None:
+            letters[is_n] = ord("N")
+        if soft_mask:
+            is_masked = self._overlay(self._runs(meta["mask_offset"], meta["mask_count"]), start, end)
+            if is_masked is not None:
+                letters[is_masked] += 32  # to lowercase
+        return letters.tobytes()
+
+    def fetch(self, record: str, start: int = 0, end: Optional[int] = None, soft_mask: bool = False) -> str:
+        """Bases [start, end) of a record as a string (uppercase unless soft_mask=True)."""
+        return self.fetch_bytes(record, start, end, soft_mask).decode("ascii")
+
+    def iter_chunks(self, record: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+        """Same chunk interface as MappedFastaReader.iter_chunks."""
+        length = self.length(record)
+        for start in range(0, length, chunk_size):
+            yield self.fetch_bytes(record, start, min(start + chunk_size, length))
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """(length, N-run count) per record."""
+        return {name: (meta["length"], meta["n_count"]) for name, meta in self.records.items()}
+
+    @property
+    def closed(self) -> bool:
+        return self._mm.closed
+
+    def close(self):
+        # A closed handle must not be handed out again by open_packed_genome()
+        _forget_shared(self)
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Shared handles by absolute path, least recently opened first
+_SHARED: "OrderedDict[str, PackedGenome]" = OrderedDict()
+_SHARED_LOCK = threading.Lock()
+_SHARED_MAX = 16
+
+
+def _forget_shared(genome: PackedGenome):
+    with _SHARED_LOCK:
+        if _SHARED.get(genome.path) is genome:
+            del _SHARED[genome.path]
+
+
+def open_packed_genome(path: str) -> PackedGenome:
+    """
+    Process-wide shared handle, so many twins can reference one genome file.
+    Up to 16 files stay cached; a handle that was close()d is reopened.
+    """
+    path = os.path.abspath(path)
+    with _SHARED_LOCK:
+        genome = _SHARED.get(path)
+        if genome is not None and not genome.closed:
+            _SHARED.move_to_end(path)
+            return genome
+        genome = _SHARED[path] = PackedGenome(path)
+        if len(_SHARED) > _SHARED_MAX:
+            # Dropped from the cache only; holders keep using their handle
+            _SHARED.popitem(last=False)
+        return genome
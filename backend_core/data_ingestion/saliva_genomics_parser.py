@@ -1,4 +1,156 @@
+import mmap
 import os
+from typing import Dict, Iterator, List, Optional, Union
+
+# Byte-level lookup tables (one C-level pass per chunk instead of per-character Python)
+_UPPERCASE = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_WHITESPACE = b"\r\n \t"
+_VALID_DNA = b"ATCGN"
+
+
+class FastaRecord:
+    """
+    One '>' record of a FASTA file.
+    seq_start/seq_end are byte offsets of the raw sequence lines in the file.
+    """
+
+    def __init__(self, name: str, header: str, seq_start: int, seq_end: int):
+        self.name = name
+        self.header = header
+        self.seq_start = seq_start
+        self.seq_end = seq_end
+
+    def __repr__(self) -> str:
+        return f"FastaRecord({self.name!r}, bytes={self.seq_end - self.seq_start})"
+
+
+class MappedFastaReader:
+    """
+    Memory-mapped, multi-record FASTA reader.
+    Only the record index (headers + byte offsets) is held in memory; sequence
+    data is streamed from the page cache in fixed-size chunks, so a whole
+    genome never has to be materialised as one Python string.
+    """
+
+    def __init__(self, file_path: str):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Genomic file not found: {file_path}")
+
+        self.file_path = file_path
+        self._file = open(file_path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.records: List[FastaRecord] = self._index_records()
+        self._by_name = {record.name: record for record in self.records}
+
+    def _index_records(self) -> List[FastaRecord]:
+        mm = self._mm
+        size = len(mm)
+        records = []
+
+        # Sequence lines before the first header (headerless .txt input)
+        if mm[:1] == b">":
+            first_header = 0
+        else:
+            newline = mm.find(b"\n>")
+            first_header = size if newline == -1 else newline + 1
+        if first_header > 0 and mm[:first_header].strip():
+            records.append(FastaRecord("sequence", "", 0, first_header))
+
+        pos = first_header
+        while pos < size:
+            header_end = mm.find(b"\n", pos)
+            if header_end == -1:
+                header_end = size
+            header = mm[pos + 1:header_end].decode("utf-8", errors="replace").strip()
+
+            next_header = mm.find(b"\n>", header_end)
+            seq_end = size if next_header == -1 else next_header + 1
+            name = header.split()[0] if header else f"record_{len(records)}"
+            records.append(FastaRecord(name, header, min(header_end + 1, size), seq_end))
+            pos = seq_end
+        return records
+
+    @property
+    def record_names(self) -> List[str]:
+        return [record.name for record in self.records]
+
+    def _record(self, name: Optional[str]) -> FastaRecord:
+        if name is None:
+            if len(self.records) != 1:
+                raise ValueError("File has several records: pass a record name")
+            return self.records[0]
+        if name not in self._by_name:
+            raise KeyError(f"Unknown FASTA record: {name}")
+        return self._by_name[name]
+
+    def record_view(self, name: Optional[str] = None) -> memoryview:
+        """
+        Zero-copy view of a record's raw bytes (line breaks included, original case).
+        Release the view before calling close().
+        """
+        record = self._record(name)
+        return memoryview(self._mm)[record.seq_start:record.seq_end]
+
+    def iter_chunks(self, name: Optional[str] = None, chunk_size: int = 1 << 20,
+                    uppercase: bool = True, validate: bool = False) -> Iterator[bytes]:
+        """
+        Yields a record's sequence in chunks of exactly `chunk_size` bases
+        (the last one may be shorter), with line breaks removed.
+
+        :param uppercase: fold soft-masked (lowercase) bases to uppercase.
+        :param validate: raise ValueError on any base outside A/T/C/G/N,
+            checked in the same pass over each chunk.
+        """
+        record = self._record(name)
+        table = _UPPERCASE if uppercase else None
+        # Read a little more than chunk_size raw bytes to make up for line breaks
+        read_size = chunk_size + chunk_size // 32 + 1
+        pending = bytearray()
+        emitted = 0
+
+        for pos in range(record.seq_start, record.seq_end, read_size):
+            raw = self._mm[pos:min(pos + read_size, record.seq_end)]
+            cleaned = raw.translate(table, _WHITESPACE)
+            if validate:
+                check = cleaned if uppercase else cleaned.translate(_UPPERCASE)
+                if check.translate(None, _VALID_DNA):
+                    raise ValueError(f"Invalid DNA characters in record {record.name} near base {emitted + len(pending)}")
+            pending += cleaned
+            while len(pending) >= chunk_size:
+                yield bytes(pending[:chunk_size])
+                del pending[:chunk_size]
+                emitted += chunk_size
+
+        if pending:
+            yield bytes(pending)
+
+    def sequence(self, name: Optional[str] = None, uppercase: bool = True) -> bytes:
+        """Full sequence of a single record (one copy of that record only)."""
+        return b"".join(self.iter_chunks(name, uppercase=uppercase))
+
+    def validate(self, name: Optional[str] = None) -> bool:
+        names = [name] if name is not None else self.record_names
+        try:
+            for record_name in names:
+                for _ in self.iter_chunks(record_name, validate=True):
+                    pass
+        except ValueError:
+            return False
+        return True
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 
 class FastA_Parser:
     """
@@ -6,38 +158,37 @@ class FastA_Parser:
     Extracts the raw nucleotide sequence string.
     """
 
+    def open(self, file_path: str) -> MappedFastaReader:
+        """Memory-mapped reader that keeps every record and its header."""
+        return MappedFastaReader(file_path)
+
     def load_sequence_from_file(self, file_path: str) -> str:
         """
         Parses a standard FASTA file.
         Lines starting with '>' are headers (metadata).
         Other lines are the DNA sequence.
+        All records are concatenated; use load_records() to keep them apart.
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Genomic file not found: {file_path}")
+        with MappedFastaReader(file_path) as reader:
+            # Join all records into one massive string (uppercased while streaming)
+            return b"".join(
+                chunk for name in reader.record_names for chunk in reader.iter_chunks(name)
+            ).decode("ascii", errors="replace")
+
+    def load_records(self, file_path: str) -> Dict[str, str]:
+        """
+        Returns {record name: uppercase sequence} for every record in the file.
+        """
+        with MappedFastaReader(file_path) as reader:
+            return {name: reader.sequence(name).decode("ascii", errors="replace") for name in reader.record_names}
 
-        sequence_buffer = []
-        
-        with open(file_path, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if line.startswith(">"):
-                    # This is metadata (e.g., ">Patient_001_Chr1")
-                    # We can store it or skip it
-                    continue 
-                else:
-                    # This is actual DNA data
-                    sequence_buffer.append(line)
-        
-        # Join all lines into one massive string
-        full_sequence = "".join(sequence_buffer)
-        return full_sequence.upper() # Ensure standard uppercase
-
-    def validate_dna(self, sequence: str) -> bool:
+    def validate_dna(self, sequence: Union[str, bytes]) -> bool:
         """
         Checks if the file contains valid DNA characters (A, T, C, G, N).
         """
-        valid_chars = set("ATCGN")
-        return all(char in valid_chars for char in sequence)
\ No newline at end of file
+        if isinstance(sequence, str):
+            if not sequence.isascii():
+                return False
+            sequence = sequence.encode("ascii")
+        # Deleting every valid byte must leave nothing behind
+        return not sequence.translate(None, _VALID_DNA)
@@ -0,0 +1,363 @@
+"""
+In-process time-series store for wearable vitals.
+
+Every (device, field) series keeps:
+    raw      ring buffer of (t, value) samples
+    rollups  ring buffers of (t, min, max, sum, count) per 1 s, 1 min and 1 h bucket
+Records pushed out of a full ring are appended to a spill file in the data lake
+(one flat binary file per series and level) and read back through np.memmap,
+so history is kept without growing RAM.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RAW_DTYPE = np.dtype([("t", "<f8"), ("v", "<f4")])
+ROLLUP_DTYPE = np.dtype([("t", "<f8"), ("min", "<f4"), ("max", "<f4"), ("sum", "<f8"), ("count", "<u4")])
+
+# resolution in seconds -> maximum in-memory buckets (1 day of seconds, 1 week of minutes,
+# 1 year of hours); rings grow to these sizes only as a series accumulates data
+ROLLUP_LEVELS = {1: 86400, 60: 7 * 1440, 3600: 365 * 24}
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+
+SpillWrites = List[Tuple["_SpillFile", np.ndarray]]
+
+
+def numeric_fields(packet: dict) -> Iterable[Tuple[str, float]]:
+    """(field, value) pairs of a packet that are stored as series."""
+    for field, value in packet.items():
+        if field != "timestamp" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield field, value
+
+
+class _Ring:
+    """
+    Bounded ring buffer of structured records, oldest first. Storage starts
+    small and doubles up to capacity, so idle or short-lived series only hold
+    the records they have actually received.
+    """
+
+    def __init__(self, capacity: int, dtype: np.dtype, initial: int = 64):
+        self.data = np.zeros(min(capacity, initial), dtype=dtype)
+        self.capacity = capacity
+        self.total = 0  # records ever appended
+
+    def _reserve(self, size: int):
+        # Only reached before the first wrap, while records sit in data[:total]
+        if size > len(self.data):
+            grown = np.zeros(min(self.capacity, max(size, 2 * len(self.data))), dtype=self.data.dtype)
+            kept = min(self.total, len(self.data))
+            grown[:kept] = self.data[:kept]
+            self.data = grown
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _segments(self) -> List[np.ndarray]:
+        if self.total <= self.capacity:
+            return [self.data[:self.total]]
+        start = self.total % self.capacity
+        return [self.data[start:], self.data[:start]]
+
+    def append(self, records: np.ndarray) -> np.ndarray:
+        """Appends records and returns the ones that were overwritten (oldest first)."""
+        n = len(records)
+        overflow = len(self) + n - self.capacity
+        evicted = np.concatenate(self._segments())[:overflow] if overflow > 0 else records[:0]
+        if n > self.capacity:
+            evicted = np.concatenate((evicted, records[:n - self.capacity]))
+            records = records[n - self.capacity:]
+            self.total += n - len(records)
+            n = len(records)
+        self._reserve(min(self.total + n, self.capacity))
+        positions = (self.total + np.arange(n)) % self.capacity
+        self.data[positions] = records
+        self.total += n
+        return evicted
+
+    def last(self) -> Optional[np.void]:
+        return self.data[(self.total - 1) % self.capacity] if self.total else None
+
+    def first_time(self) -> Optional[float]:
+        return float(self._segments()[0]["t"][0]) if self.total else None
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        parts = []
+        for segment in self._segments():
+            times = segment["t"]
+            parts.append(segment[np.searchsorted(times, start):np.searchsorted(times, end)])
+        return np.concatenate(parts)
+
+
+class _SpillFile:
+    """Append-only file of structured records, read back through np.memmap."""
+
+    def __init__(self, path: str, dtype: np.dtype):
+        self.path = path
+        self.dtype = dtype
+
+    def append(self, records: np.ndarray):
+        if len(records):
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+
+    def _records(self) -> Optional[np.ndarray]:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.dtype.itemsize:
+            return None
+        return np.memmap(self.path, dtype=self.dtype, mode="r")
+
+    def first_time(self) -> Optional[float]:
+        records = self._records()
+        return None if records is None else float(records["t"][0])
+
+    def bounds(self, start: float, end: float) -> Tuple[int, int]:
+        """Record indices covering [start, end)."""
+        records = self._records()
+        if records is None:
+            return 0, 0
+        # bisect reads O(log n) records; np.searchsorted would copy the strided "t" column
+        times = records["t"]
+        return bisect.bisect_left(times, start), bisect.bisect_left(times, end)
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        records = self._records()
+        if records is None:
+            return np.zeros(0, dtype=self.dtype)
+        first, last = self.bounds(start, end)
+        return np.array(records[first:last])
+
+
+class VitalsSeries:
+    def __init__(self, raw_capacity: int, spill_prefix: Optional[str] = None):
+        self.raw = _Ring(raw_capacity, RAW_DTYPE)
+        self.rollups = {res: _Ring(capacity, ROLLUP_DTYPE) for res, capacity in ROLLUP_LEVELS.items()}
+        self.spills: Dict[object, _SpillFile] = {}
+        if spill_prefix is not None:
+            self.spills["raw"] = _SpillFile(f"{spill_prefix}.raw.bin", RAW_DTYPE)
+            for res in ROLLUP_LEVELS:
+                self.spills[res] = _SpillFile(f"{spill_prefix}.{res}s.bin", ROLLUP_DTYPE)
+        self.late = 0
+        self.first_time: Optional[float] = None
+
+    def _spill(self, level, evicted: np.ndarray, writes: SpillWrites):
+        if level in self.spills and len(evicted):
+            writes.append((self.spills[level], evicted))
+
+    def append(self, times: np.ndarray, values: np.ndarray) -> SpillWrites:
+        """
+        Adds samples and returns the evicted records still to be written to
+        the spill files, so the caller can do the file I/O outside its lock.
+        """
+        writes: SpillWrites = []
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+        last = self.raw.last()
+        if last is not None:
+            # Rollup buckets are append-only: samples older than the newest one are dropped
+            on_time = times >= last["t"]
+            self.late += int(len(times) - on_time.sum())
+            times, values = times[on_time], values[on_time]
+        if not len(times):
+            return writes
+        if self.first_time is None:
+            self.first_time = float(times[0])
+
+        raw = np.empty(len(times), dtype=RAW_DTYPE)
+        raw["t"], raw["v"] = times, values
+        self._spill("raw", self.raw.append(raw), writes)
+
+        for res, ring in self.rollups.items():
+            buckets = np.floor(times / res) * res
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+            rows = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+            rows["t"] = buckets[starts]
+            rows["min"] = np.minimum.reduceat(values, starts)
+            rows["max"] = np.maximum.reduceat(values, starts)
+            rows["sum"] = np.add.reduceat(values.astype(np.float64), starts)
+            rows["count"] = np.diff(np.append(starts, len(values)))
+
+            newest = ring.last()
+            if newest is not None and newest["t"] == rows["t"][0]:
+                # Still inside the open bucket: merge in place
+                index = (ring.total - 1) % ring.capacity
+                ring.data["min"][index] = min(newest["min"], rows["min"][0])
+                ring.data["max"][index] = max(newest["max"], rows["max"][0])
+                ring.data["sum"][index] += rows["sum"][0]
+                ring.data["count"][index] += rows["count"][0]
+                rows = rows[1:]
+            self._spill(res, ring.append(rows), writes)
+        return writes
+
+    def _level_range(self, level, start: float, end: float) -> np.ndarray:
+        ring = self.raw if level == "raw" else self.rollups[level]
+        parts = []
+        ring_start = ring.first_time()
+        if level in self.spills and (ring_start is None or start < ring_start):
+            parts.append(self.spills[level].range(start, end if ring_start is None else min(end, ring_start)))
+        parts.append(ring.range(start, end))
+        return np.concatenate(parts)
+
+    def _earliest(self, level) -> Optional[float]:
+        ring = self.raw if level == "raw" else self.rollups[level]
+        spilled = self.spills[level].first_time() if level in self.spills else None
+        return spilled if spilled is not None else ring.first_time()
+
+    def _raw_count(self, start: float, end: float) -> int:
+        count = sum(int(np.searchsorted(segment["t"], end) - np.searchsorted(segment["t"], start))
+                    for segment in self.raw._segments())
+        ring_start = self.raw.first_time()
+        if "raw" in self.spills and ring_start is not None and start < ring_start:
+            first, last = self.spills["raw"].bounds(start, min(end, ring_start))
+            count += last - first
+        return count
+
+    def query(self, start: float, end: float, max_points: int) -> dict:
+        """
+        Picks the finest level that returns at most max_points points and
+        still reaches back to `start` (or to the first sample ever stored);
+        otherwise falls back to the coarsest level.
+        """
+        levels = ["raw"] + sorted(self.rollups)
+        needed = start if self.first_time is None else max(start, self.first_time)
+        chosen = levels[-1]
+        for level in levels[:-1]:
+            earliest = self._earliest(level)
+            if earliest is None or earliest > needed:
+                continue
+            n = self._raw_count(start, end) if level == "raw" else (end - start) / level
+            if n <= max_points:
+                chosen = level
+                break
+
+        if chosen != "raw":
+            start = np.floor(start / chosen) * chosen  # include the bucket that contains start
+        records = self._level_range(chosen, start, end)
+        if chosen == "raw":
+            values = records["v"].astype(np.float64)
+            return {"resolution": "raw", "t": records["t"], "min": values, "max": values,
+                    "mean": values, "count": np.ones(len(values), dtype=np.uint32), "late": self.late}
+        return {"resolution": chosen, "t": records["t"], "min": records["min"].astype(np.float64),
+                "max": records["max"].astype(np.float64), "mean": records["sum"] / records["count"],
+                "count": records["count"], "late": self.late}
+
+
+class VitalsStore:
+    """
+    Series are created on first sample. consume() has the WearableHub consumer
+    signature, so the store can subscribe to a hub directly.
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None, raw_capacity: int = 1 << 16):
+        self.spill_dir = spill_dir
+        self.raw_capacity = raw_capacity
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._series: Dict[Tuple[Hashable, str], VitalsSeries] = {}
+        # Ingestion and queries both run on worker threads (see aconsume)
+        self._lock = threading.Lock()
+        # Evicted records are queued under _lock and written under _spill_lock,
+        # in eviction order; queries do not wait for the file I/O
+        self._spill_lock = threading.Lock()
+        self._unwritten: SpillWrites = []
+        self.late = 0  # samples dropped for arriving behind their series' newest one
+
+    def _spill_prefix(self, device_id: Hashable, field: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        name = f"{device_id}__{field}"
+        if not _SAFE_NAME.match(name):
+            name = "id_" + hashlib.sha256(name.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, name)
+
+    def _get(self, device_id: Hashable, field: str) -> VitalsSeries:
+        series = self._series.get((device_id, field))
+        if series is None:
+            series = VitalsSeries(self.raw_capacity, self._spill_prefix(device_id, field))
+            self._series[(device_id, field)] = series
+        return series
+
+    def _append(self, device_id: Hashable, field: str, times: Sequence[float], values: Sequence[float]):
+        # Caller holds self._lock
+        series = self._get(device_id, field)
+        late = series.late
+        self._unwritten.extend(series.append(np.asarray(times, dtype=np.float64),
+                                             np.asarray(values, dtype=np.float32)))
+        self.late += series.late - late
+
+    def _flush_spills(self):
+        with self._spill_lock:
+            with self._lock:
+                writes, self._unwritten = self._unwritten, []
+            for spill, records in writes:
+                spill.append(records)
+
+    def append(self, device_id: Hashable, field: str, times: Sequence[float], values: Sequence[float]):
+        with self._lock:
+            self._append(device_id, field, times, values)
+        self._flush_spills()
+
+    def consume(self, batch: Iterable[Tuple[Hashable, dict]]):
+        """
+        Ingests (device_id, packet) pairs; every numeric field becomes a series.
+        Samples older than their series' newest one are dropped and counted in `late`.
+        """
+        columns: Dict[Tuple[Hashable, str], Tuple[List[float], List[float]]] = {}
+        for device_id, packet in batch:
+            timestamp = packet.get("timestamp")
+            if timestamp is None:
+                continue
+            for field, value in numeric_fields(packet):
+                times, values = columns.setdefault((device_id, field), ([], []))
+                times.append(timestamp)
+                values.append(value)
+        with self._lock:
+            for (device_id, field), (times, values) in columns.items():
+                self._append(device_id, field, times, values)
+        self._flush_spills()
+
+    async def aconsume(self, batch: Iterable[Tuple[Hashable, dict]]):
+        """consume() on the default executor, so lock waits and spill writes never block the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.consume, batch)
+
+    def late_fields(self, device_id: Hashable, packet: dict) -> List[str]:
+        """
+        Numeric fields of the packet that consume() would drop because the
+        series already holds a newer sample. Packets still queued in a hub
+        are not taken into account.
+        """
+        timestamp = packet.get("timestamp")
+        late = []
+        with self._lock:
+            for field, _ in numeric_fields(packet):
+                series = self._series.get((device_id, field))
+                last = series.raw.last() if series is not None else None
+                if last is not None and timestamp < last["t"]:
+                    late.append(field)
+        return late
+
+    def query(self, device_id: Hashable, field: str, start: float, end: float,
+              max_points: int = 2000) -> Optional[dict]:
+        """Samples or rollup buckets in [start, end); None if the series is unknown."""
+        with self._lock:
+            series = self._series.get((device_id, field))
+            if series is None:
+                return None
+            return series.query(start, end, max_points)
+
+    def latest(self, device_id: Hashable, field: str) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            series = self._series.get((device_id, field))
+            last = series.raw.last() if series is not None else None
+            return None if last is None else (float(last["t"]), float(last["v"]))
+
+    def series(self) -> List[Tuple[Hashable, str]]:
+        with self._lock:
+            return list(self._series)
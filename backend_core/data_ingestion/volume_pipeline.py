@@ -0,0 +1,167 @@
+"""
+Voxel volume -> binary point cloud.
+
+The volume is memory-mapped and processed one slab of z-slices at a time:
+threshold, voxel-grid downsample (one point per occupied d x d x d cell,
+carrying the cell's mean intensity) and append to an interleaved buffer:
+
+    record (16 bytes)  float32 x, y, z (mm) | uint8 r, g, b, a (grey intensity)
+
+Alongside the .bin go a small JSON header and a .gltf file that references
+the same buffer as a POINTS primitive, so Three.js' GLTFLoader can load it
+without any parsing on the JavaScript side.
+"""
+
+import json
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+POINT_DTYPE = np.dtype([("position", "<f4", (3,)), ("color", "u1", (4,))])
+
+_GL_FLOAT = 5126
+_GL_UNSIGNED_BYTE = 5121
+_GL_ARRAY_BUFFER = 34962
+_GL_POINTS = 0
+
+
+def open_volume(path: str, shape: Optional[Sequence[int]] = None, dtype: str = "<i2",
+                offset: int = 0) -> np.ndarray:
+    """
+    Memory-maps a voxel volume indexed [z, y, x].
+    .npy files carry their own shape/dtype; raw dumps need `shape` (and `dtype`,
+    `offset` to skip a vendor header).
+    """
+    if path.endswith(".npy"):
+        volume = np.load(path, mmap_mode="r")
+    else:
+        if shape is None:
+            raise ValueError("Raw volumes need an explicit (z, y, x) shape")
+        volume = np.memmap(path, dtype=np.dtype(dtype), mode="r", offset=offset, shape=tuple(shape))
+    if volume.ndim != 3:
+        raise ValueError(f"Expected a 3D volume, got shape {volume.shape}")
+    return volume
+
+
+def intensity_range(volume: np.ndarray, slab: int = 32) -> Tuple[float, float]:
+    """(min, max) of the volume in one streaming pass."""
+    low, high = np.inf, -np.inf
+    for z in range(0, volume.shape[0], slab):
+        block = np.asarray(volume[z:z + slab])
+        low, high = min(low, float(block.min())), max(high, float(block.max()))
+    return low, high
+
+
+def _downsample_slab(block: np.ndarray, threshold: float, d: int):
+    """(cell indices (z, y, x), mean intensity) of the cells with voxels >= threshold."""
+    nz, ny, nx = (-(-n // d) for n in block.shape)
+    padded = np.full((nz * d, ny * d, nx * d), -np.inf, dtype=np.float32)
+    padded[:block.shape[0], :block.shape[1], :block.shape[2]] = block
+    cells = padded.reshape(nz, d, ny, d, nx, d)
+
+    mask = cells >= threshold
+    counts = mask.sum(axis=(1, 3, 5))
+    totals = np.where(mask, cells, np.float32(0)).sum(axis=(1, 3, 5))
+    occupied = np.nonzero(counts)
+    return occupied, totals[occupied] / counts[occupied]
+
+
+def volume_to_point_cloud(volume: np.ndarray, output_path: str, threshold: float,
+                          spacing: Sequence[float] = (1.0, 1.0, 1.0), downsample: int = 2,
+                          slab: int = 32, intensity_window: Optional[Tuple[float, float]] = None,
+                          origin: Sequence[float] = (0.0, 0.0, 0.0), gltf: bool = True) -> dict:
+    """
+    Streams `volume` ([z, y, x], e.g. from open_volume) into <base>.bin,
+    <base>.json and optionally <base>.gltf, where base is output_path
+    without its extension. Peak memory is one slab of `slab` slices.
+
+    :param spacing: voxel size in mm as (z, y, x)
+    :param downsample: edge length d of the voxel grid cells
+    :param intensity_window: (low, high) mapped to grey 0..255; defaults to the
+        threshold and the volume maximum (costs one extra pass)
+    """
+    base = os.path.splitext(output_path)[0]
+    bin_path, header_path, gltf_path = base + ".bin", base + ".json", base + ".gltf"
+    d = max(1, int(downsample))
+    slab = max(d, slab - slab % d)  # slabs must not split a cell
+    sz, sy, sx = (float(s) for s in spacing)
+    oz, oy, ox = (float(o) for o in origin)
+
+    if intensity_window is None:
+        intensity_window = (threshold, intensity_range(volume, slab)[1])
+    low, high = intensity_window
+    scale = 255.0 / (high - low) if high > low else 0.0
+
+    count = 0
+    bbox_min = np.full(3, np.inf)
+    bbox_max = np.full(3, -np.inf)
+    with open(bin_path + ".tmp", "wb") as out:
+        for z0 in range(0, volume.shape[0], slab):
+            block = np.asarray(volume[z0:z0 + slab], dtype=np.float32)
+            (cz, cy, cx), intensity = _downsample_slab(block, threshold, d)
+            if not len(intensity):
+                continue
+
+            points = np.empty(len(intensity), dtype=POINT_DTYPE)
+            # Cell centres in mm, x/y/z order as glTF expects
+            half = (d - 1) / 2.0
+            points["position"][:, 0] = ox + (cx * d + half) * sx
+            points["position"][:, 1] = oy + (cy * d + half) * sy
+            points["position"][:, 2] = oz + (z0 + cz * d + half) * sz
+            grey = np.clip((intensity - low) * scale, 0, 255).astype(np.uint8)
+            points["color"][:, :3] = grey[:, None]
+            points["color"][:, 3] = 255
+
+            out.write(points.tobytes())
+            count += len(points)
+            bbox_min = np.minimum(bbox_min, points["position"].min(axis=0))
+            bbox_max = np.maximum(bbox_max, points["position"].max(axis=0))
+    os.replace(bin_path + ".tmp", bin_path)
+
+    header = {
+        "format": "biotwin-points-v1",
+        "count": count,
+        "stride": POINT_DTYPE.itemsize,
+        "attributes": {"position": {"offset": 0, "type": "float32", "size": 3},
+                       "color": {"offset": 12, "type": "uint8", "size": 4, "normalized": True}},
+        "units": "mm",
+        "bbox": [bbox_min.tolist(), bbox_max.tolist()] if count else None,
+        "source_shape": list(volume.shape),
+        "spacing_mm": [sz, sy, sx],
+        "threshold": threshold,
+        "downsample": d,
+        "intensity_window": [low, high],
+        "buffer": os.path.basename(bin_path),
+        "gltf": os.path.basename(gltf_path) if gltf and count else None,
+    }
+    with open(header_path, "w") as f:
+        json.dump(header, f)
+    if gltf and count:
+        write_points_gltf(gltf_path, os.path.basename(bin_path), count, bbox_min, bbox_max)
+    return header
+
+
+def write_points_gltf(gltf_path: str, buffer_uri: str, count: int,
+                      bbox_min: np.ndarray, bbox_max: np.ndarray, byte_offset: int = 0):
+    """glTF 2.0 scene with one POINTS primitive over an interleaved POINT_DTYPE buffer."""
+    byte_length = count * POINT_DTYPE.itemsize
+    document = {
+        "asset": {"version": "2.0", "generator": "BioTwin MriScanner"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        # Buffer positions are in mm; glTF units are metres
+        "nodes": [{"mesh": 0, "scale": [0.001, 0.001, 0.001]}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "COLOR_0": 1}, "mode": _GL_POINTS}]}],
+        "buffers": [{"uri": buffer_uri, "byteLength": byte_offset + byte_length}],
+        "bufferViews": [{"buffer": 0, "byteOffset": byte_offset, "byteLength": byte_length,
+                         "byteStride": POINT_DTYPE.itemsize, "target": _GL_ARRAY_BUFFER}],
+        "accessors": [
+            {"bufferView": 0, "byteOffset": 0, "componentType": _GL_FLOAT, "count": count,
+             "type": "VEC3", "min": np.asarray(bbox_min).tolist(), "max": np.asarray(bbox_max).tolist()},
+            {"bufferView": 0, "byteOffset": 12, "componentType": _GL_UNSIGNED_BYTE, "normalized": True,
+             "count": count, "type": "VEC4"},
+        ],
+    }
+    with open(gltf_path, "w") as f:
+        json.dump(document, f)
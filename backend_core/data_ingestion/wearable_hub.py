@@ -0,0 +1,288 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import AsyncIterable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("BioTwin_Kernel")
+
+# What to do with a new packet when a device's queue is full
+DROP_OLDEST = "drop_oldest"   # keep the freshest data
+DROP_NEWEST = "drop_newest"   # keep what is already queued
+MERGE = "merge"               # fold the packet into the newest queued one (latest values win)
+POLICIES = (DROP_OLDEST, DROP_NEWEST, MERGE)
+
+Packet = dict
+Batch = List[Tuple[Hashable, Packet]]
+
+
+class _DeviceQueue:
+    __slots__ = ("packets", "published", "dropped", "merged", "ready")
+
+    def __init__(self):
+        self.packets = deque()
+        self.published = 0
+        self.dropped = 0
+        self.merged = 0
+        self.ready = False
+
+
+class WearableHub:
+    """
+    Multiplexes many wearable streams on one asyncio event loop.
+
+    Sources push packets into a bounded queue per device; publish() never
+    blocks, so when consumers fall behind the queues fill up and the overflow
+    policy decides what is kept. A single dispatcher task drains the devices
+    round-robin and hands packets to consumers in batches of up to batch_size,
+    or whatever has arrived within flush_interval seconds.
+    """
+
+    def __init__(self, queue_size: int = 64, policy: str = DROP_OLDEST,
+                 batch_size: int = 1024, flush_interval: float = 0.05):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        if queue_size < 1 or batch_size < 1:
+            raise ValueError("queue_size and batch_size must be at least 1")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queues: Dict[Hashable, _DeviceQueue] = {}
+        self._ready = deque()          # devices with queued packets, in arrival order
+        self._pending = 0
+        self._consumers: List[Callable[[Batch], object]] = []
+        self._sources: Dict[Hashable, asyncio.Task] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+        self.delivered = 0
+        self.batches = 0
+
+    # --- Producers ---
+
+    def publish(self, device_id: Hashable, packet: Packet) -> bool:
+        """Queues one packet. Returns False if the overflow policy discarded it."""
+        queue = self._queues.get(device_id)
+        if queue is None:
+            queue = self._queues[device_id] = _DeviceQueue()
+        queue.published += 1
+
+        if len(queue.packets) >= self.queue_size:
+            if self.policy == DROP_NEWEST:
+                queue.dropped += 1
+                return False
+            if self.policy == MERGE:
+                # New dict: the publishers' packets are never modified; the count is in stats()
+                queue.packets[-1] = {**queue.packets[-1], **packet}
+                queue.merged += 1
+                return True
+            queue.packets.popleft()
+            queue.dropped += 1
+            self._pending -= 1
+
+        queue.packets.append(packet)
+        self._pending += 1
+        if not queue.ready:
+            queue.ready = True
+            self._ready.append(device_id)
+        if self._pending >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def add_source(self, device_id: Hashable, stream: AsyncIterable[Packet]) -> asyncio.Task:
+        """Consumes an async packet stream (e.g. WearableDeviceConnector.astream_data())."""
+        async def pump():
+            try:
+                async for packet in stream:
+                    self.publish(device_id, packet)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Wearable stream {device_id} failed")
+
+        task = asyncio.get_running_loop().create_task(pump())
+        self._sources[device_id] = task
+        return task
+
+    # --- Consumers ---
+
+    def subscribe(self, consumer: Callable[[Batch], object]):
+        """consumer(batch) may be a plain function or a coroutine function."""
+        self._consumers.append(consumer)
+
+    def _drain(self, limit: int) -> Batch:
+        batch = []
+        while self._ready and len(batch) < limit:
+            device_id = self._ready.popleft()
+            queue = self._queues[device_id]
+            take = min(len(queue.packets), limit - len(batch))
+            for _ in range(take):
+                batch.append((device_id, queue.packets.popleft()))
+            if queue.packets:
+                self._ready.append(device_id)  # back of the line: keeps devices fair
+            else:
+                queue.ready = False
+        self._pending -= len(batch)
+        return batch
+
+    async def _deliver(self, batch: Batch):
+        for consumer in self._consumers:
+            try:
+                result = consumer(batch)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Wearable consumer failed")
+        self.delivered += len(batch)
+        self.batches += 1
+
+    async def _dispatch(self):
+        while self._running:
+            if self._pending < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            batch = self._drain(self.batch_size)
+            if batch:
+                await self._deliver(batch)
+            else:
+                await asyncio.sleep(0)
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self, flush: bool = True):
+        """Stops all sources and the dispatcher; queued packets are delivered if flush=True."""
+        for task in self._sources.values():
+            task.cancel()
+        await asyncio.gather(*self._sources.values(), return_exceptions=True)
+        self._sources.clear()
+
+        self._running = False
+        if self._dispatcher is not None:
+            self._wakeup.set()
+            await self._dispatcher
+            self._dispatcher = None
+        while flush and self._pending:
+            await self._deliver(self._drain(self.batch_size))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def stats(self) -> dict:
+        queues = self._queues.values()
+        return {
+            "devices": len(self._queues),
+            "published": sum(q.published for q in queues),
+            "delivered": self.delivered,
+            "dropped": sum(q.dropped for q in queues),
+            "merged": sum(q.merged for q in queues),
+            "queued": self._pending,
+            "batches": self.batches,
+        }
+
+
+class SyntheticDeviceFleet:
+    """
+    Replays n_devices synthetic watches at rate_hz each, for load testing.
+    One ticker task generates every device's packets per tick with NumPy
+    (instead of one task per device), so the measured cost is the hub's.
+    """
+
+    def __init__(self, n_devices: int = 5000, rate_hz: float = 100.0, seed: Optional[int] = None):
+        self.n_devices = n_devices
+        self.rate_hz = rate_hz
+        self.device_ids = [f"WATCH-{i:05d}" for i in range(n_devices)]
+        self._rng = np.random.default_rng(seed)
+        self.max_catchup_ticks = max(1, int(rate_hz // 10))
+        self.offered = 0
+        self.skipped = 0
+
+    def _packets(self, timestamp: float, n_ticks: int) -> List[Tuple[str, Packet]]:
+        n = self.n_devices * n_ticks
+        heart_rates = self._rng.integers(60, 96, n).tolist()
+        spo2 = self._rng.integers(96, 100, n).tolist()
+        step = 1.0 / self.rate_hz
+        timestamps = [timestamp - (n_ticks - 1 - k) * step for k in range(n_ticks)]
+        return [
+            (self.device_ids[i % self.n_devices], {
+                "timestamp": timestamps[i // self.n_devices],
+                "heart_rate_bpm": hr,
+                "spo2_percent": o2,
+                "activity_status": "Walking" if hr > 85 else "Resting",
+            })
+            for i, (hr, o2) in enumerate(zip(heart_rates, spo2))
+        ]
+
+    async def run(self, hub: WearableHub, duration_s: float):
+        """Publishes packets for duration_s seconds; late ticks are caught up in bulk."""
+        start = time.monotonic()
+        interval = 1.0 / self.rate_hz
+        ticks_sent = 0
+        while True:
+            elapsed = time.monotonic() - start
+            if elapsed >= duration_s:
+                break
+            due = int(elapsed * self.rate_hz) + 1 - ticks_sent
+            if due > self.max_catchup_ticks:
+                # The loop fell too far behind: skip ticks rather than build a huge burst
+                self.skipped += (due - self.max_catchup_ticks) * self.n_devices
+                ticks_sent += due - self.max_catchup_ticks
+                due = self.max_catchup_ticks
+            if due > 0:
+                publish = hub.publish
+                for device_id, packet in self._packets(time.time(), due):
+                    publish(device_id, packet)
+                self.offered += due * self.n_devices
+                ticks_sent += due
+            await asyncio.sleep(max(0.0, (ticks_sent * interval) - (time.monotonic() - start)))
+
+
+async def run_load_test(n_devices: int = 5000, rate_hz: float = 100.0, duration_s: float = 10.0,
+                        queue_size: int = 64, policy: str = DROP_OLDEST, batch_size: int = 4096,
+                        consumer: Optional[Callable[[Batch], object]] = None) -> dict:
+    """
+    Offline ingestion benchmark: returns offered vs delivered packets per second.
+    Run with asyncio.run(run_load_test(...)).
+    """
+    hub = WearableHub(queue_size=queue_size, policy=policy, batch_size=batch_size)
+    if consumer is not None:
+        hub.subscribe(consumer)
+    fleet = SyntheticDeviceFleet(n_devices, rate_hz)
+
+    started = time.monotonic()
+    async with hub:
+        await fleet.run(hub, duration_s)
+    elapsed = time.monotonic() - started
+
+    stats = hub.stats()
+    stats.update({
+        "offered": fleet.offered,
+        "skipped": fleet.skipped,
+        "target_rate": n_devices * rate_hz,
+        "offered_rate": fleet.offered / elapsed,
+        "delivered_rate": stats["delivered"] / elapsed,
+        "seconds": elapsed,
+    })
+    return stats
+
+
+if __name__ == "__main__":
+    result = asyncio.run(run_load_test(n_devices=5000, rate_hz=100.0, duration_s=5.0))
+    print(f"Target {result['target_rate']:.0f} pkt/s | offered {result['offered_rate']:.0f} pkt/s | "
+          f"delivered {result['delivered_rate']:.0f} pkt/s | dropped {result['dropped']}")
@@ -1,6 +1,7 @@
+import asyncio
 import time
 import random
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 class WearableDeviceConnector:
     """
@@ -25,16 +26,29 @@ class WearableDeviceConnector:
             raise ConnectionError("Device not connected")
 
         while True:
-            # Simulate sensor noise and variability
-            heart_rate = random.randint(60, 95)
-            spo2 = random.randint(96, 99)
-            
-            packet = {
-                "timestamp": time.time(),
-                "heart_rate_bpm": heart_rate,
-                "spo2_percent": spo2,
-                "activity_status": "Walking" if heart_rate > 85 else "Resting"
-            }
-            
-            yield packet
-            time.sleep(1) # Simulate 1-second update interval
\ No newline at end of file
+            yield self.read_packet()
+            time.sleep(1) # Simulate 1-second update interval
+
+    async def astream_data(self, interval: float = 1.0) -> AsyncGenerator[dict, None]:
+        """
+        Non-blocking version of stream_data for the asyncio WearableHub:
+        thousands of devices can share one event loop instead of one thread each.
+        """
+        if not self.is_connected:
+            raise ConnectionError("Device not connected")
+
+        while True:
+            yield self.read_packet()
+            await asyncio.sleep(interval)
+
+    def read_packet(self) -> dict:
+        # Simulate sensor noise and variability
+        heart_rate = random.randint(60, 95)
+        spo2 = random.randint(96, 99)
+        
+        return {
+            "timestamp": time.time(),
+            "heart_rate_bpm": heart_rate,
+            "spo2_percent": spo2,
+            "activity_status": "Walking" if heart_rate > 85 else "Resting"
+        }
\ No newline at end of file
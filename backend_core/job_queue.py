@@ -0,0 +1,319 @@
+import json
+import logging
+import multiprocessing
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .models.simulation_schema import SimulationParams
+from .simulation_pipeline import simulate_patient
+
+logger = logging.getLogger("BioTwin_Kernel")
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested."""
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the bounded job queue has no free slot."""
+
+
+class JobStore:
+    """
+    SQLite-backed record of every simulation job.
+    Status, progress and results live on disk so they survive a server restart.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id      TEXT PRIMARY KEY,
+                    patient_id  TEXT NOT NULL,
+                    params      TEXT NOT NULL,
+                    status      TEXT NOT NULL,
+                    progress    REAL NOT NULL DEFAULT 0,
+                    result      TEXT,
+                    error       TEXT,
+                    created_at  REAL NOT NULL,
+                    updated_at  REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+
+    def create(self, job_id: str, patient_id: str, params: SimulationParams):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, patient_id, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, patient_id, params.model_dump_json(), QUEUED, now, now)
+            )
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def transition(self, job_id: str, from_status: str, **fields) -> bool:
+        """
+        Updates the job only if it is still in from_status (compare-and-set);
+        returns False if another thread changed its status first.
+        """
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ? AND status = ?",
+                                        (*fields.values(), job_id, from_status))
+        return cursor.rowcount == 1
+
+    def delete(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def unfinished(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Store connection of each pool process, opened on its first job
+_PROCESS_STORES: Dict[str, JobStore] = {}
+
+
+def _run_simulation_job(db_path: str, job_id: str, patient_id: str, params_json: str,
+                        cancel_event) -> Tuple[str, Optional[str]]:
+    """
+    Process-pool task: runs one job and returns (status, result JSON or error).
+    Progress is written to the store from here; the final status is left to
+    the manager thread that submitted the task.
+    """
+    store = _PROCESS_STORES.get(db_path)
+    if store is None:
+        store = _PROCESS_STORES[db_path] = JobStore(db_path)
+    last_written = [0.0]
+
+    def on_progress(fraction: float):
+        if cancel_event.is_set():
+            raise JobCancelled(job_id)
+        # Throttle writes to the store to 1% increments
+        if fraction - last_written[0] >= 0.01:
+            last_written[0] = fraction
+            store.transition(job_id, RUNNING, progress=fraction)
+
+    try:
+        params = SimulationParams.model_validate_json(params_json)
+        twin = simulate_patient(patient_id, params, progress_callback=on_progress)
+        return COMPLETED, twin.model_dump_json()
+    except JobCancelled:
+        return CANCELLED, None
+    except Exception as e:
+        return FAILED, str(e)
+
+
+class SimulationJobManager:
+    """
+    Runs simulations in a process pool fed from a bounded queue, so CPU-bound
+    runs do not compete with request handling for the GIL. One thread per
+    worker process takes jobs off the queue and does the store bookkeeping.
+    submit() returns immediately with a job ID; status, progress and results
+    are read back from the JobStore.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, max_queue: int = 100):
+        self.store = store
+        self.workers = workers
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._events_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Cancel events must be shared with the pool processes
+        self._manager = None
+
+    def start(self):
+        self._stopping.clear()
+        self._manager = multiprocessing.Manager()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"sim-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        # Jobs that were queued or running when the server stopped are resumed
+        recovered = self.store.unfinished()
+        if recovered:
+            logger.info(f"Resuming {len(recovered)} unfinished simulation jobs")
+            threading.Thread(target=self._requeue, args=(recovered,), daemon=True).start()
+
+    def _requeue(self, jobs: List[Dict]):
+        for job in jobs:
+            self.store.update(job["job_id"], status=QUEUED, progress=0.0)
+            self._register(job["job_id"])
+            # More recovered jobs than queue slots: wait for the workers, but give up on shutdown
+            while True:
+                try:
+                    self._queue.put(job["job_id"], timeout=0.5)
+                    break
+                except queue.Full:
+                    if self._stopping.is_set():
+                        return
+
+    def shutdown(self):
+        self._stopping.set()
+        with self._events_lock:
+            # Interrupted jobs stay "running" in the store and are resumed on restart
+            for event in self._cancel_events.values():
+                event.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        if self._executor is not None:
+            # Running jobs see their cancel event at the next progress report
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        self._threads.clear()
+
+    def _register(self, job_id: str):
+        event = self._manager.Event()
+        with self._events_lock:
+            self._cancel_events[job_id] = event
+
+    def submit(self, patient_id: str, params: SimulationParams) -> str:
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, patient_id, params)
+        self._register(job_id)
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            with self._events_lock:
+                self._cancel_events.pop(job_id, None)
+            self.store.delete(job_id)
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} pending jobs)")
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """Returns False if the job is unknown or already finished."""
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATES:
+            return False
+        with self._events_lock:
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        # Never started: the worker will skip it when it is dequeued
+        if self.store.transition(job_id, QUEUED, status=CANCELLED):
+            return True
+        # A worker claimed it in the meantime: the event stops the run
+        job = self.store.get(job_id)
+        return job is not None and job["status"] not in FINISHED_STATES
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        return {
+            "job_id": job["job_id"],
+            "patient_id": job["patient_id"],
+            "status": job["status"],
+            "progress_percent": round(job["progress"] * 100, 1),
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        job = self.store.get(job_id)
+        if job is None or job["result"] is None:
+            return None
+        return json.loads(job["result"])
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            try:
+                self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"Job worker crashed on {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None:
+            return
+
+        with self._events_lock:
+            cancel_event = self._cancel_events.get(job_id)
+
+        # Claim the job; fails if it was cancelled while queued
+        if not self.store.transition(job_id, QUEUED, status=RUNNING, progress=0.0):
+            with self._events_lock:
+                self._cancel_events.pop(job_id, None)
+            return
+
+        executor = self._executor
+        try:
+            if executor is None:
+                raise RuntimeError("job manager is shut down")
+            future = executor.submit(_run_simulation_job, self.store.db_path, job_id,
+                                           job["patient_id"], job["params"], cancel_event)
+            status, payload = future.result()
+        except (CancelledError, RuntimeError):
+            # Pool shut down before the job ran: it stays "running" and is resumed on restart
+            status, payload = CANCELLED, None
+        except Exception as e:
+            status, payload = FAILED, f"Worker process failed: {e}"
+        finally:
+            with self._events_lock:
+                self._cancel_events.pop(job_id, None)
+
+        if status == COMPLETED:
+            self.store.transition(job_id, RUNNING, status=COMPLETED, progress=1.0, result=payload)
+        elif self._stopping.is_set():
+            # Interrupted by shutdown, not by the user
+            return
+        elif status == CANCELLED:
+            self.store.transition(job_id, RUNNING, status=CANCELLED)
+        else:
+            logger.error(f"Simulation job {job_id} failed: {payload}")
+            self.store.transition(job_id, RUNNING, status=FAILED, error=payload)
@@ -1,13 +1,25 @@
+import json
 import logging
-from fastapi import FastAPI, HTTPException
+import os
+import re
+import time
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
 # Professional Import Structure
-from .models.patient_schema import PatientTwin, OrganStats, GeneticProfile
-from .biological_engine.cell_cycle_simulator import CellCycleMonitor
-from .biological_engine.immune_system_optimizer import ImmuneDefenseSim
-from .biological_engine.dna_transcription_sim import GeneticSequencer
+from .config_loader import settings
+from .models.patient_schema import PatientTwin, Biomarkers
+from .models.simulation_schema import SimulationParams, BatchSimulationRequest
+from .simulation_pipeline import simulate_patient, run_batch
+from .job_queue import JobStore, SimulationJobManager, JobQueueFull
+from .twin_state import TwinStateManager
+from .data_ingestion.vitals_store import VitalsStore, numeric_fields
+from .data_ingestion.wearable_hub import WearableHub
+from .data_ingestion.octree_tiles import BUILD_ID, TILE_ID
+from .predictive_ai.disease_risk_classifier import RiskClassifier
+from .predictive_ai.model_registry import ModelRegistry
 
 # Setup Logging (So you can debug like a pro)
 logging.basicConfig(level=logging.INFO)
@@ -26,10 +38,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Engines with Default Parameters
-bio_engine = CellCycleMonitor(p53_gene_status="functional")
-immune_engine = ImmuneDefenseSim(t_cell_count=1200, pathogen_load=5000)
-dna_engine = GeneticSequencer()
+# Per-patient engines (LRU cached, evicted twins are kept in the data lake)
+twin_states = TwinStateManager(
+    settings.TWIN_STATE_DIR,
+    max_entries=settings.TWIN_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TWIN_CACHE_MAX_BYTES,
+    log_capacity=settings.SIMULATION_LOG_CAPACITY,
+    audit_log_path=settings.SIMULATION_AUDIT_LOG
+)
+
+# Background job subsystem for long-running simulations
+job_manager = SimulationJobManager(
+    JobStore(settings.JOB_STORE_PATH),
+    workers=settings.JOB_WORKERS,
+    max_queue=settings.JOB_QUEUE_SIZE
+)
+
+# Wearable vitals: packets published to the hub are batched into the time-series store
+vitals_store = VitalsStore(settings.VITALS_SPILL_DIR, raw_capacity=settings.VITALS_RAW_CAPACITY)
+wearable_hub = WearableHub(queue_size=settings.WEARABLE_QUEUE_SIZE, policy=settings.WEARABLE_OVERFLOW_POLICY)
+wearable_hub.subscribe(vitals_store.aconsume)
+
+# Disease risk model: serves the registry's active version (hot-swapped on publish)
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR, poll_interval=settings.MODEL_REGISTRY_POLL_SECONDS)
+risk_classifier = RiskClassifier(
+    model_path=os.path.join(settings.MODELS_DIR, "risk_rf.pkl"),
+    registry=model_registry
+)
+
+# Octree point-cloud tiles: SCAN_TILES_DIR/<scan_id>/{tileset.json, tiles/<build_id>/<tile_id>.bin}
+_SCAN_ID = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+# Tile URLs carry the build id, so their content never changes
+TILE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@app.on_event("startup")
+async def start_background_workers():
+    job_manager.start()
+    await wearable_hub.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await wearable_hub.stop()
+    job_manager.shutdown()
+    twin_states.flush_all()
 
 @app.get("/")
 def system_status():
@@ -40,32 +91,152 @@ def run_full_simulation(patient_id: str, radiation_dose_gy: Optional[float] = 0.
     logger.info(f"Initiating Simulation for Patient: {patient_id}")
 
     try:
-        # 1. Run Cellular Simulation (Stochastic Model)
-        mitosis_results = bio_engine.simulate_mitosis(time_steps=50, cellular_stress=0.75)
-        
-        # 2. Run Immune Simulation
-        battle_results = immune_engine.run_battle_simulation(efficiency_rate=0.85)
-
-        # 3. Construct the Professional Object
-        # In a real app, this data would come from the CSV readers
-        twin = PatientTwin(
-            id=patient_id,
-            age=34,
-            biological_sex="Female",
-            organs={
-                "Heart": OrganStats(name="Heart", health_index=88.5, blood_perfusion=98.0, cancer_risk_score=0.1),
-                "Liver": OrganStats(name="Liver", health_index=mitosis_results['cancer_risk_score'], blood_perfusion=92.0, cancer_risk_score=mitosis_results['cancer_risk_score'])
-            },
-            genetics=GeneticProfile(
-                dna_snippet="ATCG...",
-                detected_mutations=["BRCA1_Variant_Unknown"],
-                epigenetic_age=36.2
-            ),
-            simulation_log=mitosis_results['log'][-5:] # Keep last 5 logs to save space
-        )
+        params = SimulationParams(radiation_dose_gy=radiation_dose_gy or 0.0)
+        with twin_states.session(patient_id) as engines:
+            twin = simulate_patient(patient_id, params, engines.bio, engines.immune, engines.dna)
         
         return twin
 
     except Exception as e:
         logger.error(f"Simulation Failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/v1/batch/simulate")
+def run_batch_simulation(request: BatchSimulationRequest):
+    """
+    Simulates many patients in parallel worker processes.
+    Streams one JSON object per line (NDJSON) as each patient finishes.
+    """
+    logger.info(f"Initiating Batch Simulation for {len(request.items)} patients")
+
+    items = [(item.patient_id, item.params) for item in request.items]
+    results = run_batch(
+        items,
+        max_workers=request.max_workers or settings.BATCH_MAX_WORKERS,
+        chunk_size=request.chunk_size or settings.BATCH_CHUNK_SIZE
+    )
+
+    def ndjson_stream():
+        for result in results:
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+@app.post("/api/v1/jobs/simulate/{patient_id}", status_code=202)
+def submit_simulation_job(patient_id: str, params: Optional[SimulationParams] = None):
+    """Queues a simulation and returns its job ID immediately."""
+    try:
+        job_id = job_manager.submit(patient_id, params or SimulationParams())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    logger.info(f"Queued Simulation Job {job_id} for Patient: {patient_id}")
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/api/v1/jobs/{job_id}")
+def get_simulation_job(job_id: str):
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/v1/jobs/{job_id}/result", response_model=PatientTwin)
+def get_simulation_job_result(job_id: str):
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job_manager.result(job_id)
+
+@app.delete("/api/v1/jobs/{job_id}")
+def cancel_simulation_job(job_id: str):
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job not found or already finished")
+    return {"job_id": job_id, "status": "cancelling"}
+
+@app.post("/api/v1/risk/predict")
+def predict_disease_risk(biomarkers: Biomarkers):
+    """Disease probabilities from the active risk model (heuristics if none is trained)."""
+    return {
+        "model_version": model_registry.active_version(risk_classifier.model_name),
+        "probabilities": risk_classifier.predict_disease_prob(biomarkers.to_vector()),
+    }
+
+@app.post("/api/v1/vitals/{device_id}", status_code=202)
+async def ingest_vitals(device_id: str, packet: dict):
+    """
+    Accepts one wearable packet ({"timestamp": unix seconds, <field>: number, ...});
+    numeric fields become series readable from GET /api/v1/vitals/{device_id}/{field}.
+    Fields older than the newest stored sample of their series are dropped and
+    listed in "late_fields"; a packet with nothing but late fields is not accepted.
+    Async so publish() runs on the event loop that owns the hub.
+    """
+    if not isinstance(packet.get("timestamp"), (int, float)) or isinstance(packet.get("timestamp"), bool):
+        raise HTTPException(status_code=422, detail="Packet needs a numeric 'timestamp'")
+    late = vitals_store.late_fields(device_id, packet)
+    if late and len(late) == len(list(numeric_fields(packet))):
+        accepted = False
+    else:
+        accepted = wearable_hub.publish(device_id, packet)
+    return {"device_id": device_id, "accepted": accepted, "late_fields": late}
+
+@app.get("/api/v1/vitals/{device_id}/{field}")
+def query_vitals(device_id: str, field: str, start: Optional[float] = None, end: Optional[float] = None,
+                 max_points: int = 2000):
+    """
+    Vitals for [start, end) (unix seconds; default: the last 24 hours).
+    Long ranges are answered from 1 s / 1 min / 1 h rollups.
+    """
+    end = time.time() if end is None else end
+    start = end - 86400 if start is None else start
+    series = vitals_store.query(device_id, field, start, end, max_points=max_points)
+    if series is None:
+        raise HTTPException(status_code=404, detail="Unknown vitals series")
+    return {key: value if isinstance(value, (str, int)) else value.tolist() for key, value in series.items()}
+
+def _scan_file(scan_id: str, *parts: str) -> str:
+    if not _SCAN_ID.match(scan_id) or scan_id in (".", ".."):
+        raise HTTPException(status_code=400, detail="Invalid scan ID")
+    path = os.path.join(settings.SCAN_TILES_DIR, scan_id, *parts)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return path
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: "*", or any listed tag with W/ ignored."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+def _cached_file_response(path: str, media_type: str, cache_control: str,
+                          if_none_match: Optional[str]) -> Response:
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    with open(path, "rb") as f:
+        return Response(content=f.read(), media_type=media_type, headers=headers)
+
+@app.get("/api/v1/scans/{scan_id}/tileset")
+def get_scan_tileset(scan_id: str, if_none_match: Optional[str] = Header(None)):
+    """Octree index: the viewer loads the root tile first, then refines by depth."""
+    path = _scan_file(scan_id, "tileset.json")
+    return _cached_file_response(path, "application/json", "no-cache", if_none_match)
+
+@app.get("/api/v1/scans/{scan_id}/tiles/{build_id}/{tile_id}")
+def get_scan_tile(scan_id: str, build_id: str, tile_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    One tile as raw interleaved point records (float32 xyz + uint8 rgba, 16 bytes each).
+    build_id comes from the tileset; tiles of a replaced build return 404.
+    """
+    if not BUILD_ID.match(build_id) or not TILE_ID.match(tile_id):
+        raise HTTPException(status_code=400, detail="Invalid tile ID")
+    path = _scan_file(scan_id, "tiles", build_id, tile_id + ".bin")
+    return _cached_file_response(path, "application/octet-stream", TILE_CACHE_CONTROL, if_none_match)
@@ -19,3 +19,15 @@ class PatientTwin(BaseModel):
     organs: Dict[str, OrganStats]
     genetics: GeneticProfile
     simulation_log: List[str] = []
+
+class Biomarkers(BaseModel):
+    """Input vector of the disease risk classifier."""
+    age: float
+    bmi: float
+    systolic_bp: float
+    glucose: float
+    cholesterol: float
+    smoker: bool = False
+
+    def to_vector(self) -> List[float]:
+        return [self.age, self.bmi, self.systolic_bp, self.glucose, self.cholesterol, float(self.smoker)]
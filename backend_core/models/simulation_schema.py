@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class SimulationParams(BaseModel):
+    """Tunable inputs for one run of the cell-cycle / immune / genetics pipeline."""
+    time_steps: int = Field(50, gt=0)
+    cellular_stress: float = 0.75
+    efficiency_rate: float = 0.85
+    radiation_dose_gy: float = 0.0
+    p53_gene_status: str = "functional"
+    t_cell_count: int = 1200
+    pathogen_load: int = 5000
+    dna_sequence: Optional[str] = None
+
+class BatchSimulationItem(BaseModel):
+    patient_id: str
+    params: SimulationParams = SimulationParams()
+
+class BatchSimulationRequest(BaseModel):
+    items: List[BatchSimulationItem]
+    max_workers: Optional[int] = Field(None, gt=0, description="Defaults to the number of CPU cores")
+    chunk_size: Optional[int] = Field(None, gt=0, description="Patients sent to a worker per task")
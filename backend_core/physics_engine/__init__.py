@@ -1,5 +1,7 @@
 from .electron_beam_physics import ElectronBeamSolver
+from .dose_grid import DoseGrid, Fractionation
 from .fluid_dynamics_blood import BloodFlowSimulator
+from .vascular_network import VascularNetwork
 from .soft_body_deformation import TissueDeformationSim
 from .radiation_decay_calc import IsotopeDecayCalculator
 
@@ -1,5 +1,7 @@
 import math
 
+from .dose_grid import DoseGrid
+
 class ElectronBeamSolver:
     """
     Simulates Ultra-High Dose Rate (FLASH) Radiotherapy.
@@ -52,4 +54,14 @@ class ElectronBeamSolver:
             "tumor_ablation_percent": round(tumor_reduction, 2),
             "healthy_tissue_damage_percent": round(collateral_damage, 2),
             "therapeutic_ratio": round(tumor_reduction / collateral_damage, 2) if collateral_damage > 0 else 100
-        }
\ No newline at end of file
+        }
+
+    def evaluate_dose_grid(self, dose, labels, structures: dict, oxygen=None, schedules=None,
+                           spacing_mm=(1.0, 1.0, 1.0), workers=None) -> list:
+        """
+        Voxel-wise run_flash_simulation over a 3D plan: one report per
+        fractionation schedule with DVHs, cell kill and therapeutic ratios
+        per structure (see dose_grid.DoseGrid).
+        """
+        grid = DoseGrid(dose, labels, structures, oxygen=oxygen, spacing_mm=spacing_mm, solver=self)
+        return grid.evaluate(schedules, workers=workers)
\ No newline at end of file
@@ -1,5 +1,7 @@
 import math
 
+from .vascular_network import VascularNetwork
+
 class BloodFlowSimulator:
     """
     Simulates blood flow physics using Poiseuille's Law.
@@ -46,6 +48,14 @@ class BloodFlowSimulator:
             "flow_reduction_percent": round((1 - restricted_flow/healthy_flow) * 100, 2)
         }
 
+    def build_network(self, n_nodes, segments, radius_mm, length_cm, fixed_pressures, inflow_ml_min=None):
+        """
+        Arterial tree of many segments with this simulator's blood viscosity.
+        See vascular_network.VascularNetwork for solving and blockage sweeps.
+        """
+        return VascularNetwork(n_nodes, segments, radius_mm, length_cm, fixed_pressures,
+                               inflow_ml_min=inflow_ml_min, viscosity=self.viscosity)
+
 
 
 """ using Poiseuille's Law to calculate the blood flow""" 
\ No newline at end of file
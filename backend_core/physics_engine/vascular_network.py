@@ -0,0 +1,281 @@
+"""
+Poiseuille flow through a network of vessel segments.
+
+Every segment (u, v) is a conductance g = pi r^4 / (8 mu L). Nodal pressures
+solve the weighted graph Laplacian L = B^T diag(g) B for the nodes that are
+not held at a fixed pressure:
+
+    L_FF p_F = q_F - L_FD p_D
+
+L_FF is factorized once (sparse LU). Changing the radius of k segments is a
+rank-k update of L, so the new solution follows from the old factorization
+through the Woodbury identity (k extra triangular solves and a k x k system)
+instead of a new factorization.
+"""
+
+import math
+from typing import Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+MMHG_TO_PA = 133.322
+M3S_TO_ML_MIN = 60 * 1_000_000
+
+# Above this many changed segments a fresh factorization is cheaper than Woodbury
+_MAX_LOW_RANK = 64
+
+
+class VascularNetwork:
+    """
+    segments: (E, 2) node ids; radius_mm, length_cm: per segment.
+    fixed_pressures: {node: mmHg} boundary nodes (inlets / outlets).
+    inflow_ml_min: optional {node: mL/min} injected at free nodes.
+    """
+
+    def __init__(self, n_nodes: int, segments: np.ndarray, radius_mm: Sequence[float], length_cm: Sequence[float],
+                 fixed_pressures: Mapping[int, float], inflow_ml_min: Optional[Mapping[int, float]] = None,
+                 viscosity: float = 0.0035):
+        self.n_nodes = n_nodes
+        self.segments = np.asarray(segments, dtype=np.int64).reshape(-1, 2)
+        self.radius_mm = np.asarray(radius_mm, dtype=np.float64)
+        self.length_cm = np.asarray(length_cm, dtype=np.float64)
+        self.viscosity = viscosity
+        if len(self.radius_mm) != len(self.segments) or len(self.length_cm) != len(self.segments):
+            raise ValueError("radius_mm and length_cm need one value per segment")
+        if not fixed_pressures:
+            raise ValueError("At least one node needs a fixed pressure")
+        if self.segments.size and (self.segments.min() < 0 or self.segments.max() >= n_nodes):
+            raise ValueError("Segment references a node outside 0..n_nodes-1")
+
+        self.fixed = np.array(sorted(fixed_pressures), dtype=np.int64)
+        self.fixed_pa = np.array([fixed_pressures[n] for n in self.fixed], dtype=np.float64) * MMHG_TO_PA
+        is_fixed = np.zeros(n_nodes, dtype=bool)
+        is_fixed[self.fixed] = True
+        self.free = np.flatnonzero(~is_fixed)
+        # node -> row in the free / fixed blocks (-1 if in the other block)
+        self._free_row = np.full(n_nodes, -1, dtype=np.int64)
+        self._free_row[self.free] = np.arange(len(self.free))
+        self._fixed_row = np.full(n_nodes, -1, dtype=np.int64)
+        self._fixed_row[self.fixed] = np.arange(len(self.fixed))
+
+        self.inflow = np.zeros(n_nodes)
+        for node, q in (inflow_ml_min or {}).items():
+            self.inflow[node] = q / M3S_TO_ML_MIN
+
+        self.conductance = self._conductance(self.radius_mm)
+        self._factorize()
+
+    @classmethod
+    def murray_tree(cls, generations: int, root_radius_mm: float = 2.0, root_length_cm: float = 5.0,
+                    inlet_mmhg: float = 100.0, outlet_mmhg: float = 0.0, viscosity: float = 0.0035,
+                    seed: Optional[int] = 0) -> "VascularNetwork":
+        """
+        Synthetic bifurcating arterial tree (2^generations - 1 segments):
+        daughter radii follow Murray's law (r^3 = r1^3 + r2^3) with a random
+        split ratio, lengths shrink with radius; leaves drain at outlet_mmhg.
+        """
+        rng = np.random.default_rng(seed)
+        # Node 0 is the inlet; segment i ends at node i + 1, segments 2i+1, 2i+2 branch from it
+        n_segments = 2 ** generations - 1
+        parent_node = np.zeros(n_segments, dtype=np.int64)
+        radius = np.empty(n_segments)
+        radius[0] = root_radius_mm
+        for i in range(1, n_segments):
+            parent_node[i] = (i - 1) // 2 + 1
+        for first in range(1, n_segments, 2):
+            share = rng.uniform(0.3, 0.7)
+            r = radius[(first - 1) // 2]
+            radius[first] = r * share ** (1 / 3)
+            radius[first + 1] = r * (1 - share) ** (1 / 3)
+        length = root_length_cm * radius / root_radius_mm
+        segments = np.column_stack([parent_node, np.arange(n_segments) + 1])
+        leaves = np.arange(n_segments // 2, n_segments) + 1
+        fixed = {0: inlet_mmhg, **{int(n): outlet_mmhg for n in leaves}}
+        return cls(n_segments + 1, segments, radius, length, fixed, viscosity=viscosity)
+
+    # --- Assembly ---
+
+    def _conductance(self, radius_mm: np.ndarray) -> np.ndarray:
+        radius_m = radius_mm / 1000.0
+        return math.pi * radius_m ** 4 / (8 * self.viscosity * (self.length_cm / 100.0))
+
+    def _laplacian(self, conductance: np.ndarray) -> sp.csc_matrix:
+        u, v = self.segments[:, 0], self.segments[:, 1]
+        rows = np.concatenate([u, v, u, v])
+        cols = np.concatenate([u, v, v, u])
+        values = np.concatenate([conductance, conductance, -conductance, -conductance])
+        return sp.csc_matrix((values, (rows, cols)), shape=(self.n_nodes, self.n_nodes))
+
+    def _factorize(self):
+        laplacian = self._laplacian(self.conductance)
+        self._a_ff = laplacian[self.free][:, self.free].tocsc()
+        self._a_fd = laplacian[self.free][:, self.fixed].tocsc()
+        try:
+            self._lu = splu(self._a_ff)
+        except RuntimeError as exc:
+            raise ValueError("Network has nodes with no path to a fixed-pressure node") from exc
+        self._rhs = self.inflow[self.free] - self._a_fd @ self.fixed_pa
+        self._p_free = self._lu.solve(self._rhs)
+
+    # --- Results ---
+
+    def _pressures(self, p_free: np.ndarray) -> np.ndarray:
+        pressures = np.empty(p_free.shape[:-1] + (self.n_nodes,))
+        pressures[..., self.free] = p_free
+        pressures[..., self.fixed] = self.fixed_pa
+        return pressures
+
+    def _result(self, p_free: np.ndarray, conductance: np.ndarray) -> dict:
+        pressures = self._pressures(p_free)
+        drop = pressures[..., self.segments[:, 0]] - pressures[..., self.segments[:, 1]]
+        return {
+            "pressure_mmhg": pressures / MMHG_TO_PA,
+            # Positive flow runs from segments[:, 0] to segments[:, 1]
+            "flow_ml_min": conductance * drop * M3S_TO_ML_MIN,
+        }
+
+    def solve(self) -> dict:
+        """Nodal pressures (mmHg) and segment flows (mL/min) of the current network."""
+        return self._result(self._p_free, self.conductance)
+
+    # --- Local changes ---
+
+    def _check_blockages(self, blockages: Mapping[int, float]):
+        for segment, percent in blockages.items():
+            if not 0 <= segment < len(self.segments):
+                raise ValueError(f"Unknown segment {segment}")
+            if not 0 <= percent <= 100:
+                raise ValueError(f"Blockage of segment {segment} must be 0-100 %, got {percent}")
+
+    def _blocked_radius(self, blockages: Mapping[int, float]) -> np.ndarray:
+        radius = self.radius_mm.copy()
+        for segment, percent in blockages.items():
+            radius[segment] = self.radius_mm[segment] * (1 - percent / 100.0)
+        return radius
+
+    def _incidence_columns(self, segments: np.ndarray):
+        """Sparse free-block columns C and fixed-block coefficients D of each segment's incidence vector."""
+        u, v = self.segments[segments, 0], self.segments[segments, 1]
+        k = np.arange(len(segments))
+        blocks = []
+        for rows_of, n_rows in ((self._free_row, len(self.free)), (self._fixed_row, len(self.fixed))):
+            rows, cols, values = [], [], []
+            for node, sign in ((u, 1.0), (v, -1.0)):
+                row = rows_of[node]
+                rows.append(row[row >= 0])
+                cols.append(k[row >= 0])
+                values.append(np.full(int((row >= 0).sum()), sign))
+            blocks.append(sp.csc_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                                        shape=(n_rows, len(segments))))
+        return blocks[0], blocks[1]
+
+    def _low_rank_solve(self, delta: np.ndarray, c: np.ndarray, d, z: np.ndarray) -> np.ndarray:
+        """
+        Woodbury update of the free pressures for L' = L + C diag(delta) C^T:
+        the right-hand side changes through L_FD, the matrix through L_FF.
+        """
+        x0 = self._p_free - z @ (delta * (d.T @ self.fixed_pa))
+        capacitance = np.eye(len(delta)) + (c.T @ z) * delta
+        try:
+            correction = np.linalg.solve(capacitance, c.T @ x0)
+        except np.linalg.LinAlgError as exc:
+            raise ValueError("Blockage disconnects part of the network from every fixed-pressure node") from exc
+        return x0 - z @ (delta * correction)
+
+    def with_blockages(self, blockages: Mapping[int, float]) -> dict:
+        """
+        Solves the network with the given segments narrowed by percent of
+        their radius (as in BloodFlowSimulator.simulate_arterial_blockage),
+        reusing the factorization; the network itself is not modified.
+        """
+        self._check_blockages(blockages)
+        segments = np.array(sorted(blockages), dtype=np.int64)
+        conductance = self._conductance(self._blocked_radius(blockages))
+        if len(segments) > _MAX_LOW_RANK:
+            changed = VascularNetwork.__new__(VascularNetwork)
+            changed.__dict__.update(self.__dict__)
+            changed.conductance = conductance
+            changed._factorize()
+            return changed.solve()
+        if not len(segments):
+            return self.solve()
+        delta = conductance[segments] - self.conductance[segments]
+        c, d = self._incidence_columns(segments)
+        c = c.toarray()
+        z = self._lu.solve(c)
+        return self._result(self._low_rank_solve(delta, c, d, z), conductance)
+
+    def apply_blockages(self, blockages: Mapping[int, float]):
+        """Makes blockages permanent (e.g. a diagnosed stenosis) and refactorizes."""
+        self._check_blockages(blockages)
+        self.radius_mm = self._blocked_radius(blockages)
+        self.conductance = self._conductance(self.radius_mm)
+        self._factorize()
+
+    def sweep_blockages(self, scenarios: Iterable[Mapping[int, float]], block_size: int = 256) -> dict:
+        """
+        Evaluates many blockage scenarios ({segment: percent} each) in one call.
+        Every segment involved costs two triangular solves against the shared
+        factorization, done block_size columns at a time so scratch memory is
+        n_free x block_size: the first pass collects each scenario's small
+        Woodbury system, the second applies the solved corrections.
+        Returns (n_scenarios, n_nodes) pressures and (n_scenarios, n_segments) flows.
+        """
+        scenarios = [dict(s) for s in scenarios]
+        for blockages in scenarios:
+            self._check_blockages(blockages)
+        involved = np.array(sorted({segment for s in scenarios for segment in s}), dtype=np.int64)
+        c_all, d_all = self._incidence_columns(involved)
+        column = np.full(len(self.segments), -1, dtype=np.int64)
+        column[involved] = np.arange(len(involved))
+
+        # Per scenario: involved-column ids, conductance change and c^T L^-1 c (filled block by block)
+        flows_conductance = np.empty((len(scenarios), len(self.segments)))
+        cols, deltas, coupling, c_rows = [], [], [], []
+        for i, blockages in enumerate(scenarios):
+            conductance = self._conductance(self._blocked_radius(blockages))
+            flows_conductance[i] = conductance
+            segments = np.array(sorted(blockages), dtype=np.int64)
+            cols.append(column[segments])
+            deltas.append(conductance[segments] - self.conductance[segments])
+            coupling.append(np.zeros((len(segments), len(segments))))
+            c_rows.append(c_all[:, column[segments]].T.tocsr())
+
+        starts = range(0, len(involved), block_size)
+        for b0 in starts:
+            z = self._lu.solve(c_all[:, b0:b0 + block_size].toarray())
+            for i in range(len(scenarios)):
+                inside = np.flatnonzero((cols[i] >= b0) & (cols[i] < b0 + block_size))
+                if len(inside):
+                    coupling[i][:, inside] = c_rows[i] @ z[:, cols[i][inside] - b0]
+
+        # p' = p - Z w, with w = delta * (d^T p_D + correction) per scenario
+        fixed_term = d_all.T @ self.fixed_pa
+        c_p = c_all.T @ self._p_free
+        w_rows, w_cols, w_values = [], [], []
+        for i in range(len(scenarios)):
+            if not len(cols[i]):
+                continue
+            a = deltas[i] * fixed_term[cols[i]]
+            try:
+                correction = np.linalg.solve(np.eye(len(a)) + coupling[i] * deltas[i],
+                                             c_p[cols[i]] - coupling[i] @ a)
+            except np.linalg.LinAlgError as exc:
+                raise ValueError("Blockage disconnects part of the network from every fixed-pressure node") from exc
+            w_rows.append(np.full(len(a), i))
+            w_cols.append(cols[i])
+            w_values.append(a + deltas[i] * correction)
+        p_free = np.repeat(self._p_free[None, :], len(scenarios), axis=0)
+        if w_rows:
+            weights = sp.csc_matrix((np.concatenate(w_values), (np.concatenate(w_rows), np.concatenate(w_cols))),
+                                    shape=(len(scenarios), len(involved)))
+            for b0 in starts:
+                z = self._lu.solve(c_all[:, b0:b0 + block_size].toarray())
+                p_free -= weights[:, b0:b0 + block_size] @ z.T
+
+        result = self._result(p_free, flows_conductance)
+        baseline = self.solve()["flow_ml_min"]
+        result["baseline_flow_ml_min"] = baseline
+        return result
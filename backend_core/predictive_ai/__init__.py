@@ -1,4 +1,5 @@
-from .disease_risk_classifier import disease_risk_classifier
-from .anomaly_detector import ClinicalAnomalyDetector
-from .longevity_predictor import LifeExpectancyModel
-from .model_trainer import AI_Trainer
\ No newline at end of file
+from .disease_risk_classifier import RiskClassifier, CompiledForest
+from .anomaly_detector import ClinicalAnomalyDetector, StreamingAnomalyDetector
+from .longevity_estimator import LifeExpectancyModel, CohortLifespanSummary
+from .model_trainer import AI_Trainer
+from .model_registry import ModelRegistry, ModelVersion
\ No newline at end of file
@@ -1,3 +1,7 @@
+import math
+import warnings
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
 import numpy as np
 
 class ClinicalAnomalyDetector:
@@ -38,4 +42,227 @@ class ClinicalAnomalyDetector:
                         "message": f"Value is {z_score:.1f} standard deviations from norm."
                     })
                     
-        return anomalies
\ No newline at end of file
+        return anomalies
+
+
+class StreamingAnomalyDetector:
+    """
+    Online anomaly scoring against each patient's own baseline.
+
+    Every (patient, marker) series keeps running statistics in NumPy arrays:
+    Welford mean/variance, an EWMA mean/variance and, if robust_window > 0,
+    a fixed ring buffer for median/MAD scoring. Memory per series is constant
+    and every sample is scored in O(1) without revisiting history.
+    Until a series has `warmup` samples it is scored against the population
+    norms (when the marker has one), like ClinicalAnomalyDetector.
+    """
+
+    METHODS = ("welford", "ewma", "robust")
+
+    def __init__(self, method: str = "ewma", alpha: float = 0.05, z_threshold: float = 3.0,
+                 critical_threshold: float = 4.5, warmup: int = 10, robust_window: int = 0,
+                 norms: Optional[Dict[str, dict]] = None, initial_capacity: int = 1024):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown method {method!r}, expected one of {self.METHODS}")
+        if method == "robust" and robust_window < 3:
+            raise ValueError("The robust method needs robust_window >= 3")
+        if initial_capacity < 1:
+            raise ValueError("initial_capacity must be at least 1")
+        self.method = method
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.critical_threshold = critical_threshold
+        self.warmup = max(2, warmup)
+        self.robust_window = robust_window
+        self.norms = norms if norms is not None else ClinicalAnomalyDetector().norms
+
+        self._slots: Dict[Tuple[Hashable, str], int] = {}
+        self._series: List[Tuple[Hashable, str]] = []
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity: int):
+        """Creates (or doubles) the per-series state arrays."""
+        size = len(self._series)
+
+        def grow(name: str, fill: float, shape: tuple = ()):
+            array = np.full((capacity,) + shape, fill, dtype=np.float64)
+            if hasattr(self, name):
+                array[:size] = getattr(self, name)[:size]
+            setattr(self, name, array)
+
+        for name in ("_count", "_mean", "_m2", "_ewm_mean", "_ewm_var"):
+            grow(name, 0.0)
+        # Population fallback per series (NaN when the marker has no norm)
+        grow("_norm_mean", np.nan)
+        grow("_norm_std", np.nan)
+        if self.robust_window:
+            grow("_window", np.nan, (self.robust_window,))
+
+    def _slot_ids(self, patient_ids: Sequence[Hashable], markers: Sequence[str]) -> np.ndarray:
+        slots = np.empty(len(markers), dtype=np.int64)
+        for i, key in enumerate(zip(patient_ids, markers)):
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = len(self._series)
+                if slot == len(self._count):
+                    self._allocate(2 * slot)
+                self._slots[key] = slot
+                self._series.append(key)
+                norm = self.norms.get(key[1])
+                if norm is not None:
+                    self._norm_mean[slot] = norm["mean"]
+                    self._norm_std[slot] = norm["std"]
+            slots[i] = slot
+        return slots
+
+    def _baseline(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(center, scale) per slot from the configured method, before the new sample."""
+        count = self._count[slots]
+        if self.method == "welford":
+            center = self._mean[slots]
+            scale = np.sqrt(self._m2[slots] / np.maximum(count - 1, 1))
+        elif self.method == "ewma":
+            center = self._ewm_mean[slots]
+            scale = np.sqrt(self._ewm_var[slots])
+        else:
+            window = self._window[slots]
+            with np.errstate(all="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                center = np.nanmedian(window, axis=1)
+                # 1.4826 * MAD estimates the standard deviation for normal data
+                scale = 1.4826 * np.nanmedian(np.abs(window - center[:, None]), axis=1)
+
+        # Constant series: avoid dividing by zero
+        scale = np.maximum(scale, np.maximum(1e-3 * np.abs(center), 1e-9))
+        warming_up = count < self.warmup
+        center = np.where(warming_up, self._norm_mean[slots], center)
+        scale = np.where(warming_up, self._norm_std[slots], scale)
+        return center, scale
+
+    def _apply(self, slots: np.ndarray, values: np.ndarray):
+        """Folds one sample per slot (slots must be unique) into the running statistics."""
+        count = self._count[slots] + 1
+        delta = values - self._mean[slots]
+        mean = self._mean[slots] + delta / count
+        self._m2[slots] += delta * (values - mean)
+        self._mean[slots] = mean
+
+        first = count == 1
+        ewm_delta = values - self._ewm_mean[slots]
+        self._ewm_var[slots] = np.where(first, 0.0, (1 - self.alpha) * (self._ewm_var[slots] + self.alpha * ewm_delta ** 2))
+        self._ewm_mean[slots] = np.where(first, values, self._ewm_mean[slots] + self.alpha * ewm_delta)
+
+        if self.robust_window:
+            position = (self._count[slots] % self.robust_window).astype(np.int64)
+            self._window[slots, position] = values
+        self._count[slots] = count
+
+    def update_many(self, patient_ids: Sequence[Hashable], markers: Sequence[str],
+                    values: Sequence[float]) -> np.ndarray:
+        """
+        Scores and then absorbs a batch of samples (e.g. one tick from every
+        live stream). Returns the z-score of each sample against its series
+        baseline before the sample arrived (NaN while there is no baseline).
+        Several samples of one series in a batch are applied in order.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        slots = self._slot_ids(patient_ids, markers)
+        z_scores = np.full(len(values), np.nan)
+
+        # Split repeated series into rounds so each round has unique slots
+        order = np.argsort(slots, kind="stable")
+        sorted_slots = slots[order]
+        group_start = np.concatenate(([0], np.flatnonzero(np.diff(sorted_slots)) + 1))
+        rank = np.empty(len(slots), dtype=np.int64)
+        rank[order] = np.arange(len(slots)) - np.repeat(group_start, np.diff(np.append(group_start, len(slots))))
+
+        valid = ~np.isnan(values)
+        for r in range(int(rank.max()) + 1 if len(rank) else 0):
+            batch = np.flatnonzero((rank == r) & valid)
+            center, scale = self._baseline(slots[batch])
+            z_scores[batch] = (values[batch] - center) / scale
+            self._apply(slots[batch], values[batch])
+        return z_scores
+
+    def update(self, patient_id: Hashable, sample: dict) -> list:
+        """
+        Scores one packet or panel ({marker: value}) for a patient and returns
+        anomalies in the same format as ClinicalAnomalyDetector.detect_outliers.
+        Non-numeric fields (e.g. activity_status) and timestamps are ignored.
+        """
+        markers = [k for k, v in sample.items()
+                   if k != "timestamp" and isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if not markers:
+            return []
+        values = [float(sample[k]) for k in markers]
+        z_scores = self.update_many([patient_id] * len(markers), markers, values)
+        return self._anomalies(patient_id, markers, values, z_scores)
+
+    def monitor(self, patient_id: Hashable, stream):
+        """Wraps a packet stream (e.g. WearableDeviceConnector.stream_data) and yields anomalies."""
+        for packet in stream:
+            for anomaly in self.update(patient_id, packet):
+                yield anomaly
+
+    def _anomalies(self, patient_id, markers, values, z_scores) -> list:
+        anomalies = []
+        for marker, value, z_score in zip(markers, values, z_scores.tolist()):
+            if math.isnan(z_score) or abs(z_score) <= self.z_threshold:
+                continue
+            severity = "CRITICAL" if abs(z_score) > self.critical_threshold else "WARNING"
+            anomalies.append({
+                "patient_id": patient_id,
+                "marker": marker,
+                "value": value,
+                "z_score": round(z_score, 2),
+                "severity": severity,
+                "message": f"Value is {z_score:.1f} standard deviations from this patient's baseline."
+            })
+        return anomalies
+
+    def score_cohort(self, patient_ids: Sequence[Hashable], markers: Sequence[str],
+                     values: np.ndarray) -> np.ndarray:
+        """
+        Vectorized batch mode: z-scores for a patients x markers matrix in one
+        call, without updating any state. Cells with a warmed-up per-patient
+        baseline are scored against it; all others against the cohort's own
+        robust column statistics (median / MAD).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        n_patients, n_markers = values.shape
+        patient_grid = np.repeat(np.asarray(patient_ids, dtype=object), n_markers)
+        marker_grid = np.tile(np.asarray(markers, dtype=object), n_patients)
+
+        slots = np.array([self._slots.get(key, -1) for key in zip(patient_grid, marker_grid)], dtype=np.int64)
+        known = slots >= 0
+        known[known] = self._count[slots[known]] >= self.warmup
+
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            column_median = np.nanmedian(values, axis=0)
+            column_scale = 1.4826 * np.nanmedian(np.abs(values - column_median), axis=0)
+        column_scale = np.maximum(column_scale, np.maximum(1e-3 * np.abs(column_median), 1e-9))
+        z_scores = (values - column_median) / column_scale
+
+        if known.any():
+            flat = z_scores.ravel()
+            center, scale = self._baseline(slots[known])
+            flat[known] = (values.ravel()[known] - center) / scale
+            z_scores = flat.reshape(n_patients, n_markers)
+        return z_scores
+
+    def baseline(self, patient_id: Hashable, marker: str) -> Optional[dict]:
+        slot = self._slots.get((patient_id, marker))
+        if slot is None:
+            return None
+        count = int(self._count[slot])
+        return {
+            "count": count,
+            "mean": float(self._mean[slot]),
+            "std": float(math.sqrt(self._m2[slot] / (count - 1))) if count > 1 else 0.0,
+            "ewma": float(self._ewm_mean[slot]),
+            "ewm_std": float(math.sqrt(self._ewm_var[slot])),
+        }
+
+    def __len__(self) -> int:
+        return len(self._series)
@@ -1,8 +1,127 @@
 import numpy as np
 import os
 import pickle
+from typing import Optional, Sequence
 from sklearn.ensemble import RandomForestClassifier
 
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous node arrays.
+
+    Nodes of all trees are stored back to back, renumbered breadth-first so
+    that the right child of node i is left[i] + 1; one step of a traversal is
+    then node = left[node] + (x > threshold[node]). Leaves point to themselves
+    with an infinite threshold, so a batch walks every tree in lock-step for
+    max_depth steps without branching on leaf status. values[c, leaf] is the
+    probability of class c at that leaf.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "values", "roots")
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 values: np.ndarray, roots: np.ndarray, max_depth: int, classes: np.ndarray,
+                 n_features: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.values = values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes = classes
+        self.n_features = n_features
+
+    @classmethod
+    def from_sklearn(cls, forest: RandomForestClassifier) -> "CompiledForest":
+        features, thresholds, lefts, values, roots = [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            # Breadth-first order puts every pair of siblings next to each other
+            order = [0]
+            for node in order:
+                if tree.children_left[node] != -1:
+                    order += [tree.children_left[node], tree.children_right[node]]
+            order = np.array(order)
+            new_id = np.empty(len(order), dtype=np.int64)
+            new_id[order] = np.arange(len(order)) + offset
+
+            leaf = tree.children_left[order] == -1
+            features.append(np.where(leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold[order]))
+            lefts.append(np.where(leaf, new_id[order], new_id[np.maximum(tree.children_left[order], 0)]))
+            counts = tree.value[order, 0, :]
+            values.append(counts / counts.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += len(order)
+            max_depth = max(max_depth, tree.max_depth)
+
+        # sklearn compares float32 inputs with float64 thresholds; rounding each
+        # threshold down to the nearest float32 gives the same decisions in float32
+        threshold = np.concatenate(thresholds)
+        threshold32 = threshold.astype(np.float32)
+        above = threshold32.astype(np.float64) > threshold
+        threshold32[above] = np.nextafter(threshold32[above], np.float32(-np.inf))
+        return cls(np.concatenate(features).astype(np.int32), threshold32,
+                   np.concatenate(lefts).astype(np.int32), np.ascontiguousarray(np.concatenate(values).T),
+                   np.array(roots, dtype=np.int32), max_depth, np.asarray(forest.classes_),
+                   int(forest.n_features_in_))
+
+    def predict_proba(self, X: np.ndarray, chunk_size: int = 2048) -> np.ndarray:
+        """Same output as forest.predict_proba(X), columns in self.classes order."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_features = X.shape[1]
+        out = np.empty((len(X), len(self.values)))
+        for begin in range(0, len(X), chunk_size):
+            block = X[begin:begin + chunk_size]
+            # Row offsets into the flattened block, one per (sample, tree) walker
+            base = (np.arange(len(block), dtype=np.int32) * n_features)[:, None]
+            node = np.repeat(self.roots[None, :], len(block), axis=0)
+            flat = block.ravel()
+            for _ in range(self.max_depth):
+                x = np.take(flat, base + np.take(self.feature, node))
+                node = np.take(self.left, node) + (x > np.take(self.threshold, node))
+            for column, leaf_values in enumerate(self.values):
+                out[begin:begin + chunk_size, column] = np.take(leaf_values, node).mean(axis=1)
+        return out
+
+    def save(self, directory: str) -> dict:
+        """Writes one .npy per array (memory-mappable) and returns the scalar metadata."""
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        return {"max_depth": int(self.max_depth), "classes": self.classes.tolist(),
+                "n_features": int(self.n_features)}
+
+    @classmethod
+    def load(cls, directory: str, meta: dict, mmap: bool = True) -> "CompiledForest":
+        """Opens arrays written by save(); with mmap they are shared read-only between processes."""
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in cls.ARRAYS}
+        return cls(**arrays, max_depth=meta["max_depth"], classes=np.array(meta["classes"]),
+                   n_features=meta["n_features"])
+
+    def max_deviation(self, forest: RandomForestClassifier, X: np.ndarray) -> float:
+        """Largest absolute probability difference against the sklearn forest on X."""
+        return float(np.abs(self.predict_proba(X) - forest.predict_proba(X)).max()) if len(X) else 0.0
+
+    def probe_inputs(self, n: int = 512, seed: int = 0) -> np.ndarray:
+        """Random inputs spanning every feature's split thresholds, for parity checks."""
+        rng = np.random.default_rng(seed)
+        X = np.zeros((n, self.n_features))
+        split = np.isfinite(self.threshold)
+        for f in range(self.n_features):
+            cuts = self.threshold[split & (self.feature == f)]
+            if len(cuts):
+                span = max(cuts.max() - cuts.min(), 1.0)
+                X[:, f] = rng.uniform(cuts.min() - 0.1 * span, cuts.max() + 0.1 * span, n)
+        # Include values exactly on split points: the <= boundary must match too
+        cuts = self.threshold[split]
+        if len(cuts):
+            pick = rng.integers(0, len(cuts), n // 4)
+            X[np.arange(n // 4), self.feature[split][pick]] = cuts[pick]
+        return X
+
+
 class RiskClassifier:
     """
     The Diagnostic Engine.
@@ -10,15 +129,72 @@ class RiskClassifier:
     based on a vector of patient biomarkers.
     """
 
-    def __init__(self, model_path="assets/models/risk_rf.pkl"):
+    # Above this many rows sklearn's Cython traversal outruns the NumPy walk
+    # and its fixed per-call overhead no longer matters
+    COMPILED_BATCH_LIMIT = 1024
+
+    def __init__(self, model_path="assets/models/risk_rf.pkl", compiled=True, registry=None,
+                 model_name="risk_rf"):
         self.model_path = model_path
         self.model = None
+        self.forest: Optional[CompiledForest] = None
         self.labels = ["Healthy", "Cardiovascular_Risk", "Diabetes_Type2", "Oncology_Alert"]
+        # With a ModelRegistry, the active version of model_name is served
+        # (memory-mapped, hot-swappable); model_path is only read while
+        # nothing has been published to it yet
+        self.registry = registry
+        self.model_name = model_name
         
         # Load pre-trained model if it exists, else use heuristics
-        if os.path.exists(model_path):
+        published = registry is not None and registry.active_version(model_name) is not None
+        if not published and os.path.exists(model_path):
             with open(model_path, "rb") as f:
                 self.model = pickle.load(f)
+            if compiled:
+                self.compile()
+
+    def compile(self, tolerance: float = 1e-9) -> bool:
+        """
+        Builds the vectorized forest and keeps it only if it matches sklearn on
+        probe inputs; otherwise inference stays on predict_proba.
+        """
+        self.forest = None
+        if not isinstance(self.model, RandomForestClassifier):
+            return False
+        forest = CompiledForest.from_sklearn(self.model)
+        if forest.max_deviation(self.model, forest.probe_inputs()) <= tolerance:
+            self.forest = forest
+        return self.forest is not None
+
+    def _serving(self):
+        """Holder of .forest and .model for this call: the registry's active version, or self."""
+        if self.registry is not None:
+            version = self.registry.current(self.model_name)
+            if version is not None:
+                return version
+        return self
+
+    def _label_columns(self, probs: np.ndarray, classes: np.ndarray) -> np.ndarray:
+        """Reorders model columns to self.labels (classes absent from training get 0)."""
+        out = np.zeros((len(probs), len(self.labels)))
+        for column, label in enumerate(classes):
+            out[:, int(label)] = probs[:, column]
+        return out
+
+    def predict_batch(self, patient_matrix: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        Input: N x 6 matrix of [Age, BMI, Systolic_BP, Glucose, Cholesterol, Smoker_Flag]
+        Output: N x 4 probabilities, columns in self.labels order.
+        """
+        X = np.asarray(patient_matrix, dtype=np.float64).reshape(-1, 6)
+        serving = self._serving()
+        forest = serving.forest
+        if forest is not None and len(X) <= self.COMPILED_BATCH_LIMIT:
+            return self._label_columns(forest.predict_proba(X), forest.classes)
+        if forest is not None or serving.model:
+            model = serving.model
+            return self._label_columns(model.predict_proba(X), model.classes_)
+        return self._heuristic_batch(X)
 
     def predict_disease_prob(self, patient_vector: list) -> dict:
         """
@@ -26,15 +202,10 @@ class RiskClassifier:
         Output: Dictionary of probabilities for each disease class.
         """
         # If we have a trained AI, use it
-        if self.model:
-            # Reshape for single sample prediction
-            input_data = np.array(patient_vector).reshape(1, -1)
-            probs = self.model.predict_proba(input_data)[0]
-            
-            result = {}
-            for i, label in enumerate(self.labels):
-                result[label] = round(probs[i], 4)
-            return result
+        serving = self._serving()
+        if serving.forest is not None or serving.model:
+            probs = np.round(self.predict_batch([patient_vector])[0], 4)
+            return dict(zip(self.labels, probs.tolist()))
 
         # --- FALLBACK HEURISTICS (If no AI trained yet) ---
         # Useful for testing without training data
@@ -61,4 +232,16 @@ class RiskClassifier:
             "Cardiovascular_Risk": min(0.99, cardio_score),
             "Diabetes_Type2": min(0.99, diabetes_score),
             "Oncology_Alert": 0.15 # Baseline risk
-        }
\ No newline at end of file
+        }
+
+    def _heuristic_batch(self, X: np.ndarray) -> np.ndarray:
+        """_heuristic_logic for a whole N x 6 matrix."""
+        age, bmi, bp, gluc, chol, smoke = X.T
+        cardio_score = 0.1 + 0.3 * (bp > 140) + 0.3 * (chol > 240) + 0.2 * (smoke != 0)
+        diabetes_score = 0.05 + 0.5 * (gluc > 120) + 0.3 * (bmi > 30)
+        return np.column_stack([
+            np.maximum(0, 1 - (cardio_score + diabetes_score)),
+            np.minimum(0.99, cardio_score),
+            np.minimum(0.99, diabetes_score),
+            np.full(len(X), 0.15),
+        ])
@@ -1,3 +1,18 @@
+import math
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Summary histograms: values are kept at the 0.1-year precision of predict_lifespan
+_BIN_WIDTH = 0.1
+_BIN_LOW, _BIN_HIGH = -50.0, 200.0
+_N_BINS = int(round((_BIN_HIGH - _BIN_LOW) / _BIN_WIDTH)) + 1
+
+DEFAULT_AGE_BANDS = (0, 18, 30, 45, 60, 75, 90)
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
 class LifeExpectancyModel:
     """
     The Prognostic Engine.
@@ -39,4 +54,147 @@ class LifeExpectancyModel:
             "predicted_lifespan": round(predicted_age, 1),
             "biological_age": round(biological_age, 1),
             "years_lost_to_lifestyle": round(years_lost, 1)
-        }
\ No newline at end of file
+        }
+
+    # --- Cohort API ---
+
+    @property
+    def factor_names(self) -> List[str]:
+        """Column order of factor matrices; bit i of a bitmask is factor_names[i]."""
+        return list(self.coefficients)
+
+    def encode_factors(self, risk_factor_lists: Iterable[Sequence[str]]) -> np.ndarray:
+        """Lists of factor names -> N x K boolean matrix (unknown names are ignored)."""
+        column = {name: i for i, name in enumerate(self.coefficients)}
+        rows, cols, n = [], [], 0
+        for n, factors in enumerate(risk_factor_lists, 1):
+            for factor in factors:
+                if factor in column:
+                    rows.append(n - 1)
+                    cols.append(column[factor])
+        matrix = np.zeros((n, len(column)), dtype=bool)
+        matrix[rows, cols] = True
+        return matrix
+
+    def _factor_matrix(self, factors: np.ndarray) -> np.ndarray:
+        """Accepts an N x K boolean/0-1 matrix or an N vector of bitmasks."""
+        factors = np.asarray(factors)
+        if factors.ndim == 1:
+            bits = np.arange(len(self.coefficients), dtype=np.int64)
+            return ((factors.astype(np.int64)[:, None] >> bits) & 1).astype(bool)
+        if factors.shape[1] != len(self.coefficients):
+            raise ValueError(f"Expected {len(self.coefficients)} factor columns, got {factors.shape[1]}")
+        return factors
+
+    def predict_cohort(self, ages: Sequence[float], factors: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized predict_lifespan for a whole cohort (values are not rounded).
+        factors: N x K matrix in factor_names order, or N bitmasks.
+        """
+        ages = np.asarray(ages, dtype=np.float64)
+        coefficients = np.fromiter(self.coefficients.values(), dtype=np.float64, count=len(self.coefficients))
+        delta = self._factor_matrix(factors).astype(np.float64) @ coefficients
+        predicted = self.base_expectancy + delta
+        years_lost = self.base_expectancy - predicted
+        return {
+            "chronological_age": ages,
+            "predicted_lifespan": predicted,
+            "biological_age": ages + years_lost * 0.5,
+            "years_lost_to_lifestyle": years_lost,
+        }
+
+    def iter_cohort_csv(self, path: str, chunk_size: int = 1_000_000) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Streams (ages, sexes, factor matrix) chunks from a cohort CSV with an
+        `age` column, an optional `sex` column and either one 0/1 column per
+        factor name, a `risk_bitmask` column, or a `risk_factors` column of
+        ';'-separated names.
+        """
+        for frame in pd.read_csv(path, chunksize=chunk_size):
+            ages = frame["age"].to_numpy(dtype=np.float64)
+            sexes = frame["sex"].astype(str).to_numpy() if "sex" in frame else np.full(len(frame), "U", dtype=object)
+            if "risk_bitmask" in frame:
+                factors = self._factor_matrix(frame["risk_bitmask"].to_numpy())
+            elif "risk_factors" in frame:
+                names = frame["risk_factors"].fillna("").str.get_dummies(sep=";")
+                factors = names.reindex(columns=self.factor_names, fill_value=0).to_numpy(dtype=bool)
+            else:
+                factors = frame.reindex(columns=self.factor_names, fill_value=0).fillna(0).to_numpy(dtype=bool)
+            yield ages, sexes, factors
+
+    def summarize_cohort(self, chunks: Iterable[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                         age_bands: Sequence[float] = DEFAULT_AGE_BANDS,
+                         percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+        """
+        Percentiles of predicted lifespan and biological age per (age band, sex)
+        over streamed (ages, sexes, factors) chunks, e.g. from iter_cohort_csv.
+        Chunks are folded into fixed 0.1-year histograms, so memory does not
+        grow with the cohort and no per-person records are built.
+        """
+        summary = CohortLifespanSummary(age_bands)
+        for ages, sexes, factors in chunks:
+            projection = self.predict_cohort(ages, factors)
+            summary.add(projection["chronological_age"], sexes,
+                        projection["predicted_lifespan"], projection["biological_age"])
+        return summary.result(percentiles)
+
+
+class CohortLifespanSummary:
+    """Per-group histograms of lifespan and biological age, mergeable across chunks."""
+
+    METRICS = ("predicted_lifespan", "biological_age")
+
+    def __init__(self, age_bands: Sequence[float] = DEFAULT_AGE_BANDS):
+        self.edges = np.asarray(age_bands, dtype=np.float64)
+        self.band_labels = [f"{int(low)}-{int(high) - 1}" for low, high in zip(self.edges[:-1], self.edges[1:])]
+        self.band_labels.append(f"{int(self.edges[-1])}+")
+        self.sexes: Dict[str, int] = {}
+        self.histograms = {metric: np.zeros((0, _N_BINS), dtype=np.int64) for metric in self.METRICS}
+        self.sums = {metric: np.zeros(0) for metric in self.METRICS}
+
+    def _group_ids(self, ages: np.ndarray, sexes: np.ndarray) -> np.ndarray:
+        labels, sex_codes = np.unique(np.asarray(sexes).astype(str), return_inverse=True)
+        for label in labels:
+            self.sexes.setdefault(label, len(self.sexes))
+        sex_ids = np.array([self.sexes[label] for label in labels])[sex_codes.ravel()]
+        bands = np.clip(np.searchsorted(self.edges, ages, side="right") - 1, 0, len(self.edges) - 1)
+        return sex_ids * len(self.edges) + bands
+
+    def add(self, ages: np.ndarray, sexes: np.ndarray, lifespans: np.ndarray, biological_ages: np.ndarray):
+        groups = self._group_ids(np.asarray(ages, dtype=np.float64), sexes)
+        n_groups = len(self.sexes) * len(self.edges)
+        for metric, values in zip(self.METRICS, (lifespans, biological_ages)):
+            histogram = self.histograms[metric]
+            if len(histogram) < n_groups:
+                histogram = self.histograms[metric] = np.vstack(
+                    (histogram, np.zeros((n_groups - len(histogram), _N_BINS), dtype=np.int64)))
+                self.sums[metric] = np.concatenate((self.sums[metric], np.zeros(n_groups - len(self.sums[metric]))))
+            bins = np.clip(np.rint((values - _BIN_LOW) / _BIN_WIDTH).astype(np.int64), 0, _N_BINS - 1)
+            histogram += np.bincount(groups * _N_BINS + bins, minlength=n_groups * _N_BINS).reshape(n_groups, _N_BINS)
+            self.sums[metric] += np.bincount(groups, weights=values, minlength=n_groups)
+
+    def result(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+        """One row per non-empty (age_band, sex) group; percentiles are nearest-rank at 0.1 years."""
+        index, columns = [], {"count": []}
+        for metric in self.METRICS:
+            columns[f"{metric}_mean"] = []
+            for p in percentiles:
+                columns[f"{metric}_p{p:g}"] = []
+
+        counts = self.histograms[self.METRICS[0]].sum(axis=1)
+        for sex, sex_id in sorted(self.sexes.items()):
+            for band, label in enumerate(self.band_labels):
+                group = sex_id * len(self.edges) + band
+                if group >= len(counts) or counts[group] == 0:
+                    continue
+                n = int(counts[group])
+                index.append((label, sex))
+                columns["count"].append(n)
+                for metric in self.METRICS:
+                    cumulative = np.cumsum(self.histograms[metric][group])
+                    columns[f"{metric}_mean"].append(self.sums[metric][group] / n)
+                    for p in percentiles:
+                        rank = max(1, math.ceil(p / 100 * n))
+                        columns[f"{metric}_p{p:g}"].append(
+                            round(_BIN_LOW + int(np.searchsorted(cumulative, rank)) * _BIN_WIDTH, 1))
+        return pd.DataFrame(columns, index=pd.MultiIndex.from_tuples(index, names=["age_band", "sex"]))
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Versioned model artifacts.
+
+    root/<name>/CURRENT          active version id (replaced atomically)
+    root/<name>/<version>/
+        manifest.json            version, created_at, sha256 of the files below,
+                                 compiled-forest metadata
+        model.pkl                the fitted estimator
+        feature.npy ...          CompiledForest arrays (random forests only)
+
+Versions are never modified after publishing. Workers memory-map the .npy
+arrays read-only, so every process on a host shares one copy through the
+page cache; model.pkl is only unpickled if a worker actually needs sklearn.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from sklearn.ensemble import RandomForestClassifier
+
+from .disease_risk_classifier import CompiledForest
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+_VERSION = re.compile(r"^v(\d+)$")
+
+# Loaded versions, shared by every registry instance in the process
+_LOADED: Dict[str, "ModelVersion"] = {}
+_LOADED_LOCK = threading.Lock()
+
+
+def _content_hash(directory: str) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        if name == "manifest.json":
+            continue
+        digest.update(name.encode("utf-8") + b"\0")
+        with open(os.path.join(directory, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelVersion:
+    """One published version: the compiled forest is mapped on load, the estimator on first use."""
+
+    def __init__(self, name: str, version: str, path: str, manifest: dict):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.manifest = manifest
+        compiled = manifest.get("compiled_forest")
+        self.forest: Optional[CompiledForest] = CompiledForest.load(path, compiled) if compiled else None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with open(os.path.join(self.path, "model.pkl"), "rb") as f:
+                        self._model = pickle.load(f)
+        return self._model
+
+    def __repr__(self) -> str:
+        return f"ModelVersion({self.name!r}, {self.version!r})"
+
+
+class ModelRegistry:
+    """
+    Publishes, activates and loads model versions under root_dir.
+    current() re-reads CURRENT at most every poll_interval seconds, so
+    activating a version hot-swaps it in every worker without a restart;
+    requests already holding the previous ModelVersion finish on it.
+    """
+
+    def __init__(self, root_dir: str, poll_interval: float = 2.0):
+        self.root_dir = root_dir
+        self.poll_interval = poll_interval
+        os.makedirs(root_dir, exist_ok=True)
+        self._current: Dict[str, ModelVersion] = {}
+        self._checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _model_dir(self, name: str) -> str:
+        if not _SAFE_NAME.match(name):
+            raise ValueError(f"Invalid model name {name!r}")
+        return os.path.join(self.root_dir, name)
+
+    def versions(self, name: str) -> List[str]:
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        found = [entry for entry in os.listdir(model_dir) if _VERSION.match(entry)]
+        return sorted(found, key=lambda v: int(v[1:]))
+
+    def publish(self, name: str, model, activate: bool = True, metadata: Optional[dict] = None) -> str:
+        """Writes a new immutable version of `model` and returns its id."""
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        tmp_dir = os.path.join(model_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, "model.pkl"), "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            compiled = None
+            if isinstance(model, RandomForestClassifier):
+                forest = CompiledForest.from_sklearn(model)
+                # Same parity gate as RiskClassifier.compile()
+                if forest.max_deviation(model, forest.probe_inputs()) <= 1e-9:
+                    compiled = forest.save(tmp_dir)
+
+            manifest = {
+                "name": name,
+                "created_at": time.time(),
+                "sha256": _content_hash(tmp_dir),
+                "estimator": type(model).__name__,
+                "compiled_forest": compiled,
+                "metadata": metadata or {},
+            }
+            while True:
+                existing = self.versions(name)
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1}"
+                manifest["version"] = version
+                with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+                    json.dump(manifest, f, indent=2)
+                try:
+                    # Fails if a concurrent publisher took this id first
+                    os.rename(tmp_dir, os.path.join(model_dir, version))
+                    break
+                except OSError:
+                    if not os.path.isdir(os.path.join(model_dir, version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(name, version)
+        return version
+
+    def activate(self, name: str, version: str):
+        """Points CURRENT at an existing version (also used for rollbacks)."""
+        if version not in self.versions(name):
+            raise KeyError(f"Unknown version {version!r} of model {name!r}")
+        model_dir = self._model_dir(name)
+        tmp_path = os.path.join(model_dir, f"CURRENT.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(model_dir, "CURRENT"))
+        with self._lock:
+            self._checked.pop(name, None)
+
+    def active_version(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self._model_dir(name), "CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, name: str, version: str, verify: bool = True) -> ModelVersion:
+        """Opens a version, once per process; verify checks the content hash on first load."""
+        path = os.path.join(self._model_dir(name), version)
+        with _LOADED_LOCK:
+            loaded = _LOADED.get(path)
+            if loaded is not None:
+                return loaded
+            with open(os.path.join(path, "manifest.json")) as f:
+                manifest = json.load(f)
+            if verify and _content_hash(path) != manifest["sha256"]:
+                raise ValueError(f"Model {name} {version} does not match its manifest hash")
+            loaded = _LOADED[path] = ModelVersion(name, version, path, manifest)
+            return loaded
+
+    def current(self, name: str) -> Optional[ModelVersion]:
+        """The active version of `name`, or None if nothing was published yet."""
+        now = time.monotonic()
+        with self._lock:
+            current = self._current.get(name)
+            if current is not None and now - self._checked.get(name, 0.0) < self.poll_interval:
+                return current
+            self._checked[name] = now
+        version = self.active_version(name)
+        if version is None:
+            return None
+        if current is None or current.version != version:
+            previous = current
+            current = self.load(name, version)
+            with self._lock:
+                # A single reference swap: readers see either the old or the new version
+                self._current[name] = current
+            if previous is not None:
+                self._release(previous)
+        return current
+
+    @staticmethod
+    def _release(version: ModelVersion):
+        """
+        Drops a swapped-out version from the process cache; its arrays are
+        unmapped once the last request holding it finishes.
+        """
+        with _LOADED_LOCK:
+            if _LOADED.get(version.path) is version:
+                del _LOADED[version.path]
@@ -1,74 +1,234 @@
 import numpy as np
 import pickle
 import os
+import glob
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+N_CLASSES = 4  # 0=Healthy, 1=Cardio, 2=Diabetes, 3=Oncology
+
+
+def generate_chunk(rng: np.random.Generator, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    n synthetic patients as (X, y): X columns [Age, BMI, BP, Glucose, Chol, Smoker],
+    same distributions and labelling rules as the original per-row generator.
+    """
+    X = np.empty((n, 6))
+    X[:, 0] = rng.integers(20, 90, n)
+    X[:, 1] = rng.normal(25, 5, n)
+    X[:, 2] = rng.normal(120, 15, n)
+    X[:, 3] = rng.normal(100, 20, n)
+    X[:, 4] = rng.normal(200, 40, n)
+    X[:, 5] = rng.random(n) < 0.2
+    age, bmi, bp, gluc, chol, smoker = X.T
+
+    # Rules are applied in reverse priority so earlier rules overwrite later ones
+    y = np.zeros(n, dtype=np.int8)
+    y[(age > 60) & (rng.random(n) > 0.9)] = 3
+    y[(gluc > 126) | ((bmi > 35) & (age > 45))] = 2
+    y[(bp > 140) | ((chol > 240) & (smoker == 1))] = 1
+    return X, y
+
+
+def iter_synthetic_chunks(n_samples: int, chunk_size: int = 1_000_000,
+                          seed: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yields (X, y) chunks of at most chunk_size rows from one seeded Generator."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_samples, chunk_size):
+        yield generate_chunk(rng, min(chunk_size, n_samples - start))
+
+
+def _write_shard(path: str, seed: np.random.SeedSequence, n: int) -> str:
+    X, y = generate_chunk(np.random.default_rng(seed), n)
+    # Through a file handle so savez keeps the name: "*.npz.tmp" never matches the shard glob
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, X=X, y=y)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_shards(output_dir: str, n_samples: int, shard_size: int = 1_000_000,
+                 seed: Optional[int] = None, workers: Optional[int] = None) -> List[str]:
+    """
+    Writes the cohort as shard_<i>.npz files (arrays X, y) in parallel.
+    Every shard gets its own child SeedSequence, so the data depends on the
+    seed only, not on the number of workers.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sizes = [min(shard_size, n_samples - start) for start in range(0, n_samples, shard_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    paths = [os.path.join(output_dir, f"shard_{i:05d}.npz") for i in range(len(sizes))]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            return list(pool.map(_write_shard, paths, seeds, sizes))
+    return [_write_shard(path, s, n) for path, s, n in zip(paths, seeds, sizes)]
+
+
+def iter_shards(shard_dir: str) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Loads shards one at a time, in file order."""
+    for path in sorted(glob.glob(os.path.join(shard_dir, "shard_*.npz"))):
+        with np.load(path) as shard:
+            yield shard["X"], shard["y"]
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS); process lifetime peak
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
 class AI_Trainer:
     """
     Generates synthetic medical data and trains the Random Forest model.
     Run this script once to 'teach' the AI before starting the server.
     """
-    
-    def __init__(self, save_path="assets/models/risk_rf.pkl"):
+
+    def __init__(self, save_path="assets/models/risk_rf.pkl", n_jobs=-1, registry=None, model_name="risk_rf",
+                 trace_memory=False):
         self.save_path = save_path
+        self.n_jobs = n_jobs  # -1: fit trees on all cores
+        # tracemalloc slows allocation-heavy phases down, so peak_mb is opt-in
+        self.trace_memory = trace_memory
+        # With a ModelRegistry, trained models are published as new versions
+        # instead of overwriting save_path under live traffic
+        self.registry = registry
+        self.model_name = model_name
         # Features: [Age, BMI, BP, Glucose, Chol, Smoker]
-        self.X_data = [] 
-        self.y_data = [] # Labels: 0=Healthy, 1=Cardio, 2=Diabetes, 3=Oncology
+        self.X_data = np.empty((0, 6))
+        self.y_data = np.empty(0, dtype=np.int8) # Labels: 0=Healthy, 1=Cardio, 2=Diabetes, 3=Oncology
+        self.report: Dict[str, dict] = {}
+
+    @contextmanager
+    def _phase(self, name: str):
+        """
+        Records wall-clock seconds of a phase in self.report, and its peak
+        traced memory (peak_mb) when trace_memory is enabled.
+        """
+        tracing = tracemalloc.is_tracing()
+        if self.trace_memory:
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            peak_mb = None
+            if self.trace_memory:
+                peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                if not tracing:
+                    tracemalloc.stop()
+            self.report[name] = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "peak_mb": peak_mb,
+                "max_rss_mb": _max_rss_mb(),
+            }
+            peak = f", peak {peak_mb:.1f} MB" if peak_mb is not None else ""
+            print(f"[{name}] {self.report[name]['seconds']:.2f}s{peak}")
 
-    def generate_synthetic_data(self, n_samples=5000):
+    def generate_synthetic_data(self, n_samples=5000, seed=None, chunk_size=1_000_000):
         print(f"Generating {n_samples} synthetic patient records...")
-        
-        for _ in range(n_samples):
-            # Randomize attributes
-            age = np.random.randint(20, 90)
-            bmi = np.random.normal(25, 5)
-            bp = np.random.normal(120, 15)
-            gluc = np.random.normal(100, 20)
-            chol = np.random.normal(200, 40)
-            smoker = np.random.choice([0, 1], p=[0.8, 0.2])
-            
-            features = [age, bmi, bp, gluc, chol, smoker]
-            
-            # Determine "Ground Truth" label based on logic
-            label = 0 # Healthy
-            if bp > 140 or (chol > 240 and smoker):
-                label = 1 # Cardio
-            elif gluc > 126 or (bmi > 35 and age > 45):
-                label = 2 # Diabetes
-            elif age > 60 and np.random.random() > 0.9:
-                label = 3 # Random cancer risk in old age
-                
-            self.X_data.append(features)
-            self.y_data.append(label)
+        with self._phase("generate"):
+            X = np.empty((n_samples, 6))
+            y = np.empty(n_samples, dtype=np.int8)
+            start = 0
+            for X_chunk, y_chunk in iter_synthetic_chunks(n_samples, chunk_size, seed):
+                X[start:start + len(y_chunk)] = X_chunk
+                y[start:start + len(y_chunk)] = y_chunk
+                start += len(y_chunk)
+            self.X_data, self.y_data = X, y
+
+    def _save(self, clf):
+        if self.registry is not None:
+            version = self.registry.publish(self.model_name, clf, metadata={"report": self.report})
+            print(f"Model published as {self.model_name} {version}")
+            return
+
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
+
+        # Save Model
+        with open(self.save_path, "wb") as f:
+            pickle.dump(clf, f)
+        print(f"Model saved to {self.save_path}")
 
     def train_and_save(self):
         # Convert to numpy arrays
-        X = np.array(self.X_data)
-        y = np.array(self.y_data)
-        
+        X = np.asarray(self.X_data)
+        y = np.asarray(self.y_data)
+
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
-        
+
         # Initialize and Train
         print("Training Random Forest Classifier...")
-        clf = RandomForestClassifier(n_estimators=100, max_depth=10)
-        clf.fit(X_train, y_train)
-        
+        clf = RandomForestClassifier(n_estimators=100, max_depth=10, n_jobs=self.n_jobs)
+        with self._phase("train"):
+            clf.fit(X_train, y_train)
+
         # Validate
-        accuracy = clf.score(X_test, y_test)
+        with self._phase("validate"):
+            accuracy = clf.score(X_test, y_test)
         print(f"Model Training Complete. Validation Accuracy: {accuracy*100:.2f}%")
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
-        
-        # Save Model
-        with open(self.save_path, "wb") as f:
-            pickle.dump(clf, f)
-        print(f"Model saved to {self.save_path}")
+
+        self._save(clf)
+
+    def train_from_shards(self, shard_dir, trees_per_shard=10, max_depth=10, holdout_rows=100_000):
+        """
+        Out-of-core training: each shard is loaded on its own and grows the
+        forest by trees_per_shard trees (warm start), so peak memory is one
+        shard. The first holdout_rows rows of the last shard are held out
+        for validation.
+        """
+        paths = sorted(glob.glob(os.path.join(shard_dir, "shard_*.npz")))
+        if not paths:
+            raise FileNotFoundError(f"No shard_*.npz files in {shard_dir}")
+
+        print(f"Training Random Forest Classifier on {len(paths)} shards...")
+        clf = RandomForestClassifier(n_estimators=0, max_depth=max_depth, n_jobs=self.n_jobs, warm_start=True)
+        X_test = y_test = None
+        with self._phase("train"):
+            for i, (X, y) in enumerate(iter_shards(shard_dir)):
+                if i == len(paths) - 1 and len(paths) > 1:
+                    X_test, y_test = X[:holdout_rows], y[:holdout_rows]
+                    X, y = X[holdout_rows:], y[holdout_rows:]
+                # New trees encode labels from this shard alone: all classes must be present
+                if len(np.unique(y)) != N_CLASSES:
+                    print(f"Skipping shard {paths[i]}: not every class is represented")
+                    continue
+                clf.n_estimators += trees_per_shard
+                clf.fit(X, y)
+        if clf.n_estimators == 0:
+            raise ValueError("No usable shards to train on")
+
+        if X_test is not None:
+            with self._phase("validate"):
+                accuracy = clf.score(X_test, y_test)
+            print(f"Model Training Complete. Validation Accuracy: {accuracy*100:.2f}%")
+
+        self._save(clf)
+        return clf
 
 # --- EXECUTION BLOCK ---
 if __name__ == "__main__":
-    trainer = AI_Trainer()
+    # python -m backend_core.predictive_ai.model_trainer
+    from ..config_loader import settings
+    from .model_registry import ModelRegistry
+
+    trainer = AI_Trainer(registry=ModelRegistry(settings.MODEL_REGISTRY_DIR, settings.MODEL_REGISTRY_POLL_SECONDS))
     trainer.generate_synthetic_data()
-    trainer.train_and_save()
\ No newline at end of file
+    trainer.train_and_save()
@@ -1,13 +1,15 @@
 
-import csv
-import os
+import threading
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 
+from user_store import PatientStore
+
 app = Flask(__name__)
 CORS(app)
 
-DB_FILE = 'patients.csv'
+DB_FILE = 'patients.csv'          # legacy flat file, imported once
+STORE_FILE = 'patients.sqlite3'   # indexed store used for logins/registrations
 
 # ADDED: 'patient_photo' and 'patient_csv' to the end
 CSV_HEADERS = [
@@ -19,38 +21,39 @@ CSV_HEADERS = [
     'patient_photo', 'patient_csv' 
 ]
 
+_store = None
+_store_lock = threading.Lock()
+
 def init_db():
-    # We check if file exists. If not, create it.
-    if not os.path.exists(DB_FILE):
-        with open(DB_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(CSV_HEADERS)
-            # Default Admin
-            writer.writerow(['admin', 'bio123', 'Dr. Ari', 'admin@y314.com', 'male', 'human_male.glb'] + ['']*(len(CSV_HEADERS)-6))
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = _open_store()
+    return _store
+
+def _open_store():
+    store = PatientStore(STORE_FILE, CSV_HEADERS)
+    # Bring over any accounts from the old CSV database (no-op after the first run)
+    imported = store.import_csv(DB_FILE)
+    if imported:
+        print(f"Imported {imported} patients from {DB_FILE}")
+    if store.count() == 0:
+        # Default Admin
+        store.add(dict(zip(CSV_HEADERS, ['admin', 'bio123', 'Dr. Ari', 'admin@y314.com', 'male', 'human_male.glb'])))
+    return store
 
 def get_user(username):
-    init_db()
-    with open(DB_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['username'] == username:
-                return row
-    return None
+    return init_db().get(username)
 
 def add_user(data):
-    init_db()
-    if get_user(data['username']):
-        return False
-    
-    with open(DB_FILE, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        row = []
-        for header in CSV_HEADERS:
-            # Safe get: if data is missing, put empty string
-            row.append(data.get(header, ''))
-        
-        writer.writerow(row)
-    return True
+    return init_db().add(data)
+
+def assign_model(data):
+    sex = data.get('sex').lower()
+    if sex == 'female':
+        data['model'] = 'human_female.glb'
+    else:
+        data['model'] = 'human_male.glb'
 
 @app.route('/')
 def home():
@@ -70,11 +73,7 @@ def register():
     if not data.get('username') or not data.get('password') or not data.get('sex'):
         return jsonify({"success": False, "message": "Username, Password, and Sex are required."}), 400
         
-    sex = data.get('sex').lower()
-    if sex == 'female':
-        data['model'] = 'human_female.glb'
-    else:
-        data['model'] = 'human_male.glb'
+    assign_model(data)
 
     success = add_user(data)
     if success:
@@ -82,7 +81,32 @@ def register():
     else:
         return jsonify({"success": False, "message": "User ID taken"}), 409
 
+@app.route('/api/register/bulk', methods=['POST'])
+def register_bulk():
+    """
+    Registers a whole clinic in one request.
+    Body: {"patients": [{username, password, sex, ...}, ...]}
+    Entries that are not objects or lack a username, password or sex are
+    skipped and reported by their position in "invalid".
+    """
+    body = request.get_json(silent=True)
+    patients = body.get('patients') if isinstance(body, dict) else None
+    if not isinstance(patients, list):
+        return jsonify({"success": False, "message": "Body must be {\"patients\": [...]}"}), 400
+
+    valid, invalid = [], []
+    for index, data in enumerate(patients):
+        if not isinstance(data, dict) or not all(
+                isinstance(data.get(key), str) and data.get(key) for key in ('username', 'password', 'sex')):
+            invalid.append(index)
+            continue
+        assign_model(data)
+        valid.append(data)
+
+    added, taken = init_db().add_many(valid)
+    return jsonify({"success": True, "registered": added, "taken": taken, "invalid": invalid})
+
 if __name__ == '__main__':
     init_db()
-    print("🚀 Y314 Database Linked: patients.csv")
+    print("🚀 Y314 Database Linked: patients.sqlite3")
     app.run(debug=True, port=5000)
@@ -0,0 +1,126 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .config_loader import settings
+from .models.patient_schema import PatientTwin, OrganStats, GeneticProfile
+from .models.simulation_schema import SimulationParams
+from .biological_engine.cell_cycle_simulator import CellCycleMonitor
+from .biological_engine.immune_system_optimizer import ImmuneDefenseSim
+from .biological_engine.dna_transcription_sim import GeneticSequencer
+
+logger = logging.getLogger("BioTwin_Kernel")
+
+
+def simulate_patient(patient_id: str, params: SimulationParams,
+                     bio_engine: Optional[CellCycleMonitor] = None,
+                     immune_engine: Optional[ImmuneDefenseSim] = None,
+                     dna_engine: Optional[GeneticSequencer] = None,
+                     progress_callback: Optional[Callable[[float], None]] = None) -> PatientTwin:
+    """
+    Runs the cell-cycle, immune and genetics stages for one patient and
+    assembles the PatientTwin. Engines that are not passed in are created
+    fresh from `params` (with the configured event log capacity and audit
+    stream).
+
+    :param progress_callback: called with the completed fraction (0.0 - 1.0);
+        it may raise to abort the run (used for job cancellation).
+    """
+    def report(fraction: float):
+        if progress_callback is not None:
+            progress_callback(fraction)
+
+    if bio_engine is None:
+        bio_engine = CellCycleMonitor(
+            p53_gene_status=params.p53_gene_status,
+            log_capacity=settings.SIMULATION_LOG_CAPACITY,
+            audit_log_path=settings.SIMULATION_AUDIT_LOG
+        )
+    if immune_engine is None:
+        immune_engine = ImmuneDefenseSim(t_cell_count=params.t_cell_count, pathogen_load=params.pathogen_load)
+    if dna_engine is None:
+        dna_engine = GeneticSequencer()
+
+    # 1. Run Cellular Simulation (Stochastic Model)
+    # The cell cycle dominates the run time, so it gets 90% of the progress bar
+    mitosis_results = bio_engine.simulate_mitosis(
+        time_steps=params.time_steps,
+        cellular_stress=params.cellular_stress,
+        progress_callback=lambda fraction: report(fraction * 0.9)
+    )
+
+    # 2. Run Immune Simulation
+    report(0.9)
+    battle_results = immune_engine.run_battle_simulation(efficiency_rate=params.efficiency_rate)
+
+    # 3. Genetics: only screened when a sequence is supplied
+    if params.dna_sequence:
+        dna_snippet = params.dna_sequence[:32]
+        detected_mutations = dna_engine.analyze_risk(params.dna_sequence)
+    else:
+        # In a real app, this data would come from the CSV readers
+        dna_snippet = "ATCG..."
+        detected_mutations = ["BRCA1_Variant_Unknown"]
+
+    report(1.0)
+    return PatientTwin(
+        id=patient_id,
+        age=34,
+        biological_sex="Female",
+        organs={
+            "Heart": OrganStats(name="Heart", health_index=88.5, blood_perfusion=98.0, cancer_risk_score=0.1),
+            "Liver": OrganStats(name="Liver", health_index=mitosis_results['cancer_risk_score'], blood_perfusion=92.0, cancer_risk_score=mitosis_results['cancer_risk_score'])
+        },
+        genetics=GeneticProfile(
+            dna_snippet=dna_snippet,
+            detected_mutations=detected_mutations,
+            epigenetic_age=36.2
+        ),
+        simulation_log=mitosis_results['event_log'].tail(5) # Only the last 5 events are formatted
+    )
+
+
+def _run_chunk(items: List[Tuple[str, dict]]) -> List[dict]:
+    """Process-pool task: simulates a chunk of patients, one result dict each."""
+    results = []
+    for patient_id, params in items:
+        try:
+            twin = simulate_patient(patient_id, SimulationParams(**params))
+            results.append({"patient_id": patient_id, "status": "ok", "twin": twin.model_dump()})
+        except Exception as e:
+            results.append({"patient_id": patient_id, "status": "failed", "error": str(e)})
+    return results
+
+
+def run_batch(items: Iterable[Tuple[str, SimulationParams]], max_workers: Optional[int] = None,
+              chunk_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Simulates many patients across a process pool.
+    Yields one result dict per patient, in completion order (not input order).
+
+    :param items: (patient_id, SimulationParams) pairs.
+    :param max_workers: worker processes, defaults to the number of CPU cores.
+    :param chunk_size: patients per task; larger chunks amortise the IPC cost.
+    """
+    payload = [(patient_id, params.model_dump()) for patient_id, params in items]
+    if not payload:
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # Aim for a few tasks per worker so stragglers don't idle the pool
+        chunk_size = max(1, len(payload) // (max_workers * 4))
+
+    chunks = [payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)]
+    logger.info(f"Batch simulation: {len(payload)} patients, {len(chunks)} chunks, {max_workers} workers")
+
+    executor = ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)))
+    try:
+        futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                yield result
+    finally:
+        # Also reached when the consumer stops early (e.g. client disconnect)
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from .biological_engine.cell_cycle_simulator import CellCycleMonitor
+from .biological_engine.immune_system_optimizer import ImmuneDefenseSim
+from .biological_engine.dna_transcription_sim import GeneticSequencer
+
+logger = logging.getLogger("BioTwin_Kernel")
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,100}$")
+
+
+def _estimate_nbytes(obj) -> int:
+    """Rough in-memory size of an engine: object overhead plus its attributes."""
+    total = sys.getsizeof(obj)
+    for value in vars(obj).values():
+        total += value.nbytes if isinstance(value, np.ndarray) else sys.getsizeof(value)
+    return total
+
+
+class TwinEngines:
+    """
+    The simulation engines that belong to one patient's digital twin.
+    Requests for the same patient are serialised through `lock`.
+    """
+
+    def __init__(self, patient_id: str, bio: CellCycleMonitor, immune: ImmuneDefenseSim,
+                 dna: Optional[GeneticSequencer] = None):
+        self.patient_id = patient_id
+        self.bio = bio
+        self.immune = immune
+        self.dna = dna or GeneticSequencer()
+        self.lock = threading.Lock()
+
+    def to_state(self) -> dict:
+        return {
+            "patient_id": self.patient_id,
+            "cell_cycle": {
+                "p53_status": self.bio.p53_status,
+                "current_phase_index": self.bio.current_phase_index,
+                "mutation_load": self.bio.mutation_load,
+            },
+            "immune": {
+                "t_cells": self.immune.t_cells,
+                "pathogens": self.immune.pathogens,
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, log_capacity: int = 1024,
+                   audit_log_path: Optional[str] = None) -> "TwinEngines":
+        cell_state = state["cell_cycle"]
+        bio = CellCycleMonitor(
+            p53_gene_status=cell_state["p53_status"],
+            log_capacity=log_capacity,
+            audit_log_path=audit_log_path
+        )
+        bio.current_phase_index = cell_state["current_phase_index"]
+        bio.mutation_load = cell_state["mutation_load"]
+
+        immune_state = state["immune"]
+        immune = ImmuneDefenseSim(t_cell_count=immune_state["t_cells"], pathogen_load=immune_state["pathogens"])
+        return cls(state["patient_id"], bio, immune)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + _estimate_nbytes(self.bio) + _estimate_nbytes(self.immune) + _estimate_nbytes(self.dna)
+
+
+class TwinStateManager:
+    """
+    Per-patient engine state with an LRU bound on entry count and memory.
+    Evicted twins are written to `state_dir` as JSON and reloaded on the next
+    request for that patient, so warm patients skip the cold start while the
+    process footprint stays bounded.
+    """
+
+    def __init__(self, state_dir: str, max_entries: int = 1024, max_bytes: int = 256 * 1024 * 1024,
+                 log_capacity: int = 1024, audit_log_path: Optional[str] = None):
+        self.state_dir = state_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.log_capacity = log_capacity
+        self.audit_log_path = audit_log_path
+
+        self._entries: "OrderedDict[str, TwinEngines]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        # Twins dropped from the cache whose state is still being written to disk
+        self._evicting: Dict[str, TwinEngines] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _state_path(self, patient_id: str) -> str:
+        if _SAFE_ID.match(patient_id):
+            name = patient_id
+        else:
+            # Patient IDs come from URLs: never use them as raw file names
+            name = "id_" + hashlib.sha256(patient_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    def _new_twin(self, patient_id: str) -> TwinEngines:
+        # Default parameters for a patient seen for the first time
+        bio = CellCycleMonitor(
+            p53_gene_status="functional",
+            log_capacity=self.log_capacity,
+            audit_log_path=self.audit_log_path
+        )
+        immune = ImmuneDefenseSim(t_cell_count=1200, pathogen_load=5000)
+        return TwinEngines(patient_id, bio, immune)
+
+    def _load_or_create(self, patient_id: str) -> TwinEngines:
+        path = self._state_path(patient_id)
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    return TwinEngines.from_state(json.load(f), self.log_capacity, self.audit_log_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Discarding unreadable twin state {path}: {e}")
+        return self._new_twin(patient_id)
+
+    def _persist(self, twin: TwinEngines):
+        path = self._state_path(twin.patient_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(twin.to_state(), f)
+        os.replace(tmp_path, path)
+
+    def get(self, patient_id: str) -> TwinEngines:
+        """Returns the cached twin, reloading it from disk (or creating it) on a miss."""
+        with self._lock:
+            twin = self._entries.get(patient_id)
+            if twin is not None:
+                self._entries.move_to_end(patient_id)
+                self.hits += 1
+                return twin
+
+            # A twin still being persisted is newer than its file: take it back
+            twin = self._evicting.get(patient_id)
+            if twin is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                twin = self._load_or_create(patient_id)
+            self._entries[patient_id] = twin
+            self._sizes[patient_id] = twin.nbytes()
+            self._total_bytes += self._sizes[patient_id]
+            evicted = self._evict(keep=patient_id)
+        self._persist_evicted(evicted)
+        return twin
+
+    @contextmanager
+    def session(self, patient_id: str) -> Iterator[TwinEngines]:
+        """Holds the patient's lock for the duration of a simulation."""
+        while True:
+            twin = self.get(patient_id)
+            twin.lock.acquire()
+            with self._lock:
+                still_cached = self._entries.get(patient_id) is twin
+            if still_cached:
+                break
+            # Evicted between get() and acquire(): get() takes it back or reloads it
+            twin.lock.release()
+
+        try:
+            yield twin
+            # Engine state may have grown during the run
+            with self._lock:
+                new_size = twin.nbytes()
+                self._total_bytes += new_size - self._sizes[patient_id]
+                self._sizes[patient_id] = new_size
+        finally:
+            twin.lock.release()
+
+    def _evict(self, keep: str) -> list:
+        """
+        Drops least recently used twins until the cache fits its bounds and
+        returns them with their locks held; the caller holds self._lock and
+        must pass the result to _persist_evicted() after releasing it.
+        `keep` (the twin being requested) and twins with a simulation in
+        flight are never evicted, so a single oversized twin stays cached.
+        """
+        evicted = []
+        for patient_id in list(self._entries):
+            if len(self._entries) <= self.max_entries and self._total_bytes <= self.max_bytes:
+                break
+            twin = self._entries[patient_id]
+            if patient_id == keep or not twin.lock.acquire(blocking=False):
+                continue
+            del self._entries[patient_id]
+            self._total_bytes -= self._sizes.pop(patient_id)
+            self._evicting[patient_id] = twin
+            evicted.append(twin)
+        return evicted
+
+    def _persist_evicted(self, evicted: list):
+        # Each twin's lock is held until its file is written, so a request
+        # that takes it back through get() waits for the write to finish
+        for twin in evicted:
+            try:
+                self._persist(twin)
+            except OSError as e:
+                logger.error(f"Failed to persist twin state for {twin.patient_id}: {e}")
+                with self._lock:
+                    if twin.patient_id not in self._entries:
+                        # Keep the only copy of its state in memory
+                        self._entries[twin.patient_id] = twin
+                        self._entries.move_to_end(twin.patient_id, last=False)
+                        self._sizes[twin.patient_id] = twin.nbytes()
+                        self._total_bytes += self._sizes[twin.patient_id]
+            finally:
+                with self._lock:
+                    if self._evicting.get(twin.patient_id) is twin:
+                        del self._evicting[twin.patient_id]
+                twin.lock.release()
+
+    def flush_all(self):
+        """Writes every cached twin to disk (e.g. on shutdown)."""
+        with self._lock:
+            twins = list(self._entries.values())
+        for twin in twins:
+            with twin.lock:
+                self._persist(twin)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,113 @@
+import csv
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PatientStore:
+    """
+    SQLite storage for patient/user accounts.
+    Usernames are the primary key, so a login is a single indexed lookup
+    instead of a scan of the whole CSV, and registrations are atomic
+    (INSERT OR IGNORE) so concurrent sign-ups cannot corrupt the table.
+    """
+
+    def __init__(self, db_path: str, columns: List[str]):
+        if columns[0] != "username":
+            raise ValueError("The first column must be 'username'")
+        for column in columns:
+            if not column.isidentifier():
+                raise ValueError(f"Invalid column name: {column!r}")
+
+        self.db_path = db_path
+        self.columns = list(columns)
+        # sqlite3 connections must not be shared between threads
+        self._local = threading.local()
+
+        conn = self._connection()
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            column_defs = ", ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in self.columns[1:])
+            conn.execute(f"CREATE TABLE IF NOT EXISTS patients (username TEXT PRIMARY KEY, {column_defs})")
+            conn.execute("CREATE TABLE IF NOT EXISTS imports (source TEXT PRIMARY KEY, rows INTEGER NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # busy timeout: writers queue up instead of failing under contention
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _row(self, record: Dict) -> Tuple:
+        # Safe get: if data is missing, put empty string
+        return tuple("" if record.get(c) is None else str(record.get(c)) for c in self.columns)
+
+    def get(self, username: str) -> Optional[Dict[str, str]]:
+        row = self._connection().execute(
+            "SELECT * FROM patients WHERE username = ?", (username,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def add(self, record: Dict) -> bool:
+        """Returns False if the username is already taken."""
+        placeholders = ", ".join("?" * len(self.columns))
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO patients ({', '.join(self.columns)}) VALUES ({placeholders})",
+                self._row(record)
+            )
+        return cursor.rowcount == 1
+
+    def add_many(self, records: Iterable[Dict]) -> Tuple[int, List[str]]:
+        """
+        Registers many accounts in one transaction (e.g. onboarding a clinic).
+        Returns (number added, usernames that were already taken).
+        """
+        conn = self._connection()
+        with conn:
+            return self._insert_many(conn, records)
+
+    def _insert_many(self, conn: sqlite3.Connection, records: Iterable[Dict]) -> Tuple[int, List[str]]:
+        # Caller owns the transaction
+        placeholders = ", ".join("?" * len(self.columns))
+        sql = f"INSERT OR IGNORE INTO patients ({', '.join(self.columns)}) VALUES ({placeholders})"
+        added = 0
+        taken = []
+        for record in records:
+            if conn.execute(sql, self._row(record)).rowcount == 1:
+                added += 1
+            else:
+                taken.append(record.get("username"))
+        return added, taken
+
+    def import_csv(self, csv_path: str) -> int:
+        """
+        One-shot import of a legacy patients CSV.
+        Columns are matched by header name; a file that was already imported is skipped.
+        The rows and the import marker are written in one IMMEDIATE transaction,
+        so workers starting together against a fresh database import it once.
+        """
+        source = os.path.abspath(csv_path)
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone():
+            return 0
+        if not os.path.exists(csv_path):
+            return 0
+
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if row.get("username")]
+        with conn:
+            # Takes the write lock up front; re-check under it in case another worker won
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone():
+                return 0
+            added, _ = self._insert_many(conn, rows)
+            conn.execute("INSERT OR IGNORE INTO imports (source, rows) VALUES (?, ?)", (source, added))
+        return added
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM patients").fetchone()[0]
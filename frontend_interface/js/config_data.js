@@ -14,6 +14,9 @@ export const APP_STATE = {
     }
 };
 
+// BioTwin API server (scan tiles); empty = same origin as the page
+export const API_BASE = '';
+
 // Menu Structure for Navigation (Matches HTML Buttons)
 export const SYSTEM_DATA = {
     nervous: [ { id: 'brain', title: 'Brain Model', desc: 'Cerebrum & Cerebellum' } ],
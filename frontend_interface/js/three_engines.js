@@ -141,4 +141,50 @@ function animate() {
     requestAnimationFrame(animate);
     if(controls) controls.update();
     if(renderer && scene && camera) renderer.render(scene, camera);
-}
\ No newline at end of file
+}
+
+// --- Scan point clouds (octree tiles from /api/v1/scans/{id}) ---
+// Tiles are loaded breadth-first: the root gives a coarse preview of the whole
+// scan in one small request, and every level adds detail on top of it.
+// Tile URLs include the tileset's build_id, so a rebuilt scan never mixes in
+// cached tiles from the previous build.
+export async function loadScanTiles(apiBase, scanId, maxDepth = 6) {
+    const base = `${apiBase}/api/v1/scans/${encodeURIComponent(scanId)}`;
+    const tileset = await (await fetchOk(`${base}/tileset`)).json();
+
+    if(currentModel) scene.remove(currentModel);
+    const group = new THREE.Group();
+    const [lo, hi] = tileset.bbox;
+    group.scale.setScalar(0.001); // tiles are in mm
+    group.position.set(-(lo[0] + hi[0]) * 0.0005, -(lo[1] + hi[1]) * 0.0005, -(lo[2] + hi[2]) * 0.0005);
+    scene.add(group);
+    currentModel = group;
+
+    const material = new THREE.PointsMaterial({ size: 2, sizeAttenuation: false, vertexColors: true });
+    let level = [tileset.root];
+    for(let depth = 0; level.length && depth <= maxDepth; depth++) {
+        if(currentModel !== group) return group; // another model was loaded meanwhile
+        await Promise.all(level.map(async (id) => {
+            const buffer = await (await fetchOk(`${base}/tiles/${tileset.build_id}/${id}`)).arrayBuffer();
+            group.add(tileToPoints(buffer, material));
+        }));
+        level = level.flatMap((id) => tileset.tiles[id].children);
+    }
+    return group;
+}
+
+async function fetchOk(url) {
+    const response = await fetch(url);
+    if(!response.ok) throw new Error(`[BioTwin] ${url} failed: HTTP ${response.status}`);
+    return response;
+}
+
+function tileToPoints(buffer, material) {
+    // 16-byte records: float32 x, y, z | uint8 r, g, b, a
+    const floats = new THREE.InterleavedBuffer(new Float32Array(buffer), 4);
+    const bytes = new THREE.InterleavedBuffer(new Uint8Array(buffer), 16);
+    const geometry = new THREE.BufferGeometry();
+    geometry.setAttribute('position', new THREE.InterleavedBufferAttribute(floats, 3, 0));
+    geometry.setAttribute('color', new THREE.InterleavedBufferAttribute(bytes, 4, 12, true));
+    return new THREE.Points(geometry, material);
+}
@@ -1,5 +1,5 @@
-import { APP_STATE, SYSTEM_DATA } from './config_data.js';
-import { loadModel, update3DLighting, resetCam } from './three_engine.js';
+import { APP_STATE, SYSTEM_DATA, API_BASE } from './config_data.js';
+import { loadModel, loadScanTiles, update3DLighting, resetCam } from './three_engine.js';
 
 export function initUI() {
     // Theme
@@ -35,6 +35,18 @@ export function initUI() {
     window.openModal = (id) => document.getElementById(`modal-${id}`).classList.remove('hidden');
     window.closeModal = (id) => document.getElementById(`modal-${id}`).classList.add('hidden');
     window.resetCam = resetCam;
+    window.openScan = openScan;
+}
+
+async function openScan(scanId) {
+    updateInfoPanelGeneric(scanId, 'Loading scan point cloud...');
+    try {
+        await loadScanTiles(API_BASE, scanId);
+        updateInfoPanelGeneric(scanId, 'Patient scan');
+    } catch(e) {
+        console.error(e);
+        updateInfoPanelGeneric(scanId, 'Scan could not be loaded');
+    }
 }
 
 function openSystemPage(systemId, systemName) {